@@ -0,0 +1,189 @@
+"""
+Clientes de datos para la aplicación Streamlit
+Permite elegir entre la API REST de Django (por defecto) y un modo embebido
+que ejecuta las vistas de `tareas` dentro del mismo proceso, sin HTTP ni JSON.
+
+El backend se selecciona con la variable de entorno STREAMLIT_BACKEND:
+    http      -> consume la API en API_BASE_URL (por defecto)
+    embebido  -> inicializa Django en el proceso y llama a los viewsets directamente
+"""
+import os
+
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000/api")
+BACKEND_DATOS = os.getenv("STREAMLIT_BACKEND", "http").strip().lower()
+
+BACKENDS_DISPONIBLES = ("http", "embebido")
+
+
+class ErrorAPI(Exception):
+    """Error al obtener o enviar datos a la API"""
+
+
+def preparar_lote(peticiones):
+    """Convierte {nombre: (endpoint, params)} al cuerpo de /api/batch/"""
+    return [
+        {"id": nombre, "ruta": endpoint, "params": params or {}}
+        for nombre, (endpoint, params) in peticiones.items()
+    ]
+
+
+def extraer_resultados(data):
+    """Devuelve la lista de resultados de una respuesta paginada de Django REST Framework"""
+    if isinstance(data, dict) and 'results' in data:
+        return data['results']
+    return data
+
+
+class ClienteHTTP:
+    """Cliente que consume la API REST de Django por HTTP"""
+
+    nombre = "http"
+
+    def __init__(self, base_url=API_BASE_URL):
+        import requests
+        self._requests = requests
+        self.base_url = base_url.rstrip("/")
+        # Reutiliza la conexión TCP entre peticiones
+        self.sesion = requests.Session()
+
+    def _url(self, endpoint, item_id=None):
+        if item_id is not None:
+            return f"{self.base_url}/{endpoint}/{item_id}/"
+        return f"{self.base_url}/{endpoint}/"
+
+    def _ejecutar(self, metodo, url, **kwargs):
+        try:
+            response = self.sesion.request(metodo, url, **kwargs)
+            response.raise_for_status()
+        except self._requests.exceptions.RequestException as e:
+            raise ErrorAPI(str(e)) from e
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json()
+
+    def get(self, endpoint, params=None):
+        """Realiza una petición GET y devuelve los datos ya decodificados"""
+        return extraer_resultados(self._ejecutar("GET", self._url(endpoint), params=params or {}))
+
+    def get_dataframe(self, endpoint, params=None):
+        """Realiza una petición GET y devuelve los resultados como DataFrame"""
+        import pandas as pd
+        return pd.DataFrame(self.get(endpoint, params) or [])
+
+    def post(self, endpoint, data):
+        """Realiza una petición POST"""
+        return self._ejecutar("POST", self._url(endpoint), json=data)
+
+    def batch(self, peticiones, concurrente=True):
+        """
+        Realiza varias peticiones GET en un solo viaje con /api/batch/.
+        `peticiones` es {nombre: (endpoint, params)}; devuelve {nombre: datos},
+        con un ErrorAPI como valor para las que fallaron.
+        """
+        data = self._ejecutar("POST", self._url("batch"), json={
+            "peticiones": preparar_lote(peticiones), "concurrente": concurrente
+        })
+        resultados = {}
+        for respuesta in data["respuestas"]:
+            if respuesta["estado"] >= 400:
+                resultados[respuesta["id"]] = ErrorAPI(f"{respuesta['estado']}: {respuesta['datos']}")
+            else:
+                resultados[respuesta["id"]] = extraer_resultados(respuesta["datos"])
+        return resultados
+
+    def patch(self, endpoint, item_id, data):
+        """Realiza una petición PATCH"""
+        return self._ejecutar("PATCH", self._url(endpoint, item_id), json=data)
+
+    def delete(self, endpoint, item_id):
+        """Realiza una petición DELETE"""
+        self._ejecutar("DELETE", self._url(endpoint, item_id))
+        return True
+
+
+class ClienteEmbebido:
+    """
+    Cliente que ejecuta los viewsets de `tareas` en el mismo proceso.
+    Usa el mismo enrutador, consultas y serializadores que la API, pero evita
+    el viaje HTTP, el middleware y la codificación/decodificación JSON.
+    """
+
+    nombre = "embebido"
+
+    def __init__(self):
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'proyectoaulico.settings')
+        import django
+        django.setup()
+
+        from django.urls import resolve
+        from rest_framework.test import APIRequestFactory
+
+        self._resolve = resolve
+        # SERVER_NAME debe estar en ALLOWED_HOSTS para construir los enlaces de paginación
+        self.fabrica = APIRequestFactory(SERVER_NAME='localhost')
+
+    def _ejecutar(self, metodo, endpoint, item_id=None, params=None, data=None):
+        from django.http import Http404
+
+        ruta = f"/api/{endpoint.strip('/')}/"
+        if item_id is not None:
+            ruta = f"{ruta}{item_id}/"
+
+        if metodo == "get":
+            request = self.fabrica.get(ruta, params or {})
+        else:
+            request = getattr(self.fabrica, metodo)(ruta, data or {}, format='json')
+
+        try:
+            match = self._resolve(ruta)
+        except Http404 as e:
+            raise ErrorAPI(f"Endpoint no encontrado: {ruta}") from e
+
+        response = match.func(request, *match.args, **match.kwargs)
+        if response.status_code >= 400:
+            raise ErrorAPI(f"{response.status_code} para {ruta}: {getattr(response, 'data', '')}")
+        return getattr(response, 'data', None)
+
+    def get(self, endpoint, params=None):
+        """Ejecuta la vista GET y devuelve los datos del serializador"""
+        return extraer_resultados(self._ejecutar("get", endpoint, params=params))
+
+    def get_dataframe(self, endpoint, params=None):
+        """Ejecuta la vista GET y construye el DataFrame directamente desde los datos serializados"""
+        import pandas as pd
+        return pd.DataFrame.from_records(self.get(endpoint, params) or [])
+
+    def post(self, endpoint, data):
+        """Ejecuta la vista POST"""
+        return self._ejecutar("post", endpoint, data=data)
+
+    def batch(self, peticiones, concurrente=True):
+        """Mismo contrato que ClienteHTTP.batch; en el mismo proceso no hay viajes que ahorrar"""
+        resultados = {}
+        for nombre, (endpoint, params) in peticiones.items():
+            try:
+                resultados[nombre] = self.get(endpoint, params)
+            except ErrorAPI as e:
+                resultados[nombre] = e
+        return resultados
+
+    def patch(self, endpoint, item_id, data):
+        """Ejecuta la vista PATCH"""
+        return self._ejecutar("patch", endpoint, item_id=item_id, data=data)
+
+    def delete(self, endpoint, item_id):
+        """Ejecuta la vista DELETE"""
+        self._ejecutar("delete", endpoint, item_id=item_id)
+        return True
+
+
+def crear_cliente(backend=None):
+    """Crea el cliente de datos según STREAMLIT_BACKEND (http por defecto)"""
+    backend = (backend or BACKEND_DATOS).strip().lower()
+    if backend == "embebido":
+        return ClienteEmbebido()
+    if backend != "http":
+        raise ValueError(
+            f"Backend desconocido '{backend}'. Opciones: {', '.join(BACKENDS_DISPONIBLES)}"
+        )
+    return ClienteHTTP()
@@ -0,0 +1,51 @@
+"""
+Configuración de gunicorn para producción (la usa run_produccion.sh).
+
+Variables de entorno:
+    GUNICORN_BIND         dirección (127.0.0.1:8000)
+    GUNICORN_WORKERS      workers (por defecto 2 x CPUs + 1)
+    GUNICORN_THREADS      hilos por worker WSGI (4)
+    GUNICORN_INTERFAZ     wsgi (gthread) o asgi (uvicorn, necesario para /api/eventos/)
+    GUNICORN_MEMORIA_MB   memoria residente a partir de la cual se recicla un worker (512; 0 la desactiva)
+"""
+import multiprocessing
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'proyectoaulico.settings_produccion')
+
+INTERFAZ = os.getenv('GUNICORN_INTERFAZ', 'wsgi')
+MEMORIA_MAXIMA_MB = int(os.getenv('GUNICORN_MEMORIA_MB', '512'))
+
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '0')) or multiprocessing.cpu_count() * 2 + 1
+if INTERFAZ == 'asgi':
+    wsgi_app = 'proyectoaulico.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'proyectoaulico.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Django se importa y se precalienta una vez en el maestro; los workers lo heredan por fork
+preload_app = True
+
+# Reciclado: además del límite de memoria, cada worker se reemplaza tras N peticiones
+max_requests = 2000
+max_requests_jitter = 200
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+accesslog = os.getenv('GUNICORN_ACCESSLOG') or None
+
+
+def when_ready(server):
+    from proyectoaulico.arranque import precalentar
+
+    precalentar()
+    server.log.info('Django precalentado: %s workers %s', workers, worker_class)
+
+
+def post_fork(server, worker):
+    from proyectoaulico.arranque import vigilar_memoria
+
+    vigilar_memoria(MEMORIA_MAXIMA_MB)
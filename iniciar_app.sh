@@ -25,6 +25,7 @@ fi
 echo "🗄️  Verificando migraciones..."
 python manage.py makemigrations
 python manage.py migrate
+python manage.py createcachetable --database cache
 
 echo ""
 echo "✅ Configuración completada!"
@@ -0,0 +1,24 @@
+"""
+Páginas de la aplicación Streamlit, una por módulo.
+
+app_streamlit.py solo importa el módulo de la página elegida, la primera vez
+que se muestra: pandas y plotly se cargan únicamente con las páginas que los
+usan y el arranque no paga por todas. Python conserva los módulos ya
+importados, así que las siguientes ejecuciones del script no los recargan.
+"""
+import importlib
+
+# Etiqueta de la navegación: módulo de la página (cada uno define mostrar())
+PAGINAS = {
+    "🏠 Dashboard": "paginas.dashboard",
+    "💰 Transacciones": "paginas.transacciones",
+    "📊 Presupuestos": "paginas.presupuestos",
+    "🎯 Metas": "paginas.metas",
+    "📚 Aprender": "paginas.lecciones",
+    "📈 Análisis": "paginas.analisis",
+}
+
+
+def mostrar(etiqueta):
+    """Importa (si hace falta) y muestra la página de la etiqueta dada"""
+    importlib.import_module(PAGINAS[etiqueta]).mostrar()
@@ -0,0 +1,120 @@
+"""Página 📈 Análisis: resumen mensual, tendencias y mapa de calor de gastos"""
+from datetime import datetime
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from paginas.comun import api_get_varios, formatear_moneda
+
+
+def mostrar():
+    """Muestra análisis detallados de datos financieros"""
+    st.header("📈 Análisis Financiero")
+    
+    # Resumen mensual
+    ahora = datetime.now()
+    st.subheader("📊 Resumen Mensual")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        mes_analisis = st.selectbox("Mes", list(range(1, 13)), index=ahora.month-1, key="mes_analisis")
+    with col2:
+        año_analisis = st.number_input("Año", min_value=2020, max_value=2030, value=ahora.year, key="año_analisis")
+    
+    # El resumen se dibuja aquí, pero se obtiene junto con las demás secciones en un solo viaje
+    seccion_resumen = st.container()
+    
+    # Tendencias
+    st.subheader("📈 Tendencias de los Últimos Meses")
+    meses_tendencia = st.slider("Meses a analizar", 3, 12, 6, key="meses_tendencia")
+    seccion_tendencias = st.container()
+    
+    # Mapa de calor
+    st.subheader("🗓️ ¿Cuándo Gastas?")
+    eje_mapa = st.radio(
+        "Agrupar por",
+        ["dia_semana", "dia_mes"],
+        format_func=lambda eje: "Día de la semana" if eje == "dia_semana" else "Día del mes",
+        horizontal=True,
+        key="eje_mapa_calor"
+    )
+    
+    datos = api_get_varios({
+        'resumen': ("transacciones/resumen_mensual", {'mes': mes_analisis, 'año': año_analisis}),
+        'tendencias': ("transacciones/tendencias", {'meses': meses_tendencia}),
+        'mapa_calor': ("analisis/mapa_calor", {'eje': eje_mapa}),
+    })
+    resumen, tendencias, mapa = datos['resumen'], datos['tendencias'], datos['mapa_calor']
+    
+    with seccion_resumen:
+        if resumen:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Ingresos", formatear_moneda(resumen['ingresos']))
+            col2.metric("Gastos", formatear_moneda(resumen['gastos']))
+            col3.metric("Balance", formatear_moneda(resumen['balance']))
+            
+            # Gráfico de gastos por categoría
+            if resumen.get('gastos_por_categoria'):
+                st.subheader("📊 Gastos por Categoría")
+                df_gastos = pd.DataFrame(resumen['gastos_por_categoria'])
+                fig = px.pie(
+                    df_gastos,
+                    values='total',
+                    names='categoria__nombre',
+                    title="Distribución de Gastos por Categoría"
+                )
+                st.plotly_chart(fig, use_container_width=True)
+    
+    with seccion_tendencias:
+        if tendencias:
+            df_tendencias = pd.DataFrame(tendencias)
+            df_tendencias['periodo'] = df_tendencias.apply(
+                lambda x: f"{int(x['mes'])}/{int(x['año'])}", axis=1
+            )
+        
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=df_tendencias['periodo'],
+                y=df_tendencias['ingresos'],
+                name='Ingresos',
+                line=dict(color='#2ecc71', width=3)
+            ))
+            fig.add_trace(go.Scatter(
+                x=df_tendencias['periodo'],
+                y=df_tendencias['gastos'],
+                name='Gastos',
+                line=dict(color='#e74c3c', width=3)
+            ))
+            fig.add_trace(go.Scatter(
+                x=df_tendencias['periodo'],
+                y=df_tendencias['balance'],
+                name='Balance',
+                line=dict(color='#3498db', width=3, dash='dash')
+            ))
+            fig.update_layout(
+                title="Tendencias Financieras",
+                xaxis_title="Período",
+                yaxis_title="Monto (₲)",
+                height=400
+            )
+            st.plotly_chart(fig, use_container_width=True)
+    
+    if mapa and mapa['y']:
+        fig = go.Figure(go.Heatmap(
+            z=mapa['z'],
+            x=mapa['x'],
+            y=mapa['y'],
+            customdata=mapa['cantidades'],
+            colorscale='Reds',
+            hovertemplate="%{y} · %{x}<br>₲ %{z:,.0f}<br>%{customdata} gastos<extra></extra>"
+        ))
+        fig.update_layout(
+            title=f"Gastos por Categoría ({mapa['desde']} a {mapa['hasta']})",
+            xaxis_title="Día de la semana" if mapa['eje'] == 'dia_semana' else "Día del mes",
+            height=max(300, 40 * len(mapa['y']) + 120)
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    elif mapa:
+        st.info("No hay gastos en el último año")
@@ -0,0 +1,83 @@
+"""
+Funciones compartidas por las páginas de la aplicación Streamlit: acceso a la
+API (HTTP o embebido) y formato de importes. No importa librerías pesadas.
+"""
+import streamlit as st
+
+from cliente_api import crear_cliente, ErrorAPI
+
+
+@st.cache_resource
+def obtener_cliente():
+    """Crea una única vez el cliente de datos (HTTP o embebido según STREAMLIT_BACKEND)"""
+    return crear_cliente()
+
+
+def api_get(endpoint, params=None):
+    """Realiza una petición GET a la API"""
+    try:
+        return obtener_cliente().get(endpoint, params)
+    except ErrorAPI as e:
+        st.error(f"Error al conectar con la API: {str(e)}")
+        return None
+
+
+def api_get_dataframe(endpoint, params=None):
+    """Realiza una petición GET a la API y devuelve los resultados como DataFrame"""
+    try:
+        return obtener_cliente().get_dataframe(endpoint, params)
+    except ErrorAPI as e:
+        st.error(f"Error al conectar con la API: {str(e)}")
+        return None
+
+
+def api_get_varios(peticiones):
+    """
+    Realiza varias peticiones GET en un solo viaje (/api/batch/).
+    `peticiones` es {nombre: (endpoint, params)}; devuelve {nombre: datos o None}.
+    """
+    try:
+        resultados = obtener_cliente().batch(peticiones)
+    except ErrorAPI as e:
+        st.error(f"Error al conectar con la API: {str(e)}")
+        return {nombre: None for nombre in peticiones}
+    for nombre, resultado in resultados.items():
+        if isinstance(resultado, ErrorAPI):
+            st.error(f"Error al obtener {nombre}: {str(resultado)}")
+            resultados[nombre] = None
+    return resultados
+
+
+def api_post(endpoint, data):
+    """Realiza una petición POST a la API"""
+    try:
+        return obtener_cliente().post(endpoint, data)
+    except ErrorAPI as e:
+        st.error(f"Error: {str(e)}")
+        return None
+
+
+def api_patch(endpoint, item_id, data):
+    """Realiza una petición PATCH a la API"""
+    try:
+        return obtener_cliente().patch(endpoint, item_id, data)
+    except ErrorAPI as e:
+        st.error(f"Error: {str(e)}")
+        return None
+
+
+def api_delete(endpoint, item_id):
+    """Realiza una petición DELETE a la API"""
+    try:
+        return obtener_cliente().delete(endpoint, item_id)
+    except ErrorAPI as e:
+        st.error(f"Error: {str(e)}")
+        return False
+
+
+def formatear_moneda(monto):
+    """Formatea un monto como moneda paraguaya (Guaraníes)"""
+    # Convertir a float si es string
+    if isinstance(monto, str):
+        monto = float(monto)
+    return f"₲ {monto:,.0f}".replace(",", ".")
@@ -0,0 +1,111 @@
+"""Página 🏠 Dashboard: resumen financiero del mes"""
+import plotly.graph_objects as go
+import streamlit as st
+
+from paginas.comun import api_get, formatear_moneda
+
+
+def mostrar():
+    """Muestra el dashboard principal con resumen financiero"""
+    st.header("🏠 Dashboard Financiero")
+    
+    # Obtener datos del dashboard
+    datos = api_get("analisis/dashboard")
+    
+    if not datos:
+        st.warning("⚠️ No se pudo conectar con la API. Asegúrate de que Django esté corriendo.")
+        return
+    
+    # Métricas principales
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric(
+            "Ingresos del Mes",
+            formatear_moneda(datos['mes_actual']['ingresos']),
+            delta=None
+        )
+    
+    with col2:
+        st.metric(
+            "Gastos del Mes",
+            formatear_moneda(datos['mes_actual']['gastos']),
+            delta=f"-{formatear_moneda(datos['mes_actual']['gastos'])}"
+        )
+    
+    with col3:
+        balance = datos['mes_actual']['balance']
+        st.metric(
+            "Balance",
+            formatear_moneda(balance),
+            delta=f"{'+' if balance >= 0 else ''}{formatear_moneda(balance)}"
+        )
+    
+    with col4:
+        st.metric(
+            "Metas Activas",
+            datos['metas']['total_metas'],
+            delta=f"{formatear_moneda(datos['metas']['monto_total_ahorrado'])} ahorrado"
+        )
+    
+    st.divider()
+    
+    # Gráficos
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("📊 Resumen Mensual")
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            name='Ingresos',
+            x=['Ingresos', 'Gastos'],
+            y=[datos['mes_actual']['ingresos'], datos['mes_actual']['gastos']],
+            marker_color=['#2ecc71', '#e74c3c']
+        ))
+        fig.update_layout(
+            title="Ingresos vs Gastos",
+            yaxis_title="Monto (₲)",
+            height=300
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        st.subheader("🎯 Progreso de Metas")
+        if datos['metas']['total_metas'] > 0:
+            fig = go.Figure(go.Indicator(
+                mode="gauge+number",
+                value=datos['metas']['porcentaje_promedio'],
+                domain={'x': [0, 1], 'y': [0, 1]},
+                title={'text': "Progreso Promedio (%)"},
+                gauge={'axis': {'range': [None, 100]},
+                       'bar': {'color': "darkblue"},
+                       'steps': [
+                           {'range': [0, 50], 'color': "lightgray"},
+                           {'range': [50, 100], 'color': "gray"}],
+                       'threshold': {'line': {'color': "red", 'width': 4},
+                                     'thickness': 0.75, 'value': 90}}))
+            fig.update_layout(height=300)
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No hay metas activas")
+    
+    # Presupuesto
+    st.subheader("📊 Estado de Presupuestos")
+    presupuesto_usado = datos['mes_actual']['presupuesto_usado']
+    presupuesto_total = datos['mes_actual']['presupuesto_total']
+    
+    if presupuesto_total > 0:
+        porcentaje = (presupuesto_usado / presupuesto_total) * 100
+        st.progress(porcentaje / 100)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Presupuesto Total", formatear_moneda(presupuesto_total))
+        col2.metric("Gastado", formatear_moneda(presupuesto_usado))
+        col3.metric("Restante", formatear_moneda(datos['mes_actual']['presupuesto_restante']))
+    else:
+        st.info("No hay presupuestos configurados para este mes")
+    
+    # Categorías más usadas
+    if datos.get('categorias_mas_usadas'):
+        st.subheader("🏷️ Categorías Más Utilizadas")
+        # st.dataframe acepta la lista de diccionarios: la página no necesita pandas
+        st.dataframe(datos['categorias_mas_usadas'], use_container_width=True, hide_index=True)
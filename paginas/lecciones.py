@@ -0,0 +1,54 @@
+"""Página 📚 Aprender: lecciones educativas"""
+import streamlit as st
+
+from paginas.comun import api_get
+
+
+def mostrar():
+    """Muestra las lecciones educativas"""
+    st.header("📚 Aprende sobre Finanzas Personales")
+    
+    st.markdown("""
+    <div class="educativo-box">
+    <h3>💡 Educación Financiera para Jóvenes Paraguayos</h3>
+    <p>Aquí encontrarás lecciones y consejos prácticos para mejorar tu salud financiera.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Filtro por nivel
+    nivel_filtro = st.selectbox("Nivel", ["Todos", "Básico", "Intermedio", "Avanzado"], key="filtro_nivel")
+    
+    params = {}
+    if nivel_filtro != "Todos":
+        params['nivel'] = nivel_filtro.lower()
+    
+    lecciones = api_get("lecciones", params)
+    
+    if lecciones:
+        for leccion in lecciones:
+            with st.expander(f"📖 {leccion['titulo']} - {leccion['nivel'].title()} ({leccion['duracion_minutos']} min)"):
+                st.markdown(leccion['contenido'])
+                st.caption(f"⏱️ Duración estimada: {leccion['duracion_minutos']} minutos")
+    else:
+        st.info("📝 No hay lecciones disponibles. Las lecciones se pueden agregar desde el panel de administración de Django.")
+        
+        # Contenido educativo básico
+        st.markdown("""
+        ### 💰 Conceptos Básicos de Finanzas Personales
+        
+        #### 1. Presupuesto Personal
+        Un presupuesto es un plan que te ayuda a controlar tus ingresos y gastos. 
+        Te permite saber cuánto dinero tienes y cómo lo estás gastando.
+        
+        #### 2. Ahorro
+        El ahorro es la parte de tus ingresos que no gastas. Es importante ahorrar 
+        para emergencias y para alcanzar tus metas financieras.
+        
+        #### 3. Metas Financieras
+        Establecer metas financieras te ayuda a mantener el enfoque y la motivación 
+        para ahorrar y gestionar mejor tu dinero.
+        
+        #### 4. Categorización de Gastos
+        Clasificar tus gastos por categorías te ayuda a identificar en qué estás 
+        gastando más dinero y dónde puedes reducir gastos.
+        """)
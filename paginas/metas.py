@@ -0,0 +1,90 @@
+"""Página 🎯 Metas: metas financieras, aportes y pronóstico de cumplimiento"""
+import streamlit as st
+
+from paginas.comun import api_get_varios, api_post, formatear_moneda
+
+
+def mostrar():
+    """Muestra la gestión de metas financieras"""
+    st.header("🎯 Metas Financieras")
+    
+    datos = api_get_varios({'metas': ("metas", None), 'pronostico': ("metas/pronostico", None)})
+    metas = datos['metas']
+    pronosticos = {p['id']: p for p in (datos['pronostico'] or {}).get('metas', [])}
+    
+    # Formulario para nueva meta
+    with st.expander("➕ Crear Nueva Meta", expanded=False):
+        with st.form("nueva_meta"):
+            nuevo_titulo = st.text_input("Título de la Meta", key="nuevo_titulo_meta")
+            nueva_descripcion = st.text_area("Descripción", key="nueva_descripcion_meta")
+            col1, col2 = st.columns(2)
+            with col1:
+                nuevo_monto = st.number_input("Monto Objetivo (₲)", min_value=0.0, step=100000.0, key="nuevo_monto_meta")
+            with col2:
+                nueva_fecha = st.date_input("Fecha Objetivo", key="nueva_fecha_meta")
+            
+            if st.form_submit_button("💾 Crear Meta", type="primary"):
+                if nuevo_titulo and nuevo_monto > 0:
+                    data = {
+                        'titulo': nuevo_titulo,
+                        'descripcion': nueva_descripcion,
+                        'monto_objetivo': float(nuevo_monto),
+                        'fecha_objetivo': nueva_fecha.isoformat(),
+                        'estado': 'en_progreso'
+                    }
+                    resultado = api_post("metas", data)
+                    if resultado:
+                        st.success("✅ Meta creada exitosamente!")
+                        st.rerun()
+    
+    # Mostrar metas
+    if metas:
+        st.subheader(f"🎯 Mis Metas ({len(metas)} activas)")
+        
+        for meta in metas:
+            with st.container():
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    estado_emoji = "✅" if meta['estado'] == 'completada' else "🔄" if meta['estado'] == 'en_progreso' else "❌"
+                    st.write(f"### {estado_emoji} {meta['titulo']}")
+                    if meta['descripcion']:
+                        st.write(meta['descripcion'])
+                    
+                    porcentaje = meta['porcentaje_completado']
+                    st.progress(porcentaje / 100)
+                    
+                    col_a, col_b, col_c, col_d = st.columns(4)
+                    col_a.metric("Objetivo", formatear_moneda(meta['monto_objetivo']))
+                    col_b.metric("Ahorrado", formatear_moneda(meta['monto_actual']))
+                    col_c.metric("Restante", formatear_moneda(meta['monto_restante']))
+                    col_d.metric("Progreso", f"{porcentaje:.1f}%")
+                    
+                    if meta['dias_restantes'] is not None:
+                        st.caption(f"⏰ {meta['dias_restantes']} días restantes")
+                    
+                    pronostico = pronosticos.get(meta['id'])
+                    if pronostico:
+                        fecha_probable = pronostico['fechas_cumplimiento'].get('p50') or "más allá del horizonte simulado"
+                        st.caption(
+                            f"📈 Probabilidad de llegar a tiempo con tu ahorro habitual: "
+                            f"{pronostico['probabilidad'] * 100:.0f}% · fecha probable: {fecha_probable}"
+                        )
+                
+                with col2:
+                    if meta['estado'] == 'en_progreso':
+                        monto_agregar = st.number_input(
+                            "Agregar (₲)",
+                            min_value=0.0,
+                            step=10000.0,
+                            key=f"agregar_{meta['id']}"
+                        )
+                        if st.button("➕ Agregar", key=f"btn_agregar_{meta['id']}"):
+                            data = {'monto': float(monto_agregar)}
+                            resultado = api_post(f"metas/{meta['id']}/agregar_monto", data)
+                            if resultado:
+                                st.success("✅ Monto agregado!")
+                                st.rerun()
+                
+                st.divider()
+    else:
+        st.info("📝 No hay metas financieras. ¡Crea tu primera meta!")
@@ -0,0 +1,82 @@
+"""Página 📊 Presupuestos: presupuestos del mes y su consumo"""
+from datetime import datetime
+
+import streamlit as st
+
+from paginas.comun import api_get_varios, api_post, formatear_moneda
+
+
+def mostrar():
+    """Muestra la gestión de presupuestos"""
+    st.header("📊 Gestión de Presupuestos")
+    
+    # Obtener presupuestos
+    ahora = datetime.now()
+    mes_actual = ahora.month
+    año_actual = ahora.year
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        mes_seleccionado = st.selectbox("Mes", list(range(1, 13)), index=mes_actual-1, key="mes_presupuesto")
+    with col2:
+        año_seleccionado = st.number_input("Año", min_value=2020, max_value=2030, value=año_actual, key="año_presupuesto")
+    
+    # Presupuestos y categorías de gasto en un solo viaje
+    datos = api_get_varios({
+        'presupuestos': ("presupuestos", {'mes': mes_seleccionado, 'año': año_seleccionado}),
+        'categorias': ("categorias", {'tipo': 'gasto'}),
+    })
+    presupuestos = datos['presupuestos']
+    
+    # Formulario para nuevo presupuesto
+    with st.expander("➕ Crear Nuevo Presupuesto", expanded=False):
+        with st.form("nuevo_presupuesto"):
+            categorias_gastos = datos['categorias'] or []
+            if not isinstance(categorias_gastos, list):
+                categorias_gastos = []
+            nuevo_nombre = st.text_input("Nombre del Presupuesto", key="nuevo_nombre_presupuesto")
+            nueva_categoria = st.selectbox(
+                "Categoría",
+                options=[c.get('id') for c in categorias_gastos if isinstance(c, dict) and c.get('id')],
+                format_func=lambda x: next((c.get('nombre', '') for c in categorias_gastos if isinstance(c, dict) and c.get('id') == x), ""),
+                key="nueva_categoria_presupuesto"
+            ) if categorias_gastos and len(categorias_gastos) > 0 else None
+            nuevo_limite = st.number_input("Monto Límite (₲)", min_value=0.0, step=10000.0, key="nuevo_limite")
+            
+            if st.form_submit_button("💾 Crear Presupuesto", type="primary"):
+                if nuevo_nombre and nueva_categoria and nuevo_limite > 0:
+                    data = {
+                        'nombre': nuevo_nombre,
+                        'categoria': nueva_categoria,
+                        'monto_limite': float(nuevo_limite),
+                        'mes': mes_seleccionado,
+                        'año': año_seleccionado
+                    }
+                    resultado = api_post("presupuestos", data)
+                    if resultado:
+                        st.success("✅ Presupuesto creado exitosamente!")
+                        st.rerun()
+    
+    # Mostrar presupuestos
+    if presupuestos:
+        st.subheader(f"📊 Presupuestos para {mes_seleccionado}/{año_seleccionado}")
+        
+        for presupuesto in presupuestos:
+            with st.container():
+                col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+                with col1:
+                    st.write(f"**{presupuesto['nombre']}** - {presupuesto['categoria_nombre']}")
+                with col2:
+                    st.metric("Límite", formatear_moneda(presupuesto['monto_limite']))
+                with col3:
+                    st.metric("Gastado", formatear_moneda(presupuesto['gasto_actual']))
+                with col4:
+                    st.metric("Restante", formatear_moneda(presupuesto['monto_restante']))
+                
+                porcentaje = presupuesto['porcentaje_usado']
+                color = "green" if porcentaje < 80 else "orange" if porcentaje < 100 else "red"
+                st.progress(porcentaje / 100)
+                st.caption(f"{porcentaje:.1f}% del presupuesto usado")
+                st.divider()
+    else:
+        st.info("📝 No hay presupuestos configurados para este mes. ¡Crea uno nuevo!")
@@ -0,0 +1,118 @@
+"""Página 💰 Transacciones: alta, filtros y listado de transacciones"""
+from datetime import date
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from paginas.comun import api_get, api_get_dataframe, api_post, formatear_moneda
+
+
+def mostrar():
+    """Muestra la gestión de transacciones"""
+    st.header("💰 Gestión de Transacciones")
+    
+    # Filtros
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        tipo_filtro = st.selectbox("Tipo", ["Todos", "Ingreso", "Gasto"], key="filtro_tipo")
+    with col2:
+        categorias = api_get("categorias")
+        if categorias and isinstance(categorias, list) and len(categorias) > 0:
+            categoria_opciones = ["Todas"] + [c.get('nombre', '') for c in categorias if isinstance(c, dict)]
+            categoria_filtro = st.selectbox("Categoría", categoria_opciones, key="filtro_categoria")
+        else:
+            categoria_filtro = "Todas"
+            categorias = []  # Asegurar que categorias sea una lista vacía
+    with col3:
+        fecha_filtro = st.date_input("Fecha", value=date.today(), key="filtro_fecha")
+    
+    # Obtener transacciones
+    params = {}
+    if tipo_filtro != "Todos":
+        params['tipo'] = tipo_filtro.lower()
+    if categoria_filtro != "Todas" and categorias:
+        categoria_id = next((c.get('id') for c in categorias if isinstance(c, dict) and c.get('nombre') == categoria_filtro), None)
+        if categoria_id:
+            params['categoria'] = categoria_id
+    
+    df = api_get_dataframe("transacciones", params)
+    
+    # Formulario para nueva transacción
+    with st.expander("➕ Agregar Nueva Transacción", expanded=False):
+        with st.form("nueva_transaccion"):
+            col1, col2 = st.columns(2)
+            with col1:
+                nuevo_tipo = st.selectbox("Tipo", ["ingreso", "gasto"], key="nuevo_tipo")
+                nuevo_monto = st.number_input("Monto (₲)", min_value=0.0, step=1000.0, key="nuevo_monto")
+            with col2:
+                nueva_fecha = st.date_input("Fecha", value=date.today(), key="nueva_fecha")
+                # Obtener categorías filtradas por tipo
+                if not categorias:
+                    categorias = api_get("categorias") or []
+                categorias_filtradas = [c for c in categorias if isinstance(c, dict) and c.get('tipo') == nuevo_tipo]
+                nueva_categoria_id = st.selectbox(
+                    "Categoría",
+                    options=[None] + [c.get('id') for c in categorias_filtradas if c.get('id')],
+                    format_func=lambda x: next((c.get('nombre', 'Sin nombre') for c in categorias_filtradas if c.get('id') == x), "Sin categoría") if x else "Sin categoría",
+                    key="nueva_categoria"
+                )
+            
+            nueva_descripcion = st.text_input("Descripción", key="nueva_descripcion")
+            nuevas_notas = st.text_area("Notas (opcional)", key="nuevas_notas")
+            
+            if st.form_submit_button("💾 Guardar Transacción", type="primary"):
+                if nueva_descripcion and nuevo_monto > 0:
+                    data = {
+                        'descripcion': nueva_descripcion,
+                        'monto': float(nuevo_monto),
+                        'tipo': nuevo_tipo,
+                        'fecha': nueva_fecha.isoformat(),
+                        'notas': nuevas_notas
+                    }
+                    if nueva_categoria_id:
+                        data['categoria'] = nueva_categoria_id
+                    
+                    resultado = api_post("transacciones", data)
+                    if resultado:
+                        st.success("✅ Transacción creada exitosamente!")
+                        st.rerun()
+                else:
+                    st.warning("⚠️ Completa todos los campos obligatorios")
+    
+    # Lista de transacciones
+    if df is not None and not df.empty:
+        st.subheader(f"📋 Transacciones ({len(df)} encontradas)")
+        
+        # Resumen
+        # Los importes llegan como enteros (guaraníes): se suman sin pasar por float
+        montos = pd.to_numeric(df['monto'])
+        ingresos = montos[df['tipo'] == 'ingreso'].sum()
+        gastos = montos[df['tipo'] == 'gasto'].sum()
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total Ingresos", formatear_moneda(ingresos))
+        col2.metric("Total Gastos", formatear_moneda(gastos))
+        col3.metric("Balance", formatear_moneda(ingresos - gastos))
+        
+        # Tabla de transacciones
+        df['monto_formateado'] = df['monto'].apply(formatear_moneda)
+        df['fecha_formateada'] = pd.to_datetime(df['fecha']).dt.strftime('%d/%m/%Y')
+        df_display = df[['fecha_formateada', 'descripcion', 'tipo', 'categoria_nombre', 'monto_formateado']].copy()
+        df_display.columns = ['Fecha', 'Descripción', 'Tipo', 'Categoría', 'Monto']
+        st.dataframe(df_display, use_container_width=True, hide_index=True)
+        
+        # Gráfico de transacciones
+        st.subheader("📊 Visualización de Transacciones")
+        fig = px.bar(
+            df,
+            x='fecha',
+            y='monto',
+            color='tipo',
+            title="Transacciones por Fecha",
+            labels={'monto': 'Monto (₲)', 'fecha': 'Fecha', 'tipo': 'Tipo'},
+            color_discrete_map={'ingreso': '#2ecc71', 'gasto': '#e74c3c'}
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("📝 No hay transacciones registradas. ¡Agrega tu primera transacción!")
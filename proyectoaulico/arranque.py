@@ -0,0 +1,81 @@
+"""
+Arranque de los workers de producción (ver gunicorn.conf.py).
+
+precalentar() se ejecuta una vez en el proceso maestro, con la aplicación ya
+cargada (preload_app) y antes de crear los workers: lo que construye queda
+compartido por fork en lugar de repetirse en cada worker durante sus
+primeras peticiones (incluidas las columnas de gastos de los meses cerrados
+que usa la detección de anomalías). También pasa las bases SQLite escribibles a modo WAL
+(persistente en el archivo): con varios workers, las lecturas largas de
+análisis dejan de bloquear las escrituras (caché compartida, altas).
+
+vigilar_memoria() corre en cada worker y, cuando su memoria residente supera
+el límite, le pide un apagado ordenado: termina las peticiones en curso y
+gunicorn lo reemplaza por un worker nuevo.
+"""
+import logging
+import os
+import signal
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def precalentar():
+    """Resuelve las URLs, el meta de los modelos y la compilación de consultas antes del fork"""
+    from django.apps import apps
+    from django.db import connections
+    from django.urls import get_resolver, reverse
+
+    from tareas import anomalias
+
+    # El resolver se llena de forma perezosa en la primera petición
+    resolver = get_resolver()
+    resolver._populate()
+    reverse('api-root')
+
+    for modelo in apps.get_models():
+        modelo._meta.get_fields()
+        # Compila (sin ejecutar) una consulta por modelo: carga compiladores y operaciones del backend
+        str(modelo._default_manager.all().query)
+
+    # La lectura más costosa del análisis: los workers la heredan por fork
+    anomalias.precalentar()
+
+    for conexion in connections.all():
+        if conexion.vendor == 'sqlite' and 'mode=ro' not in str(conexion.settings_dict['NAME']):
+            with conexion.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode=WAL')
+
+    # Las conexiones no deben heredarse entre procesos
+    connections.close_all()
+
+
+def memoria_residente_mb():
+    """Memoria residente del proceso actual en MB (None si no se puede leer)"""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as archivo:
+            paginas = int(archivo.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def vigilar_memoria(limite_mb, intervalo=10):
+    """Hilo que apaga ordenadamente el worker cuando su memoria supera `limite_mb`"""
+    if not limite_mb or memoria_residente_mb() is None:
+        return None
+
+    def vigilar(detener):
+        while not detener.wait(intervalo):
+            memoria = memoria_residente_mb()
+            if memoria is not None and memoria > limite_mb:
+                logger.warning(
+                    'Worker %s usa %.0f MB (límite %s MB): se reciclará', os.getpid(), memoria, limite_mb
+                )
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+
+    detener = threading.Event()
+    threading.Thread(target=vigilar, args=(detener,), name='vigilar_memoria', daemon=True).start()
+    return detener
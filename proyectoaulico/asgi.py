@@ -3,6 +3,14 @@ ASGI config for proyectoaulico project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Servidor ASGI (habilita las vistas asíncronas de /api/async/):
+
+    uvicorn proyectoaulico.asgi:application --port 8001 --workers 2
+
+o bien ``./run_asgi.sh [puerto] [workers]``. Bajo ASGI las vistas síncronas de
+DRF siguen funcionando (Django las ejecuta en un hilo). El flujo de eventos
+/api/eventos/ solo está disponible bajo ASGI.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -13,5 +21,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'proyectoaulico.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from tareas.eventos import aplicacion_eventos  # noqa: E402  (requiere Django inicializado)
+
+# /api/eventos/ (flujo SSE) se atiende fuera del manejador de Django
+application = aplicacion_eventos(django_application)
 
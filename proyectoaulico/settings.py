@@ -39,6 +39,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tareas.middleware.MetricasMiddleware',
+    'tareas.middleware.InstrumentacionSQLMiddleware',
+    'tareas.middleware.PerfiladoMiddleware',
+    'tareas.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -80,6 +84,49 @@ DATABASES = {
     }
 }
 
+# Réplica de solo lectura para las consultas de análisis (tareas.replicas). Localmente
+# puede ser una copia de db.sqlite3 que se refresca con manage.py refrescar_replica
+DB_REPLICA = os.getenv('DB_REPLICA', '')
+if DB_REPLICA:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{DB_REPLICA}?mode=ro',
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Base propia para la tabla de la caché compartida sin Redis: sus escrituras (bloqueos de la
+# coalescencia entre workers, si se fuerza) no compiten por el bloqueo de escritura de db.sqlite3
+# (tareas.coalescencia.RouterCache)
+DATABASES['cache'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'cache.sqlite3',
+}
+
+DATABASE_ROUTERS = ['tareas.coalescencia.RouterCache', 'tareas.replicas.RouterReplica']
+
+# 'compartida' la ven todos los workers (bloqueos de tareas.coalescencia): Redis si hay
+# REDIS_URL o, si no, una tabla en cache.sqlite3 creada con manage.py createcachetable --database cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'compartida': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_compartida',
+    },
+}
+if os.getenv('REDIS_URL'):
+    CACHES['compartida'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+
+REPLICAS = {
+    'ALIAS': 'replica',
+    'TODOS_LOS_GET': os.getenv('REPLICA_TODOS_LOS_GET', '0') == '1',
+    'REINTENTO': 30,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -139,3 +186,135 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Instrumentación por petición (cabeceras Server-Timing / X-Query-Count y log de consultas lentas)
+INSTRUMENTACION_SQL = {
+    'HABILITADA': os.getenv('INSTRUMENTACION_SQL', '1') != '0',
+    'UMBRAL_LENTO_MS': int(os.getenv('UMBRAL_LENTO_MS', '500')),
+    'MAX_CONSULTAS_REGISTRADAS': 5,
+}
+
+# Métricas en formato Prometheus (/metrics), combinadas entre procesos mediante archivos
+METRICAS = {
+    'HABILITADAS': os.getenv('METRICAS', '1') != '0',
+    'DIRECTORIO': os.getenv('METRICAS_DIR', str(BASE_DIR / 'metricas')),
+    'INTERVALO_VOLCADO': 5,
+}
+
+# Perfilado bajo demanda con cProfile (desactivado por defecto, sin costo cuando está apagado)
+PERFILADO = {
+    'HABILITADO': os.getenv('PERFILADO', '0') == '1',
+    'TOKEN': os.getenv('PERFILADO_TOKEN', ''),
+    'MUESTREO': int(os.getenv('PERFILADO_MUESTREO', '0')),
+    'DIRECTORIO': BASE_DIR / 'perfiles',
+    'TOP_FUNCIONES': 40,
+}
+
+# Cola de trabajos en segundo plano (manage.py procesar_trabajos), sin broker externo
+TRABAJOS = {
+    'PROCESOS': int(os.getenv('TRABAJOS_PROCESOS', '2')),
+    'INTERVALO_SONDEO': 1.0,
+    'MAX_INTENTOS': 3,
+    'ESPERA_REINTENTO': 10,
+    'TIEMPO_ABANDONO': 600,
+    'INTERVALO_LATIDO': 30,
+    'DIRECTORIO_ARCHIVOS': BASE_DIR / 'importaciones',
+}
+
+# Endpoint de lotes /api/batch/ (varias peticiones GET en un solo viaje)
+LOTES_API = {
+    'MAX_PETICIONES': 20,
+    'HILOS': 4,
+}
+
+# Flujo de eventos SSE /api/eventos/ (solo bajo ASGI)
+EVENTOS = {
+    'HISTORIAL': 1000,       # eventos recientes para reanudar con Last-Event-ID
+    'BUFFER_CLIENTE': 100,   # eventos pendientes por cliente antes de enviarle `reset`
+    'MAX_SUSCRIPTORES': int(os.getenv('EVENTOS_MAX_SUSCRIPTORES', '5000')),
+    'LATIDO': 15,            # segundos entre comentarios de mantenimiento
+    'SONDEO': 0.5,           # segundos entre lecturas de los eventos de otros procesos
+}
+
+# Sincronización incremental /api/sync/ (manage.py purgar_cambios)
+SINCRONIZACION = {
+    'LIMITE': 500,
+    'LIMITE_MAXIMO': 5000,
+    'DIAS_RETENCION': int(os.getenv('SINCRONIZACION_DIAS_RETENCION', '90')),
+}
+
+# Archivo anual de transacciones (manage.py archivar_transacciones)
+ARCHIVO = {
+    'AÑOS_ACTIVOS': int(os.getenv('ARCHIVO_ANOS_ACTIVOS', '2')),
+}
+
+# Detección de gastos inusuales /api/analisis/anomalias/
+ANOMALIAS = {
+    'UMBRAL': 3.5,
+    'VENTANA_DIAS': 90,
+    'MIN_MUESTRAS': 8,
+}
+
+# Asignación masiva de etiquetas /api/etiquetas/<id>/asignar/
+ETIQUETAS = {
+    'MAX_TRANSACCIONES': 50000,
+    'LOTE': 500,
+}
+
+# Actualización y borrado masivos /api/transacciones/actualizar_lote/ y eliminar_lote/
+MASIVAS = {
+    'LOTE': 2000,  # filas por UPDATE/DELETE (cada lote en su propia transacción)
+    'PAUSA': 0.01,  # segundos entre lotes para dejar pasar a otros escritores
+    'MAX_SINCRONO': 20000,  # selecciones mayores se encolan como trabajo (procesar_trabajos)
+    'MAX_TRANSACCIONES': 1000000,  # tamaño máximo de una selección
+}
+
+# Pronóstico de metas /api/metas/pronostico/ (Monte Carlo)
+PRONOSTICO = {
+    'SIMULACIONES': 5000,
+    'HISTORIAL_MESES': 24,
+}
+
+# Coalescencia de peticiones idénticas (dashboard, tendencias, mapa de calor)
+COALESCENCIA = {
+    'HABILITADA': os.getenv('COALESCENCIA', '1') == '1',
+    'CACHE': 'compartida',
+    'ESPERA': 10,
+    # None: entre workers solo con Redis; COALESCENCIA_ENTRE_WORKERS=1/0 lo fuerza
+    'ENTRE_WORKERS': {'1': True, '0': False}.get(os.getenv('COALESCENCIA_ENTRE_WORKERS')),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            'format': '{{"fecha": "{asctime}", "nivel": "{levelname}", "peticion": {message}}}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'consultas_lentas': {
+            'class': 'logging.FileHandler',
+            'filename': os.getenv('SLOW_QUERY_LOG', str(BASE_DIR / 'consultas_lentas.log')),
+            'formatter': 'json',
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'tareas.consultas_lentas': {
+            'handlers': ['consultas_lentas'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Decimales de la moneda: los importes se guardan como enteros en unidades menores
+# (10 ** MONEDA_DECIMALES por unidad). El guaraní no tiene fracciones. Cambiarlo con
+# datos existentes requiere reescalar los importes.
+MONEDA_DECIMALES = int(os.getenv('MONEDA_DECIMALES', '0'))
+
+# Umbrales (% del límite) que generan una alerta de presupuesto al cruzarse
+PRESUPUESTO_UMBRALES_ALERTA = [80, 100]
+
@@ -0,0 +1,32 @@
+"""
+Configuración de producción: la de settings.py sin modo de desarrollo.
+
+La usa run_produccion.sh (gunicorn, ver gunicorn.conf.py):
+
+    SECRET_KEY=... ./run_produccion.sh 8000
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, REST_FRAMEWORK, SECRET_KEY
+
+# Sin DEBUG, Django no guarda en memoria el texto de cada consulta ni muestra trazas
+DEBUG = False
+
+if not os.getenv('SECRET_KEY') or SECRET_KEY.startswith('django-insecure'):
+    raise ImproperlyConfigured('Defina SECRET_KEY en el entorno (o en .env) para producción')
+
+ALLOWED_HOSTS = [h.strip() for h in os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',') if h.strip()]
+
+# Conexiones persistentes: cada hilo de un worker reutiliza su conexión entre peticiones
+for base in DATABASES.values():
+    base['CONN_MAX_AGE'] = int(os.getenv('CONN_MAX_AGE', '600'))
+    base['CONN_HEALTH_CHECKS'] = True
+
+# Solo JSON: la API navegable es una herramienta de desarrollo
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+}
@@ -3,11 +3,12 @@ URL configuration for proyectoaulico project.
 """
 from django.contrib import admin
 from django.urls import path, include
-from .views import api_root
+from .views import api_root, metrics
 
 urlpatterns = [
     path('', api_root, name='api-root'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
     path('api/', include('tareas.urls')),
 ]
 
@@ -1,6 +1,8 @@
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 
+from tareas import metricas
+
 @require_http_methods(["GET"])
 def api_root(request):
     """
@@ -11,15 +13,34 @@ def api_root(request):
         'version': '1.0',
         'endpoints': {
             'admin': '/admin/',
+            'metrics': '/metrics',
             'api': {
                 'categorias': '/api/categorias/',
                 'presupuestos': '/api/presupuestos/',
                 'transacciones': '/api/transacciones/',
+                'etiquetas': '/api/etiquetas/',
+                'recurrencias': '/api/recurrencias/',
                 'metas': '/api/metas/',
                 'lecciones': '/api/lecciones/',
                 'analisis': '/api/analisis/',
+                'alertas': '/api/alertas/',
+                'jobs': '/api/jobs/',
+                'batch': '/api/batch/',
+                'eventos': '/api/eventos/',
+                'sync': '/api/sync/',
             }
         },
         'documentation': 'Consulta los endpoints disponibles en /api/'
     })
 
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    Métricas de la API en formato de exposición de Prometheus
+    """
+    return HttpResponse(
+        metricas.exponer(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,12 @@
+#!/bin/bash
+# Script para ejecutar Django bajo ASGI (uvicorn): habilita las vistas asíncronas de /api/async/
+# Uso: ./run_asgi.sh [puerto] [workers]
+
+PUERTO=${1:-8001}
+WORKERS=${2:-2}
+
+# Tabla de la caché compartida de coalescencia (sin Redis), en cache.sqlite3
+python manage.py createcachetable --database cache || exit 1
+
+echo "🚀 Iniciando servidor ASGI en el puerto $PUERTO con $WORKERS workers..."
+uvicorn proyectoaulico.asgi:application --host 127.0.0.1 --port "$PUERTO" --workers "$WORKERS"
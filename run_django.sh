@@ -1,5 +1,5 @@
 #!/bin/bash
-# Script para ejecutar el servidor Django
+# Script para ejecutar el servidor Django de desarrollo (para producción: run_produccion.sh)
 
 echo "🚀 Iniciando servidor Django..."
 python manage.py runserver
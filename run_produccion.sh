@@ -0,0 +1,16 @@
+#!/bin/bash
+# Script para ejecutar Django en producción con gunicorn (ver gunicorn.conf.py)
+# Uso: SECRET_KEY=... ./run_produccion.sh [puerto] [wsgi|asgi] [workers]
+
+export GUNICORN_BIND="127.0.0.1:${1:-8000}"
+export GUNICORN_INTERFAZ="${2:-wsgi}"
+if [ -n "$3" ]; then
+    export GUNICORN_WORKERS="$3"
+fi
+export DJANGO_SETTINGS_MODULE=proyectoaulico.settings_produccion
+
+python manage.py check --deploy --fail-level ERROR || exit 1
+# Tabla de la caché compartida de coalescencia (sin Redis), en cache.sqlite3
+python manage.py createcachetable --database cache || exit 1
+echo "🚀 Iniciando gunicorn ($GUNICORN_INTERFAZ) en $GUNICORN_BIND..."
+exec gunicorn -c gunicorn.conf.py
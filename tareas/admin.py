@@ -1,28 +1,145 @@
 from django.contrib import admin
-from .models import Categoria, Presupuesto, Transaccion, MetaFinanciera, LeccionEducativa
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.db.models import BigIntegerField, Case, ExpressionWrapper, F, Value, When
+
+from .analisis import rango_mes
+from .campos import porcentaje_entero
+from .jerarquia import subarbol
+from .models import (
+    Categoria, Presupuesto, Transaccion, MetaFinanciera, LeccionEducativa,
+    AlertaPresupuesto, Trabajo, ArchivoAnual, TransaccionRecurrente, Etiqueta
+)
+from .paginacion import PaginadorEstimado
+
+NOMBRES_MESES = [
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+    'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
+]
+
+
+class FiltroPeriodo(admin.SimpleListFilter):
+    """
+    Filtro por año y mes con rangos sobre `fecha`, que aprovechan su índice.
+    Reemplaza a date_hierarchy, cuyas fechas distintas recorren toda la tabla.
+    """
+    title = 'período'
+    parameter_name = 'periodo'
+    campo = 'fecha'
+    
+    def lookups(self, request, model_admin):
+        # Primera y última fecha con dos búsquedas en el índice (MIN y MAX juntos lo recorrerían entero)
+        fechas = model_admin.model.objects.order_by().values_list(self.campo, flat=True)
+        primera = fechas.order_by(self.campo).first()
+        ultima = fechas.order_by(f'-{self.campo}').first()
+        if primera is None:
+            return []
+        
+        seleccion = self.value() or ''
+        opciones = []
+        for año in range(ultima.year, primera.year - 1, -1):
+            opciones.append((str(año), str(año)))
+            if seleccion.startswith(str(año)):
+                opciones.extend(
+                    (f'{año}-{mes:02d}', f'↳ {NOMBRES_MESES[mes - 1]} {año}') for mes in range(1, 13)
+                )
+        return opciones
+    
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            año, _, mes = self.value().partition('-')
+            if mes:
+                inicio, fin = rango_mes(int(año), int(mes))
+            else:
+                inicio, fin = rango_mes(int(año), 1)[0], rango_mes(int(año), 12)[1]
+        except ValueError as exc:
+            raise IncorrectLookupParameters(exc)
+        return queryset.filter(**{f'{self.campo}__gte': inicio, f'{self.campo}__lt': fin})
+
+
+class FiltroCategoria(admin.SimpleListFilter):
+    """Filtro por categoría que solo lee id y nombre (y respeta el filtro de tipo)"""
+    title = 'categoría'
+    parameter_name = 'categoria'
+    
+    def lookups(self, request, model_admin):
+        categorias = Categoria.objects.order_by('tipo', 'nombre')
+        tipo = request.GET.get('tipo__exact')
+        if tipo:
+            categorias = categorias.filter(tipo=tipo)
+        return [(str(pk), nombre) for pk, nombre in categorias.values_list('pk', 'nombre')]
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            # La categoría y sus subcategorías
+            return queryset.filter(categoria_id__in=subarbol(self.value()))
+        return queryset
 
 
 @admin.register(Categoria)
 class CategoriaAdmin(admin.ModelAdmin):
-    list_display = ['nombre', 'tipo', 'icono', 'fecha_creacion']
+    list_display = ['nombre', 'tipo', 'padre', 'icono', 'fecha_creacion']
     list_filter = ['tipo', 'fecha_creacion']
+    list_select_related = ['padre']
     search_fields = ['nombre', 'descripcion']
+    autocomplete_fields = ['padre']
+
+
+@admin.register(Etiqueta)
+class EtiquetaAdmin(admin.ModelAdmin):
+    list_display = ['nombre', 'color', 'fecha_creacion']
+    search_fields = ['nombre']
 
 
 @admin.register(Presupuesto)
 class PresupuestoAdmin(admin.ModelAdmin):
-    list_display = ['nombre', 'categoria', 'monto_limite', 'mes', 'año', 'porcentaje_usado']
+    list_display = ['nombre', 'categoria', 'monto_limite', 'mes', 'año', 'gasto_registrado', 'porcentaje']
     list_filter = ['año', 'mes', 'categoria']
+    list_select_related = ['categoria']
     search_fields = ['nombre', 'categoria__nombre']
     date_hierarchy = 'fecha_creacion'
+    
+    def get_queryset(self, request):
+        # El porcentaje sale del gasto mantenido por el motor de alertas, sin un agregado por fila
+        return super().get_queryset(request).annotate(
+            # Centésimas de punto porcentual en aritmética entera
+            porcentaje_centesimas=Case(
+                When(monto_limite__gt=0, then=ExpressionWrapper(
+                    F('gasto_registrado') * 10000 / F('monto_limite'),
+                    output_field=BigIntegerField()
+                )),
+                default=Value(0),
+                output_field=BigIntegerField()
+            )
+        )
+    
+    @admin.display(description='Porcentaje usado', ordering='porcentaje_centesimas')
+    def porcentaje(self, obj):
+        return porcentaje_entero(obj.porcentaje_centesimas, 10000)
 
 
 @admin.register(Transaccion)
 class TransaccionAdmin(admin.ModelAdmin):
     list_display = ['descripcion', 'monto', 'tipo', 'categoria', 'fecha']
-    list_filter = ['tipo', 'categoria', 'fecha']
+    list_filter = ['tipo', FiltroCategoria, FiltroPeriodo]
+    list_select_related = ['categoria']
     search_fields = ['descripcion', 'notas']
-    date_hierarchy = 'fecha'
+    # Ordenamiento cubierto por el índice (fecha, id)
+    ordering = ['-fecha', '-id']
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    autocomplete_fields = ['categoria']
+
+
+@admin.register(TransaccionRecurrente)
+class TransaccionRecurrenteAdmin(admin.ModelAdmin):
+    list_display = ['descripcion', 'monto', 'tipo', 'categoria', 'frecuencia', 'intervalo',
+                    'fecha_inicio', 'fecha_fin', 'activa', 'materializada_hasta']
+    list_filter = ['activa', 'frecuencia', 'tipo']
+    list_select_related = ['categoria']
+    search_fields = ['descripcion']
+    autocomplete_fields = ['categoria']
 
 
 @admin.register(MetaFinanciera)
@@ -40,3 +157,36 @@ class LeccionEducativaAdmin(admin.ModelAdmin):
     search_fields = ['titulo', 'contenido']
     ordering = ['orden', 'fecha_creacion']
 
+
+
+@admin.register(AlertaPresupuesto)
+class AlertaPresupuestoAdmin(admin.ModelAdmin):
+    list_display = ['presupuesto', 'umbral', 'porcentaje', 'gasto', 'leida', 'fecha_creacion']
+    list_filter = ['umbral', 'leida']
+    list_select_related = ['presupuesto']
+    search_fields = ['presupuesto__nombre']
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
+
+@admin.register(Trabajo)
+class TrabajoAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'estado', 'prioridad', 'progreso', 'intentos', 'fecha_creacion', 'fecha_fin']
+    list_filter = ['estado', 'tipo']
+    readonly_fields = ['intentos', 'progreso', 'mensaje', 'punto_control', 'resultado', 'error',
+                       'trabajador', 'latido', 'fecha_inicio', 'fecha_fin']
+
+
+@admin.register(ArchivoAnual)
+class ArchivoAnualAdmin(admin.ModelAdmin):
+    """Solo lectura: los años se archivan y restauran con manage.py archivar_transacciones"""
+    list_display = ['año', 'tabla', 'filas', 'fecha_archivo']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
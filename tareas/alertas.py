@@ -0,0 +1,212 @@
+"""
+Motor incremental de alertas de presupuesto.
+
+Cada Presupuesto guarda su gasto acumulado en `gasto_registrado`. Al escribir
+o borrar una Transaccion solo se aplica la diferencia (delta) a los
+presupuestos afectados, sin volver a sumar el mes, y se registra una
+AlertaPresupuesto por cada umbral cruzado hacia arriba.
+
+Un presupuesto de una categoría padre incluye el gasto de todas sus
+subcategorías: los presupuestos afectados por un gasto son los de su
+categoría y los de sus ancestros (tabla de clausura, ver jerarquia.py).
+
+Los UPDATE directos sobre gasto_registrado no disparan señales: cada cambio
+se anota en el registro de cambios y se publica en el flujo de eventos (un
+evento por presupuesto, o uno por mes al reevaluar el mes completo).
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum, Value
+
+from .analisis import combinar_filas, fuentes_del_mes, totales_por_subarbol
+from .campos import MontoField, porcentaje_entero
+from .eventos import publicar_cambio, publicar_lote
+from .jerarquia import ancestros, subarbol
+from .models import AlertaPresupuesto, Presupuesto, Transaccion
+from .sincronizacion import registrar
+
+UMBRALES_POR_DEFECTO = (80, 100)
+
+
+def obtener_umbrales():
+    """Umbrales (en %) configurados en PRESUPUESTO_UMBRALES_ALERTA"""
+    return sorted(getattr(settings, 'PRESUPUESTO_UMBRALES_ALERTA', UMBRALES_POR_DEFECTO))
+
+
+def calcular_porcentaje(gasto, monto_limite):
+    """Porcentaje del límite consumido por el gasto (aritmética entera)"""
+    return porcentaje_entero(gasto, monto_limite)
+
+
+def umbrales_cruzados(porcentaje_anterior, porcentaje_nuevo):
+    """Umbrales superados al pasar de porcentaje_anterior a porcentaje_nuevo (solo hacia arriba)"""
+    return [
+        umbral for umbral in obtener_umbrales()
+        if porcentaje_anterior < umbral <= porcentaje_nuevo
+    ]
+
+
+def _nuevas_alertas(presupuesto, gasto_anterior, gasto_nuevo):
+    porcentaje_anterior = calcular_porcentaje(gasto_anterior, presupuesto.monto_limite)
+    porcentaje_nuevo = calcular_porcentaje(gasto_nuevo, presupuesto.monto_limite)
+    return [
+        AlertaPresupuesto(
+            presupuesto=presupuesto,
+            umbral=umbral,
+            porcentaje=porcentaje_nuevo,
+            gasto=gasto_nuevo,
+        )
+        for umbral in umbrales_cruzados(porcentaje_anterior, porcentaje_nuevo)
+    ]
+
+
+def evaluar_presupuesto(presupuesto, porcentaje_anterior):
+    """Registra las alertas de un presupuesto recién guardado respecto a su porcentaje previo"""
+    monto_limite = Presupuesto._meta.get_field('monto_limite').to_python(presupuesto.monto_limite)
+    porcentaje = calcular_porcentaje(presupuesto.gasto_registrado, monto_limite)
+    return AlertaPresupuesto.objects.bulk_create([
+        AlertaPresupuesto(
+            presupuesto=presupuesto,
+            umbral=umbral,
+            porcentaje=porcentaje,
+            gasto=presupuesto.gasto_registrado,
+        )
+        for umbral in umbrales_cruzados(porcentaje_anterior, porcentaje)
+    ])
+
+
+def _clave_gasto(estado):
+    """Clave (categoria_id, año, mes) que afecta a presupuestos, o None si no es un gasto"""
+    if not estado or estado['tipo'] != 'gasto' or not estado['categoria_id']:
+        return None
+    fecha = estado['fecha']
+    return (estado['categoria_id'], fecha.year, fecha.month)
+
+
+def estado_transaccion(instancia):
+    """Extrae los campos relevantes de una Transaccion normalizados como en la base de datos"""
+    opciones = Transaccion._meta
+    return {
+        'tipo': instancia.tipo,
+        'categoria_id': instancia.categoria_id,
+        'fecha': opciones.get_field('fecha').to_python(instancia.fecha),
+        'monto': opciones.get_field('monto').to_python(instancia.monto),
+    }
+
+
+def aplicar_deltas(deltas):
+    """
+    Aplica {(categoria_id, año, mes): delta} a los presupuestos de cada categoría
+    o sus ancestros y registra alertas. Los deltas se suman antes por presupuesto
+    y se aplican en un único bloque atómico: mover un gasto entre dos
+    subcategorías hermanas deja a su padre sin cambio (y sin alerta repetida).
+    """
+    por_presupuesto = {}
+    with transaction.atomic():
+        for (categoria_id, año, mes), delta in deltas.items():
+            if not delta:
+                continue
+            for pk in Presupuesto.objects.filter(
+                categoria_id__in=ancestros(categoria_id), año=año, mes=mes
+            ).values_list('pk', flat=True):
+                por_presupuesto[pk] = por_presupuesto.get(pk, 0) + delta
+        por_presupuesto = {pk: delta for pk, delta in por_presupuesto.items() if delta}
+        if not por_presupuesto:
+            return []
+
+        presupuestos = list(Presupuesto.objects.select_for_update().filter(pk__in=por_presupuesto))
+        # Un UPDATE por valor distinto de delta (casi siempre uno o dos)
+        por_delta = {}
+        for pk, delta in por_presupuesto.items():
+            por_delta.setdefault(delta, []).append(pk)
+        for delta, pks in por_delta.items():
+            Presupuesto.objects.filter(pk__in=pks).update(
+                gasto_registrado=F('gasto_registrado') + Value(delta, output_field=MontoField())
+            )
+        registrar('presupuesto', list(por_presupuesto))
+
+        alertas = []
+        for presupuesto in presupuestos:
+            publicar_cambio(presupuesto, 'actualizado')
+            alertas.extend(_nuevas_alertas(
+                presupuesto,
+                presupuesto.gasto_registrado,
+                presupuesto.gasto_registrado + por_presupuesto[presupuesto.pk],
+            ))
+        if alertas:
+            AlertaPresupuesto.objects.bulk_create(alertas)
+    return alertas
+
+
+def registrar_cambio_transaccion(anterior, nueva):
+    """
+    Aplica el cambio de una Transaccion a los presupuestos afectados.
+    `anterior` y `nueva` son diccionarios de estado_transaccion() o None
+    (creación y borrado respectivamente).
+    """
+    deltas = {}
+    clave_anterior = _clave_gasto(anterior)
+    if clave_anterior:
+        deltas[clave_anterior] = deltas.get(clave_anterior, 0) - anterior['monto']
+    clave_nueva = _clave_gasto(nueva)
+    if clave_nueva:
+        deltas[clave_nueva] = deltas.get(clave_nueva, 0) + nueva['monto']
+    return aplicar_deltas(deltas)
+
+
+def calcular_gasto(categoria_id, año, mes):
+    """Suma completa del gasto de una categoría y sus subcategorías en un mes (usada al crear presupuestos)"""
+    return sum(
+        fuente.filter(tipo='gasto', categoria_id__in=subarbol(categoria_id))
+        .aggregate(total=Sum('monto'))['total'] or 0
+        for fuente in fuentes_del_mes(año, mes)
+    )
+
+
+def reevaluar_mes(año, mes):
+    """
+    Recalcula el gasto registrado de todos los presupuestos de un mes con una
+    única consulta agrupada por categoría (con sus subcategorías) y registra
+    los umbrales cruzados. Devuelve (presupuestos evaluados, alertas creadas).
+    """
+    categorias = Presupuesto.objects.filter(año=año, mes=mes).values('categoria_id')
+    totales = {
+        fila['subarbol']: fila['total']
+        for fila in combinar_filas([
+            totales_por_subarbol(fuente, 'gasto', categorias) for fuente in fuentes_del_mes(año, mes)
+        ], ('subarbol',))
+    }
+
+    with transaction.atomic():
+        presupuestos = list(Presupuesto.objects.select_for_update().filter(año=año, mes=mes))
+        alertas = []
+        modificados = []
+        for presupuesto in presupuestos:
+            gasto_nuevo = totales.get(presupuesto.categoria_id) or 0
+            if gasto_nuevo == presupuesto.gasto_registrado:
+                continue
+            alertas.extend(_nuevas_alertas(presupuesto, presupuesto.gasto_registrado, gasto_nuevo))
+            presupuesto.gasto_registrado = gasto_nuevo
+            modificados.append(presupuesto)
+
+        Presupuesto.objects.bulk_update(modificados, ['gasto_registrado'])
+        registrar('presupuesto', [p.pk for p in modificados])
+        AlertaPresupuesto.objects.bulk_create(alertas)
+        if modificados:
+            publicar_lote('presupuesto', [(año, mes)])
+    return len(presupuestos), alertas
+
+
+def reevaluar_categorias(categoria_ids):
+    """
+    Reevalúa los meses con presupuestos de alguna de las categorías (p. ej. los
+    ancestros anterior y nuevo de un subárbol movido). Devuelve las alertas creadas.
+    """
+    meses = list(
+        Presupuesto.objects.filter(categoria_id__in=categoria_ids)
+        .order_by().values_list('año', 'mes').distinct()
+    )
+    alertas = []
+    for año, mes in meses:
+        alertas.extend(reevaluar_mes(año, mes)[1])
+    return alertas
@@ -0,0 +1,358 @@
+"""
+Consultas y formatos de análisis compartidos por las vistas síncronas (DRF)
+y asíncronas (vistas_async), para que ambas devuelvan exactamente lo mismo.
+
+Los años archivados (ver archivo.py) ya no están en la tabla de Transaccion:
+sus totales salen de ResumenMensualArchivado. Las funciones `fuentes_*`
+devuelven una lista de querysets (tabla activa y, si el período puede estar
+archivado, resúmenes) que la vista evalúa y une con combinar_filas().
+"""
+from datetime import date
+
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import ExtractDay, ExtractIsoWeekDay, ExtractMonth, ExtractYear
+
+from .campos import monto_json, porcentaje_entero
+from .archivo import puede_estar_archivado
+from .models import Categoria, CategoriaAncestro, MetaFinanciera, Presupuesto, ResumenMensualArchivado, Transaccion
+
+# Ingresos y gastos en una sola consulta
+AGREGADOS_INGRESOS_GASTOS = {
+    'ingresos': Sum('monto', filter=Q(tipo='ingreso')),
+    'gastos': Sum('monto', filter=Q(tipo='gasto')),
+}
+
+AGREGADOS_METAS = {
+    'cantidad': Count('id'),
+    'total_objetivo': Sum('monto_objetivo'),
+    'total_ahorrado': Sum('monto_actual'),
+}
+
+
+def rango_mes(año, mes):
+    """Devuelve (primer día del mes, primer día del mes siguiente)"""
+    inicio = date(año, mes, 1)
+    fin = date(año + 1, 1, 1) if mes == 12 else date(año, mes + 1, 1)
+    return inicio, fin
+
+
+def transacciones_del_mes(año, mes):
+    """Transacciones de un mes filtradas por rango de fechas (aprovecha el índice de fecha)"""
+    inicio, fin = rango_mes(año, mes)
+    return Transaccion.objects.filter(fecha__gte=inicio, fecha__lt=fin)
+
+
+def fuentes_del_mes(año, mes):
+    """
+    Movimientos de un mes: la tabla activa y, en años cerrados, los resúmenes
+    archivados. Ambos tienen los campos monto, tipo y categoria.
+    """
+    fuentes = [transacciones_del_mes(año, mes)]
+    if puede_estar_archivado(año):
+        fuentes.append(ResumenMensualArchivado.objects.filter(año=año, mes=mes))
+    return fuentes
+
+
+def gastos_por_categoria(fuente):
+    """Gastos de una fuente agrupados por categoría, de mayor a menor"""
+    return fuente.filter(tipo='gasto').values(
+        'categoria__nombre'
+    ).annotate(
+        total=Sum('monto')
+    ).order_by('-total')
+
+
+def totales_por_subarbol(fuente, tipo='gasto', categorias=None):
+    """
+    Total de cada categoría sumando el de todas sus subcategorías: un JOIN con
+    la tabla de clausura agrupado por ancestro (clave `subarbol`).
+    `categorias` limita el resultado a esos ancestros.
+    """
+    if categorias is None:
+        filas = fuente.filter(tipo=tipo, categoria__ancestros__isnull=False)
+    else:
+        filas = fuente.filter(tipo=tipo, categoria__ancestros__ancestro__in=categorias)
+    return filas.order_by().values(subarbol=F('categoria__ancestros__ancestro')).annotate(total=Sum('monto'))
+
+
+def totales_por_categoria(fuente, tipo='gasto'):
+    """Total propio de cada categoría (sin sus subcategorías)"""
+    return fuente.filter(tipo=tipo, categoria__isnull=False).order_by().values('categoria_id').annotate(
+        total=Sum('monto')
+    )
+
+
+def categorias_con_nivel(tipo):
+    """Categorías de un tipo con su nivel en el árbol (0 las raíces)"""
+    return Categoria.objects.filter(tipo=tipo).annotate(nivel=Max('ancestros__profundidad')).values(
+        'id', 'nombre', 'icono', 'padre_id', 'nivel'
+    )
+
+
+def _sumar(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a + b
+
+
+def combinar_filas(listas, claves=()):
+    """
+    Une filas agrupadas de varias fuentes sumando los valores de las filas con
+    la misma clave. Sin claves, une diccionarios de totales en uno solo.
+    """
+    combinadas = {}
+    for filas in listas:
+        for fila in filas:
+            clave = tuple(fila[campo] for campo in claves)
+            if clave not in combinadas:
+                combinadas[clave] = dict(fila)
+                continue
+            actual = combinadas[clave]
+            for campo, valor in fila.items():
+                if campo not in claves:
+                    actual[campo] = _sumar(actual[campo], valor)
+    return list(combinadas.values())
+
+
+def combinar_totales(totales):
+    """Suma los diccionarios de agregados (aggregate) de varias fuentes"""
+    return combinar_filas([[fila] for fila in totales])[0]
+
+
+def ordenar_por_total(filas, limite=None):
+    """Filas combinadas de mayor a menor total"""
+    return sorted(filas, key=lambda fila: fila['total'] or 0, reverse=True)[:limite]
+
+
+def presupuestos_raiz_del_mes(año, mes):
+    """
+    Presupuestos del mes sin otro presupuesto en una categoría ancestro: el de
+    un padre ya incluye el gasto de sus subcategorías y no se suma dos veces
+    """
+    presupuestos = Presupuesto.objects.filter(mes=mes, año=año)
+    return presupuestos.exclude(categoria_id__in=CategoriaAncestro.objects.filter(
+        profundidad__gt=0, ancestro_id__in=presupuestos.values('categoria_id')
+    ).values('descendiente_id'))
+
+
+def metas_activas():
+    return MetaFinanciera.objects.filter(estado='en_progreso')
+
+
+def fuentes_categorias_mas_usadas():
+    """Cantidad de transacciones e importe total por categoría en la tabla activa y en el archivo"""
+    return [
+        Transaccion.objects.values('categoria__nombre')
+        .annotate(total=Count('id'), monto_total=Sum('monto')).order_by(),
+        ResumenMensualArchivado.objects.values('categoria__nombre')
+        .annotate(total=Sum('cantidad'), monto_total=Sum('monto')).order_by(),
+    ]
+
+
+def categorias_mas_usadas(listas, limite=5):
+    """Las `limite` categorías con más transacciones, a partir de las fuentes ya evaluadas"""
+    return ordenar_por_total(combinar_filas(listas, ('categoria__nombre',)), limite)
+
+
+def periodos_tendencia(meses, ahora):
+    """Últimos `meses` meses calendario como (año, mes), del más antiguo al más reciente"""
+    indice = ahora.year * 12 + ahora.month - 1
+    return [((indice - i) // 12, (indice - i) % 12 + 1) for i in range(meses - 1, -1, -1)]
+
+
+def transacciones_por_periodo(periodos):
+    """Ingresos y gastos por (año, mes) en una única consulta agrupada sobre el rango completo"""
+    inicio = rango_mes(*periodos[0])[0]
+    fin = rango_mes(*periodos[-1])[1]
+    return Transaccion.objects.filter(
+        fecha__gte=inicio, fecha__lt=fin
+    ).annotate(
+        año=ExtractYear('fecha'), mes=ExtractMonth('fecha')
+    ).order_by().values('año', 'mes').annotate(**AGREGADOS_INGRESOS_GASTOS)
+
+
+def fuentes_por_periodo(periodos):
+    """Ingresos y gastos por (año, mes) de la tabla activa y, si el rango las alcanza, de los resúmenes archivados"""
+    fuentes = [transacciones_por_periodo(periodos)]
+    (año_inicio, mes_inicio), (año_fin, mes_fin) = periodos[0], periodos[-1]
+    if puede_estar_archivado(año_inicio):
+        fuentes.append(
+            ResumenMensualArchivado.objects.filter(
+                Q(año__gt=año_inicio) | Q(año=año_inicio, mes__gte=mes_inicio),
+                Q(año__lt=año_fin) | Q(año=año_fin, mes__lte=mes_fin),
+            ).order_by().values('año', 'mes').annotate(**AGREGADOS_INGRESOS_GASTOS)
+        )
+    return fuentes
+
+
+class _ExtraccionSQLite:
+    """
+    En SQLite, Django extrae partes de fechas con una función Python llamada
+    por fila; strftime es nativa y no sale del motor.
+    """
+    plantilla_sqlite = None
+
+    def as_sqlite(self, compiler, connection):
+        sql, params = compiler.compile(self.lhs)
+        return self.plantilla_sqlite % sql, params
+
+
+class DiaSemana(_ExtraccionSQLite, ExtractIsoWeekDay):
+    """Día de la semana ISO: 1 (lunes) a 7 (domingo)"""
+    # strftime('%w') cuenta desde el domingo (0); '%%%%' llega a la consulta como '%%'
+    plantilla_sqlite = "((CAST(strftime('%%%%w', %s) AS INTEGER) + 6) %%%% 7 + 1)"
+
+
+class DiaDelMes(_ExtraccionSQLite, ExtractDay):
+    plantilla_sqlite = "CAST(strftime('%%%%d', %s) AS INTEGER)"
+
+
+# eje: (expresión sobre la fecha, etiquetas de las columnas 1..N)
+EJES_MAPA_CALOR = {
+    'dia_semana': (DiaSemana, ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']),
+    'dia_mes': (DiaDelMes, [str(dia) for dia in range(1, 32)]),
+}
+
+
+def mapa_calor(desde, hasta, eje, tipo='gasto'):
+    """
+    Importe y cantidad de movimientos por (categoría, día) del rango [desde, hasta]
+    en una sola consulta agrupada. Solo la tabla activa: el archivo guarda totales mensuales.
+    """
+    extraccion, _ = EJES_MAPA_CALOR[eje]
+    return Transaccion.objects.filter(
+        tipo=tipo, fecha__gte=desde, fecha__lte=hasta
+    ).annotate(
+        columna=extraccion('fecha')
+    ).order_by().values('categoria__nombre', 'columna').annotate(
+        total=Sum('monto'), cantidad=Count('id')
+    )
+
+
+def _importe(valor):
+    return valor or 0
+
+
+def formatear_resumen_mensual(mes, año, totales, gastos_categoria):
+    ingresos, gastos = _importe(totales['ingresos']), _importe(totales['gastos'])
+    return {
+        'mes': mes,
+        'año': año,
+        'ingresos': monto_json(ingresos),
+        'gastos': monto_json(gastos),
+        'balance': monto_json(ingresos - gastos),
+        'gastos_por_categoria': list(gastos_categoria)
+    }
+
+
+def formatear_tendencias(periodos, listas):
+    por_periodo = {
+        (fila['año'], fila['mes']): fila for fila in combinar_filas(listas, ('año', 'mes'))
+    }
+    datos = []
+    for año, mes in periodos:
+        fila = por_periodo.get((año, mes), {})
+        ingresos, gastos = _importe(fila.get('ingresos')), _importe(fila.get('gastos'))
+        datos.append({
+            'mes': mes,
+            'año': año,
+            'ingresos': monto_json(ingresos),
+            'gastos': monto_json(gastos),
+            'balance': monto_json(ingresos - gastos)
+        })
+    return datos
+
+
+def formatear_dashboard(totales_mes, total_presupuestado, totales_metas, categorias):
+    ingresos_mes, gastos_mes = _importe(totales_mes['ingresos']), _importe(totales_mes['gastos'])
+    total_presupuestado = _importe(total_presupuestado)
+    total_metas = _importe(totales_metas['total_objetivo'])
+    total_ahorrado = _importe(totales_metas['total_ahorrado'])
+    return {
+        'mes_actual': {
+            'ingresos': monto_json(ingresos_mes),
+            'gastos': monto_json(gastos_mes),
+            'balance': monto_json(ingresos_mes - gastos_mes),
+            'presupuesto_total': monto_json(total_presupuestado),
+            'presupuesto_usado': monto_json(gastos_mes),
+            'presupuesto_restante': monto_json(total_presupuestado - gastos_mes)
+        },
+        'metas': {
+            'total_metas': totales_metas['cantidad'],
+            'monto_total_objetivo': monto_json(total_metas),
+            'monto_total_ahorrado': monto_json(total_ahorrado),
+            'porcentaje_promedio': float(porcentaje_entero(total_ahorrado, total_metas))
+        },
+        'categorias_mas_usadas': list(categorias)
+    }
+
+
+def formatear_mapa_calor(filas, eje):
+    """
+    Matriz densa lista para go.Heatmap: una fila por categoría (de mayor a menor
+    importe) y una columna por día; las celdas sin movimientos valen 0.
+    """
+    _, etiquetas = EJES_MAPA_CALOR[eje]
+    por_categoria = {}
+    for fila in filas:
+        nombre = fila['categoria__nombre'] or 'Sin categoría'
+        totales, cantidades = por_categoria.setdefault(
+            nombre, ([0] * len(etiquetas), [0] * len(etiquetas))
+        )
+        totales[fila['columna'] - 1] += _importe(fila['total'])
+        cantidades[fila['columna'] - 1] += fila['cantidad']
+    categorias = sorted(por_categoria, key=lambda nombre: sum(por_categoria[nombre][0]), reverse=True)
+    return {
+        'eje': eje,
+        'x': etiquetas,
+        'y': categorias,
+        'z': [[monto_json(total) for total in por_categoria[nombre][0]] for nombre in categorias],
+        'cantidades': [por_categoria[nombre][1] for nombre in categorias],
+    }
+
+
+def formatear_arbol_categorias(categorias, subtotales, propios):
+    """
+    Categorías en orden de árbol (cada padre seguido de sus subcategorías, de
+    mayor a menor total) con su total incluidas las subcategorías y el propio.
+    """
+    por_subarbol = {fila['subarbol']: _importe(fila['total']) for fila in subtotales}
+    por_categoria = {fila['categoria_id']: _importe(fila['total']) for fila in propios}
+    hijas = {}
+    for categoria in categorias:
+        hijas.setdefault(categoria['padre_id'], []).append(categoria)
+
+    datos = []
+    pendientes = sorted(hijas.get(None, []), key=lambda c: por_subarbol.get(c['id'], 0))
+    while pendientes:
+        categoria = pendientes.pop()
+        datos.append({
+            'id': categoria['id'],
+            'nombre': categoria['nombre'],
+            'icono': categoria['icono'],
+            'padre': categoria['padre_id'],
+            'nivel': categoria['nivel'],
+            'total': monto_json(por_subarbol.get(categoria['id'], 0)),
+            'total_propio': monto_json(por_categoria.get(categoria['id'], 0)),
+        })
+        pendientes.extend(sorted(hijas.get(categoria['id'], []), key=lambda c: por_subarbol.get(c['id'], 0)))
+    return datos
+
+
+def formatear_etiquetas(etiquetas, filas):
+    """Todas las etiquetas de mayor a menor importe, con 0 las que no tienen movimientos"""
+    por_etiqueta = {fila['etiqueta']: fila for fila in filas}
+    datos = [
+        {
+            **etiqueta,
+            'total': _importe(por_etiqueta.get(etiqueta['id'], {}).get('total')),
+            'cantidad': por_etiqueta.get(etiqueta['id'], {}).get('cantidad', 0),
+        }
+        for etiqueta in etiquetas
+    ]
+    datos.sort(key=lambda fila: fila['total'], reverse=True)
+    for fila in datos:
+        fila['total'] = monto_json(fila['total'])
+    return datos
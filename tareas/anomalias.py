@@ -0,0 +1,304 @@
+"""
+Detección de gastos inusuales por categoría ("un supermercado tres veces más
+caro que lo normal").
+
+Los gastos del período se leen en columnas (values_list) y se calculan con
+NumPy en una sola pasada vectorizada, sin bucles por transacción:
+
+- cada gasto pertenece a un grupo (categoría, ventana de VENTANA_DIAS días);
+- por grupo se calcula la mediana y la desviación absoluta mediana (MAD)
+  ordenando por (grupo, monto) y leyendo los elementos centrales de cada
+  segmento;
+- el puntaje es el z robusto 0.6745 * (monto - mediana) / MAD y se marcan los
+  gastos con puntaje >= UMBRAL en grupos con al menos MIN_MUESTRAS gastos.
+
+Las ventanas son fijas (no deslizantes) para que todo el cálculo sean
+reducciones por segmento sobre un único orden. Solo se analiza la tabla
+activa: los años archivados conservan totales mensuales, no transacciones.
+
+En SQLite los gastos se leen del índice cubriente (tipo, fecha, categoría,
+monto) como un único texto que NumPy convierte de una vez; leer fila por fila
+costaba más que el cálculo. El período se divide en meses cerrados y mes en
+curso (tramos_periodo): el resultado se guarda con la versión de las
+transacciones de cada tramo (sincronizacion.version_periodo) y las columnas
+de los meses cerrados se conservan aparte, de modo que después de anotar un
+gasto de hoy solo se vuelve a leer el mes en curso. Las escrituras de otros
+modelos o de otros períodos no invalidan nada.
+"""
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from django.db.models import BigIntegerField, CharField, ExpressionWrapper, F
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .campos import decimales_moneda, monto_json
+from .metricas import registrar_cache
+from .models import Transaccion
+from .sincronizacion import periodo_sin_cambios, version_periodo
+
+CONFIGURACION_POR_DEFECTO = {
+    'UMBRAL': 3.5,           # z robusto a partir del cual un gasto es inusual
+    'VENTANA_DIAS': 90,      # tamaño de las ventanas de comparación
+    'MIN_MUESTRAS': 8,       # gastos mínimos del grupo para marcar anomalías
+    'DIAS': 365,             # período por defecto (hasta hoy)
+    'LIMITE': 50,
+    'LIMITE_MAXIMO': 1000,
+    'CACHE_ENTRADAS': 32,
+    'CACHE_COLUMNAS': 4,     # tramos de meses cerrados conservados en columnas
+}
+
+# Escala la MAD para que sea comparable con el desvío estándar en datos normales
+FACTOR_MAD = 0.6745
+# Si la MAD es 0 (la mayoría de los montos iguales) se usa la desviación absoluta media
+FACTOR_DESVIO_MEDIO = 0.7979
+
+_cache = OrderedDict()
+_columnas = OrderedDict()
+_bloqueo_cache = threading.Lock()
+
+
+def configuracion_anomalias():
+    """Configuración efectiva de ANOMALIAS con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'ANOMALIAS', {})}
+
+
+def columnas_gastos(desde, hasta):
+    """
+    Gastos categorizados del período como arreglos (ids, día, categoría, monto).
+    El día es el número de días desde 1970-01-01 y el monto está en unidades de la moneda.
+    """
+    consulta = Transaccion.objects.filter(
+        tipo='gasto', fecha__gte=desde, fecha__lte=hasta, categoria__isnull=False
+    ).order_by()
+    if connections[consulta.db].vendor == 'sqlite':
+        ids, dias, categorias, unidades = _columnas_sqlite(consulta)
+    else:
+        ids, dias, categorias, unidades = _columnas_orm(consulta)
+    return ids, dias, categorias, unidades / 10 ** decimales_moneda()
+
+
+def _columnas_sqlite(consulta):
+    """
+    Cada columna como un único texto "v1,v2,..." (group_concat sobre el índice
+    cubriente, con la fecha como AAAAMMDD) que NumPy convierte de una vez. Los
+    cuatro agregados recorren las mismas filas en el mismo orden.
+    """
+    conexion = connections[consulta.db]
+    opciones = Transaccion._meta
+    columnas = [
+        'sub.' + conexion.ops.quote_name(opciones.get_field(nombre).column)
+        for nombre in ('id', 'fecha', 'categoria', 'monto')
+    ]
+    columnas[1] = f"replace({columnas[1]}, '-', '')"
+    subconsulta, parametros = consulta.values_list('id', 'fecha', 'categoria_id', 'monto').query.sql_with_params()
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            'SELECT {} FROM ({}) sub'.format(', '.join(f"group_concat({c}, ',')" for c in columnas), subconsulta),
+            parametros,
+        )
+        textos = cursor.fetchone()
+    if not textos[0]:
+        vacio = np.empty(0, dtype=np.int64)
+        return vacio, vacio, vacio, vacio
+    ids, fechas, categorias, unidades = (np.fromstring(texto, dtype=np.int64, sep=',') for texto in textos)
+    meses = (fechas // 10000 - 1970) * 12 + fechas // 100 % 100 - 1
+    dias = meses.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64) + fechas % 100 - 1
+    return ids, dias, categorias, unidades
+
+
+def _columnas_orm(consulta):
+    """
+    Columnas con values_list: la fecha se lee como texto ISO y el monto como entero
+    en unidades menores para que NumPy los convierta sin los conversores de Django por fila.
+    """
+    filas = list(consulta.annotate(
+        dia=Cast('fecha', CharField()),
+        unidades=ExpressionWrapper(F('monto'), output_field=BigIntegerField()),
+    ).values_list('id', 'dia', 'categoria_id', 'unidades'))
+    cantidad = len(filas)
+    if not cantidad:
+        vacio = np.empty(0, dtype=np.int64)
+        return vacio, vacio, vacio, vacio
+    ids, dias, categorias, unidades = zip(*filas)
+    return (
+        np.fromiter(ids, dtype=np.int64, count=cantidad),
+        np.array(dias, dtype='datetime64[D]').astype(np.int64),
+        np.fromiter(categorias, dtype=np.int64, count=cantidad),
+        np.fromiter(unidades, dtype=np.int64, count=cantidad),
+    )
+
+
+def tramos_periodo(desde, hasta, hoy=None):
+    """Tramos (desde, hasta) del período: los meses ya cerrados y el mes en curso"""
+    inicio_mes = (hoy or timezone.localdate()).replace(day=1)
+    if desde < inicio_mes <= hasta:
+        return ((desde, inicio_mes - timedelta(days=1)), (inicio_mes, hasta))
+    return ((desde, hasta),)
+
+
+def _orden_por_grupo(valores, grupos):
+    """Índices que ordenan por (grupo, valor): orden por valor y luego orden estable por grupo"""
+    orden = np.argsort(valores)
+    return orden[np.argsort(grupos[orden], kind='stable')]
+
+
+def _medianas_por_segmento(valores, inicios, cantidades):
+    """Mediana de cada segmento de `valores` (ordenados dentro de cada segmento)"""
+    bajo = valores[inicios + (cantidades - 1) // 2]
+    alto = valores[inicios + cantidades // 2]
+    return (bajo + alto) / 2
+
+
+def puntajes(dias, categorias, montos, ventana_dias):
+    """
+    Z robusto de cada gasto respecto de su grupo (categoría, ventana).
+    Devuelve (puntajes, mediana del grupo, tamaño del grupo), alineados con la entrada.
+    """
+    if not len(montos):
+        vacio = np.empty(0, dtype=np.float64)
+        return vacio, vacio, np.empty(0, dtype=np.int64)
+    ventanas = dias // ventana_dias
+    ventanas = ventanas - ventanas.min()
+    claves = categorias * (ventanas.max() + 1) + ventanas
+    # Cada grupo queda contiguo y ordenado por monto
+    orden = _orden_por_grupo(montos, claves)
+    claves, valores = claves[orden], montos[orden]
+
+    nuevo_grupo = np.empty(len(valores), dtype=bool)
+    nuevo_grupo[0] = True
+    nuevo_grupo[1:] = claves[1:] != claves[:-1]
+    inicios = np.flatnonzero(nuevo_grupo)
+    cantidades = np.diff(np.append(inicios, len(valores)))
+    grupo = np.cumsum(nuevo_grupo) - 1
+
+    medianas = _medianas_por_segmento(valores, inicios, cantidades)
+    desvios = np.abs(valores - medianas[grupo])
+    desvios_ordenados = desvios[_orden_por_grupo(desvios, grupo)]
+    mad = _medianas_por_segmento(desvios_ordenados, inicios, cantidades) / FACTOR_MAD
+    desvio_medio = np.add.reduceat(desvios, inicios) / cantidades / FACTOR_DESVIO_MEDIO
+    escala = np.where(mad > 0, mad, desvio_medio)[grupo]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        puntaje_ordenado = np.where(escala > 0, (valores - medianas[grupo]) / escala, 0.0)
+
+    # Vuelve al orden de entrada
+    resultado, mediana, tamaño = (np.empty_like(puntaje_ordenado), np.empty_like(valores),
+                                  np.empty(len(valores), dtype=np.int64))
+    resultado[orden] = puntaje_ordenado
+    mediana[orden] = medianas[grupo]
+    tamaño[orden] = cantidades[grupo]
+    return resultado, mediana, tamaño
+
+
+def detectar(ids, dias, categorias, montos, umbral, ventana_dias, min_muestras):
+    """Anomalías como arreglos (ids, puntaje, mediana) ordenados de mayor a menor puntaje"""
+    puntaje, mediana, tamaño = puntajes(dias, categorias, montos, ventana_dias)
+    marcadas = np.flatnonzero((puntaje >= umbral) & (tamaño >= min_muestras))
+    marcadas = marcadas[np.argsort(-puntaje[marcadas], kind='stable')]
+    return ids[marcadas], puntaje[marcadas], mediana[marcadas]
+
+
+def _columnas_tramo(tramo, version):
+    """
+    Columnas de un tramo cuya versión actual es `version`. Las de meses
+    cerrados se conservan y se reutilizan mientras sus transacciones no cambien.
+    """
+    if tramo[1] >= timezone.localdate().replace(day=1):
+        return columnas_gastos(*tramo)
+    with _bloqueo_cache:
+        guardada, columnas = _columnas.get(tramo, (None, None))
+    if columnas is None or periodo_sin_cambios(guardada, *tramo, actual=version) is None:
+        columnas = columnas_gastos(*tramo)
+    with _bloqueo_cache:
+        _columnas[tramo] = (version, columnas)
+        _columnas.move_to_end(tramo)
+        while len(_columnas) > configuracion_anomalias()['CACHE_COLUMNAS']:
+            _columnas.popitem(last=False)
+    return columnas
+
+
+def _calcular(tramos, versiones, umbral, ventana_dias, min_muestras):
+    partes = [_columnas_tramo(tramo, version) for tramo, version in zip(tramos, versiones)]
+    ids, dias, categorias, montos = (np.concatenate(columna) for columna in zip(*partes))
+    anomalas, puntaje, mediana = detectar(ids, dias, categorias, montos, umbral, ventana_dias, min_muestras)
+    return {
+        'analizadas': len(ids),
+        'ids': anomalas.tolist(),
+        'puntajes': puntaje.tolist(),
+        'medianas': mediana.tolist(),
+    }
+
+
+def anomalias_cacheadas(desde, hasta, umbral, ventana_dias, min_muestras):
+    """Resultado de detectar() para el período, reutilizado mientras no cambien sus transacciones"""
+    tramos = tramos_periodo(desde, hasta)
+    clave = (tramos, umbral, ventana_dias, min_muestras)
+    with _bloqueo_cache:
+        versiones, resultado = _cache.get(clave, (None, None))
+    if resultado is not None:
+        versiones = [periodo_sin_cambios(version, *tramo) for version, tramo in zip(versiones, tramos)]
+        if None in versiones:
+            resultado = None
+    registrar_cache('anomalias', resultado is not None)
+    if resultado is None:
+        # Las versiones se toman antes de leer: lo escrito durante el cálculo invalidará el resultado
+        versiones = [
+            version or version_periodo(*tramo) for version, tramo in zip(versiones or [None] * len(tramos), tramos)
+        ]
+        resultado = _calcular(tramos, versiones, umbral, ventana_dias, min_muestras)
+    with _bloqueo_cache:
+        _cache[clave] = (versiones, resultado)
+        _cache.move_to_end(clave)
+        while len(_cache) > configuracion_anomalias()['CACHE_ENTRADAS']:
+            _cache.popitem(last=False)
+    return resultado
+
+
+def precalentar():
+    """Lee las columnas de los meses cerrados del período por defecto (ver proyectoaulico/arranque.py)"""
+    hasta = timezone.localdate()
+    tramo = tramos_periodo(hasta - timedelta(days=configuracion_anomalias()['DIAS'] - 1), hasta)[0]
+    if tramo[1] < hasta.replace(day=1):
+        _columnas_tramo(tramo, version_periodo(*tramo))
+
+
+def limpiar_cache(columnas=True):
+    """Vacía la caché de resultados y, con `columnas`, la de columnas de meses cerrados"""
+    with _bloqueo_cache:
+        _cache.clear()
+        if columnas:
+            _columnas.clear()
+
+
+def formatear_anomalias(resultado, limite):
+    """Detalle de las primeras `limite` anomalías (una consulta para descripción y categoría)"""
+    ids = resultado['ids'][:limite]
+    transacciones = Transaccion.objects.filter(pk__in=ids).select_related('categoria').in_bulk()
+    decimales = decimales_moneda()
+    anomalias = []
+    for pk, puntaje, mediana in zip(ids, resultado['puntajes'], resultado['medianas']):
+        transaccion = transacciones.get(pk)
+        if transaccion is None:
+            continue
+        monto = monto_json(transaccion.monto)
+        mediana = round(mediana, decimales) if decimales else round(mediana)
+        anomalias.append({
+            'id': pk,
+            'fecha': transaccion.fecha.isoformat(),
+            'descripcion': transaccion.descripcion,
+            'categoria': transaccion.categoria.nombre if transaccion.categoria else None,
+            'monto': monto,
+            'mediana_categoria': mediana,
+            'veces_mediana': round(monto / mediana, 2) if mediana else None,
+            'puntaje': round(puntaje, 2),
+        })
+    return {
+        'analizadas': resultado['analizadas'],
+        'total_anomalias': len(resultado['ids']),
+        'anomalias': anomalias,
+    }
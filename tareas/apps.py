@@ -5,4 +5,6 @@ class TareasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tareas'
     verbose_name = 'Gestión de Tareas'
-
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,221 @@
+"""
+Archivo anual de transacciones.
+
+Los años cerrados se mueven de la tabla de Transaccion a una tabla propia
+(`tareas_transaccion_<año>`) y dejan en ResumenMensualArchivado los totales
+exactos por mes, categoría y tipo. Así la tabla activa y sus índices solo
+crecen con los años abiertos.
+
+Las tablas de archivo no tienen migraciones: su modelo se construye en tiempo
+de ejecución copiando los campos de Transaccion (modelo_archivo). La capa de
+consulta `consultar()` une (UNION ALL) las tablas de archivo solo cuando el
+rango de fechas pedido las alcanza; los análisis usan los resúmenes.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth
+from django.utils import timezone
+
+from .models import ArchivoAnual, ResumenMensualArchivado, Transaccion
+
+CONFIGURACION_POR_DEFECTO = {
+    # Años (incluido el actual) que quedan en la tabla activa con `archivar --automatico`
+    'AÑOS_ACTIVOS': 2,
+}
+
+# año: modelo de su tabla de archivo
+_MODELOS = {}
+
+
+def configuracion_archivo():
+    """Configuración efectiva de ARCHIVO con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'ARCHIVO', {})}
+
+
+def puede_estar_archivado(año):
+    """Solo los años cerrados se archivan: el año actual nunca requiere consultar el archivo"""
+    return año < timezone.localdate().year
+
+
+def nombre_tabla(año):
+    return f'{Transaccion._meta.db_table}_{año}'
+
+
+def modelo_archivo(año):
+    """Modelo (no gestionado por migraciones) de la tabla de archivo de un año"""
+    if año in _MODELOS:
+        return _MODELOS[año]
+
+    atributos = {'__module__': __name__}
+    for campo in Transaccion._meta.concrete_fields:
+        if campo.primary_key:
+            # Se conservan los ids originales de la tabla activa
+            atributos[campo.name] = models.BigIntegerField(primary_key=True)
+        elif campo.is_relation:
+            # Sin restricción en la base: las filas relacionadas pueden borrarse sin tocar el archivo
+            atributos[campo.name] = models.ForeignKey(
+                campo.related_model, on_delete=models.DO_NOTHING, db_constraint=False,
+                null=True, related_name='+'
+            )
+        else:
+            atributos[campo.name] = campo.clone()
+
+    atributos['Meta'] = type('Meta', (), {
+        'app_label': Transaccion._meta.app_label,
+        'db_table': nombre_tabla(año),
+        'managed': False,
+        'ordering': Transaccion._meta.ordering,
+        'indexes': [models.Index(fields=['fecha', 'id'], name=f'transaccion_{año}_fecha_idx')],
+    })
+    _MODELOS[año] = type(f'TransaccionArchivo{año}', (models.Model,), atributos)
+    return _MODELOS[año]
+
+
+def años_archivados(desde=None, hasta=None):
+    """Años archivados, opcionalmente los que se cruzan con el rango [desde, hasta]"""
+    años = ArchivoAnual.objects.all()
+    if desde:
+        años = años.filter(año__gte=desde.year)
+    if hasta:
+        años = años.filter(año__lte=hasta.year)
+    return list(años.values_list('año', flat=True))
+
+
+def esta_archivado(año):
+    return puede_estar_archivado(año) and ArchivoAnual.objects.filter(año=año).exists()
+
+
+def consultar(desde=None, hasta=None, filtro=None):
+    """
+    Transacciones del rango [desde, hasta] (fechas, inclusivas). Si el rango
+    llega a años archivados devuelve la unión de la tabla activa con sus
+    tablas de archivo; si no, solo la tabla activa. `filtro(queryset)` se
+    aplica a cada parte antes de unirlas. Sin `desde` se consulta solo la
+    tabla activa (el archivo se alcanza pidiendo un rango de fechas).
+    """
+    filtro = filtro or (lambda queryset: queryset)
+    activa = filtro(Transaccion.objects.all())
+    if desde is None or not puede_estar_archivado(desde.year):
+        return activa
+
+    años = años_archivados(desde, hasta)
+    if not años:
+        return activa
+
+    # Las tablas de archivo tienen las mismas columnas en el mismo orden, y la unión
+    # conserva el tipo del primer queryset: devuelve instancias de Transaccion. El id
+    # desempata el orden para que la paginación de la unión sea estable
+    partes = [filtro(modelo_archivo(año).objects.all()).order_by() for año in años]
+    return activa.order_by().union(*partes, all=True).order_by(*Transaccion._meta.ordering, '-id')
+
+
+def buscar(pk):
+    """Busca una transacción por id en la tabla activa y luego en los archivos"""
+    transaccion_activa = Transaccion.objects.filter(pk=pk).first()
+    if transaccion_activa is not None:
+        return transaccion_activa
+    for año in años_archivados():
+        archivada = modelo_archivo(año).objects.filter(pk=pk).values().first()
+        if archivada is not None:
+            return Transaccion(**archivada)
+    return None
+
+
+def _columnas_sql():
+    return ', '.join(
+        connection.ops.quote_name(campo.column) for campo in Transaccion._meta.concrete_fields
+    )
+
+
+def archivar_año(año):
+    """
+    Mueve las transacciones de un año cerrado a su tabla de archivo y guarda
+    los resúmenes mensuales. Todo ocurre en una transacción: si los conteos
+    no coinciden no se borra nada. Devuelve la cantidad de filas archivadas.
+    """
+    if not puede_estar_archivado(año):
+        raise ValueError(f'Solo se pueden archivar años cerrados (el año {año} sigue abierto)')
+    if ArchivoAnual.objects.filter(año=año).exists():
+        raise ValueError(f'El año {año} ya está archivado')
+
+    modelo = modelo_archivo(año)
+    del_año = Transaccion.objects.filter(fecha__gte=date(año, 1, 1), fecha__lt=date(año + 1, 1, 1))
+    columnas = _columnas_sql()
+    activa = connection.ops.quote_name(Transaccion._meta.db_table)
+    archivo = connection.ops.quote_name(modelo._meta.db_table)
+    filtro_sql, parametros = del_año.query.where.as_sql(
+        del_año.query.get_compiler(connection=connection), connection
+    )
+
+    # El esquema se modifica fuera de la transacción (SQLite no lo permite dentro)
+    with connection.schema_editor() as editor:
+        editor.create_model(modelo)
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {archivo} ({columnas}) SELECT {columnas} FROM {activa} WHERE {filtro_sql}',
+                    parametros
+                )
+                copiadas = cursor.rowcount
+
+            ResumenMensualArchivado.objects.bulk_create([
+                ResumenMensualArchivado(año=año, **fila)
+                for fila in del_año.annotate(mes=ExtractMonth('fecha')).order_by()
+                .values('mes', 'categoria_id', 'tipo').annotate(monto=Sum('monto'), cantidad=Count('id'))
+            ])
+            # _raw_delete: borrado directo sin cargar filas ni disparar señales (el gasto de
+            # los presupuestos del año ya está registrado y no cambia)
+            borradas = del_año._raw_delete(del_año.db)
+            if borradas != copiadas:
+                raise RuntimeError(f'Se copiaron {copiadas} filas pero se borraron {borradas}')
+            ArchivoAnual.objects.create(año=año, tabla=modelo._meta.db_table, filas=copiadas)
+    except Exception:
+        with connection.schema_editor() as editor:
+            editor.delete_model(modelo)
+        raise
+    return copiadas
+
+
+def restaurar_año(año):
+    """Devuelve las transacciones de un año archivado a la tabla activa y elimina su archivo"""
+    registro = ArchivoAnual.objects.filter(año=año).first()
+    if registro is None:
+        raise ValueError(f'El año {año} no está archivado')
+
+    modelo = modelo_archivo(año)
+    columnas = _columnas_sql()
+    activa = connection.ops.quote_name(Transaccion._meta.db_table)
+    archivo = connection.ops.quote_name(modelo._meta.db_table)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO {activa} ({columnas}) SELECT {columnas} FROM {archivo}')
+            restauradas = cursor.rowcount
+        ResumenMensualArchivado.objects.filter(año=año).delete()
+        registro.delete()
+    # La tabla de archivo se elimina una vez confirmada la restauración
+    with connection.schema_editor() as editor:
+        editor.delete_model(modelo)
+    return restauradas
+
+
+def años_para_archivar():
+    """Años con transacciones en la tabla activa que quedan fuera de los años activos"""
+    limite = timezone.localdate().year - configuracion_archivo()['AÑOS_ACTIVOS'] + 1
+    primera = Transaccion.objects.order_by('fecha').values_list('fecha', flat=True).first()
+    if primera is None:
+        return []
+    return list(range(primera.year, limite))
+
+
+def eliminar_archivos():
+    """Elimina todas las tablas de archivo y sus resúmenes (usado al regenerar datos)"""
+    for registro in ArchivoAnual.objects.all():
+        with connection.schema_editor() as editor:
+            editor.delete_model(modelo_archivo(registro.año))
+    ResumenMensualArchivado.objects.all().delete()
+    ArchivoAnual.objects.all().delete()
@@ -0,0 +1,125 @@
+"""
+Importes de dinero almacenados como enteros en unidades menores.
+
+MontoField guarda en un BigIntegerField el importe multiplicado por
+10 ** MONEDA_DECIMALES (0 para el guaraní, que no tiene fracciones). Así las
+sumas en la base de datos son enteras y exactas, y en Python el valor es un
+int. Solo con una moneda de decimales > 0 el valor en Python es un Decimal.
+
+MONEDA_DECIMALES se fija al instalar: cambiarlo con datos existentes requiere
+una migración de datos que reescale los importes.
+"""
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models
+from rest_framework import serializers
+
+
+def decimales_moneda():
+    """Decimales de la moneda configurada en MONEDA_DECIMALES (0 para el guaraní)"""
+    return getattr(settings, 'MONEDA_DECIMALES', 0)
+
+
+def a_unidades_menores(valor, decimales=None):
+    """
+    Convierte un importe (int, Decimal, float o texto) a entero en unidades
+    menores. Rechaza importes con más decimales de los que admite la moneda.
+    """
+    decimales = decimales_moneda() if decimales is None else decimales
+    if isinstance(valor, int) and not isinstance(valor, bool):
+        return valor * 10 ** decimales
+    try:
+        escalado = Decimal(str(valor).strip()).scaleb(decimales)
+    except (InvalidOperation, ValueError):
+        raise ValueError(f'Importe inválido: {valor!r}')
+    if not escalado.is_finite() or escalado != escalado.to_integral_value(ROUND_HALF_EVEN):
+        raise ValueError(f'El importe {valor} admite como máximo {decimales} decimales')
+    return int(escalado)
+
+
+def desde_unidades_menores(entero, decimales=None):
+    """Importe en unidades de la moneda: int si no tiene decimales, Decimal en otro caso"""
+    decimales = decimales_moneda() if decimales is None else decimales
+    if decimales == 0:
+        return int(entero)
+    return Decimal(int(entero)).scaleb(-decimales)
+
+
+def monto_json(valor):
+    """Importe listo para una respuesta JSON (0 si es None)"""
+    valor = valor or 0
+    return valor if isinstance(valor, int) else float(valor)
+
+
+def porcentaje_entero(parte, total):
+    """Porcentaje de parte sobre total con dos decimales, calculado con aritmética entera"""
+    if total <= 0:
+        return Decimal('0.00')
+    centesimas = (2 * parte * 10000 + total) // (2 * total)
+    return Decimal(centesimas).scaleb(-2)
+
+
+class MontoField(models.BigIntegerField):
+    """Importe de dinero guardado como entero en unidades menores de la moneda"""
+
+    description = 'Importe en unidades menores de la moneda'
+
+    def __init__(self, *args, decimales=None, **kwargs):
+        self.decimales = decimales
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        nombre, ruta, args, kwargs = super().deconstruct()
+        if self.decimales is not None:
+            kwargs['decimales'] = self.decimales
+        return nombre, ruta, args, kwargs
+
+    @property
+    def escala(self):
+        return decimales_moneda() if self.decimales is None else self.decimales
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return desde_unidades_menores(value, self.escala)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        try:
+            return desde_unidades_menores(a_unidades_menores(value, self.escala), self.escala)
+        except ValueError as exc:
+            raise ValidationError(str(exc), code='invalid')
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None or hasattr(value, 'resolve_expression'):
+            return value
+        return a_unidades_menores(value, self.escala)
+
+    def formfield(self, **kwargs):
+        if self.escala:
+            return super(models.BigIntegerField, self).formfield(**{
+                'form_class': forms.DecimalField,
+                'decimal_places': self.escala,
+                **kwargs,
+            })
+        return super().formfield(**kwargs)
+
+
+class CampoMonto(serializers.Field):
+    """Campo de DRF para MontoField: acepta números o texto y responde con un número"""
+
+    default_error_messages = {'invalid': '{mensaje}'}
+
+    def to_internal_value(self, data):
+        try:
+            return desde_unidades_menores(a_unidades_menores(data))
+        except ValueError as exc:
+            self.fail('invalid', mensaje=str(exc))
+
+    def to_representation(self, value):
+        return monto_json(value)
@@ -0,0 +1,251 @@
+"""
+Coalescencia de peticiones ("single-flight") para endpoints costosos.
+
+Cuando llegan a la vez varias peticiones GET idénticas (misma ruta y mismos
+parámetros, sin importar su orden), solo una calcula la respuesta y las demás
+esperan y comparten su resultado:
+
+- dentro del proceso, la primera petición es la líder y las otras esperan un
+  threading.Event;
+- entre workers, solo con Redis en COALESCENCIA['CACHE']: una petición
+  comprueba primero si otro worker tiene el bloqueo de la misma clave y, si
+  lo tiene, sondea el resultado que dejará en la caché. Si no, calcula sin
+  tocar la caché y solo toma el bloqueo (`cache.add`, atómico) cuando el
+  cálculo supera COALESCENCIA['UMBRAL_LENTO'] segundos, así las peticiones
+  rápidas o sin concurrencia cuestan una sola lectura. Con otra caché (la
+  DatabaseCache en SQLite) cada bloqueo costaría varias escrituras y la capa
+  se omite salvo que COALESCENCIA['ENTRE_WORKERS'] la fuerce.
+
+Si la espera supera COALESCENCIA['ESPERA'] segundos, la líder falla o la
+caché no responde, cada petición calcula su propia respuesta. Solo se
+comparte con peticiones que llegaron durante el cálculo: no es una caché de
+resultados. La métrica `coalescencia_peticiones_total` cuenta cada petición
+por vista y resultado (lider, proceso, workers, tiempo_agotado, sin_cache).
+"""
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'HABILITADA': True,
+    'CACHE': 'compartida',
+    'ESPERA': 10,              # segundos que una petición espera a la líder
+    'BLOQUEO': 30,             # vida máxima del bloqueo entre workers (si la líder muere)
+    'INTERVALO_SONDEO': 0.05,
+    'UMBRAL_LENTO': 0.1,       # segundos de cálculo a partir de los cuales se toma el bloqueo entre workers
+    'ENTRE_WORKERS': None,     # None: solo si CACHE es Redis
+}
+
+_AUSENTE = object()
+
+
+class RouterCache:
+    """Router de base de datos: la tabla de DatabaseCache va a la base 'cache', si está definida"""
+
+    alias = 'cache'
+
+    def _base(self, model):
+        if model._meta.app_label == 'django_cache' and self.alias in settings.DATABASES:
+            return self.alias
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._base(model)
+
+    def db_for_write(self, model, **hints):
+        return self._base(model)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == self.alias:
+            return app_label == 'django_cache'
+        if app_label == 'django_cache' and self.alias in settings.DATABASES:
+            return False
+        return None
+
+
+def configuracion_coalescencia():
+    """Configuración efectiva de COALESCENCIA con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'COALESCENCIA', {})}
+
+
+def entre_workers_activo(configuracion):
+    """Coalescencia entre workers: forzada por ENTRE_WORKERS o, por defecto, solo si la caché es Redis"""
+    if configuracion['ENTRE_WORKERS'] is not None:
+        return configuracion['ENTRE_WORKERS']
+    backend = settings.CACHES.get(configuracion['CACHE'], {}).get('BACKEND', '')
+    return 'redis' in backend.lower()
+
+
+def clave_peticion(request):
+    """Ruta y parámetros normalizados (ordenados, con sus valores repetidos)"""
+    parametros = sorted((nombre, sorted(valores)) for nombre, valores in request.query_params.lists())
+    texto = f'{request.path}?{parametros!r}'
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+def _contar(vista, resultado):
+    metricas.registro.incrementar('coalescencia_peticiones_total', {'vista': vista, 'resultado': resultado})
+
+
+class _Vuelo:
+    """Cálculo en curso dentro del proceso"""
+
+    __slots__ = ('listo', 'resultado', 'fallo')
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.fallo = False
+
+
+_vuelos = {}
+_bloqueo_vuelos = threading.Lock()
+
+
+def compartir(clave, calcular, vista, configuracion=None):
+    """Devuelve calcular(), compartiendo el cálculo con las llamadas concurrentes de la misma clave"""
+    configuracion = configuracion or configuracion_coalescencia()
+    with _bloqueo_vuelos:
+        vuelo = _vuelos.get(clave)
+        lider = vuelo is None
+        if lider:
+            vuelo = _vuelos[clave] = _Vuelo()
+
+    if not lider:
+        if vuelo.listo.wait(configuracion['ESPERA']) and not vuelo.fallo:
+            _contar(vista, 'proceso')
+            return vuelo.resultado
+        _contar(vista, 'tiempo_agotado')
+        return calcular()
+
+    try:
+        if entre_workers_activo(configuracion):
+            vuelo.resultado = _entre_workers(clave, calcular, vista, configuracion)
+        else:
+            _contar(vista, 'lider')
+            vuelo.resultado = calcular()
+        return vuelo.resultado
+    except BaseException:
+        vuelo.fallo = True
+        raise
+    finally:
+        with _bloqueo_vuelos:
+            _vuelos.pop(clave, None)
+        vuelo.listo.set()
+
+
+def _liberar(cache, bloqueo, ficha):
+    """Suelta el bloqueo si sigue siendo propio (si no, vence solo a los BLOQUEO segundos)"""
+    try:
+        if cache.get(bloqueo) == ficha:
+            cache.delete(bloqueo)
+    except Exception as exc:
+        logger.warning('No se pudo liberar el bloqueo %s: %s', bloqueo, exc)
+
+
+class _BloqueoDiferido:
+    """Toma el bloqueo entre workers solo si el cálculo supera UMBRAL_LENTO segundos"""
+
+    def __init__(self, alias, bloqueo, configuracion):
+        self.alias = alias
+        self.bloqueo = bloqueo
+        self.ficha = uuid.uuid4().hex
+        self.vida = configuracion['BLOQUEO']
+        self.adquirido = False
+        self._temporizador = threading.Timer(configuracion['UMBRAL_LENTO'], self._tomar)
+        self._temporizador.daemon = True
+
+    def _tomar(self):
+        try:
+            self.adquirido = caches[self.alias].add(self.bloqueo, self.ficha, self.vida)
+        except Exception as exc:
+            logger.warning('No se pudo tomar el bloqueo %s: %s', self.bloqueo, exc)
+
+    def iniciar(self):
+        self._temporizador.start()
+
+    def detener(self):
+        """Cancela el temporizador (o espera a que termine) y devuelve si se tomó el bloqueo"""
+        self._temporizador.cancel()
+        self._temporizador.join()
+        return self.adquirido
+
+
+def _entre_workers(clave, calcular, vista, configuracion):
+    cache = caches[configuracion['CACHE']]
+    bloqueo = f'coalescencia:bloqueo:{clave}'
+    try:
+        lider = cache.get(bloqueo)
+    except Exception as exc:
+        logger.warning('Caché %s no disponible para coalescer peticiones: %s', configuracion['CACHE'], exc)
+        _contar(vista, 'sin_cache')
+        return calcular()
+
+    if lider is None:
+        # Nadie calcula esta clave: se calcula y solo se anuncia si tarda
+        _contar(vista, 'lider')
+        diferido = _BloqueoDiferido(configuracion['CACHE'], bloqueo, configuracion)
+        diferido.iniciar()
+        try:
+            resultado = calcular()
+        except BaseException:
+            if diferido.detener():
+                _liberar(cache, bloqueo, diferido.ficha)
+            raise
+        if diferido.detener():
+            try:
+                cache.set(f'coalescencia:resultado:{diferido.ficha}', resultado, configuracion['ESPERA'])
+            except Exception as exc:
+                logger.warning('No se pudo compartir el resultado de %s: %s', vista, exc)
+            _liberar(cache, bloqueo, diferido.ficha)
+        return resultado
+
+    # Otro worker calcula: se espera su resultado mientras mantenga el bloqueo
+    clave_resultado = f'coalescencia:resultado:{lider}'
+    limite = time.monotonic() + configuracion['ESPERA']
+    try:
+        while time.monotonic() < limite:
+            resultado = cache.get(clave_resultado, _AUSENTE)
+            if resultado is _AUSENTE and cache.get(bloqueo) != lider:
+                # La líder terminó: o dejó el resultado justo antes de soltar el bloqueo, o falló
+                resultado = cache.get(clave_resultado, _AUSENTE)
+                if resultado is _AUSENTE:
+                    break
+            if resultado is not _AUSENTE:
+                _contar(vista, 'workers')
+                return resultado
+            time.sleep(configuracion['INTERVALO_SONDEO'])
+    except Exception as exc:
+        logger.warning('Caché %s no disponible para coalescer peticiones: %s', configuracion['CACHE'], exc)
+        _contar(vista, 'sin_cache')
+        return calcular()
+    _contar(vista, 'tiempo_agotado')
+    return calcular()
+
+
+def coalescer(vista):
+    """Decorador de acciones GET de DRF cuyas peticiones idénticas y concurrentes comparten el cálculo"""
+    @wraps(vista)
+    def envoltura(self, request, *args, **kwargs):
+        configuracion = configuracion_coalescencia()
+        if not configuracion['HABILITADA'] or request.method != 'GET':
+            return vista(self, request, *args, **kwargs)
+
+        def calcular():
+            respuesta = vista(self, request, *args, **kwargs)
+            return respuesta.data, respuesta.status_code
+
+        datos, estado = compartir(clave_peticion(request), calcular, vista.__name__, configuracion)
+        return Response(datos, status=estado)
+    return envoltura
@@ -0,0 +1,119 @@
+"""
+Etiquetas de transacciones (vacaciones, trabajo, ...), transversales a la categoría.
+
+Los filtros "tiene todas" / "tiene alguna" no encadenan un .filter() (un JOIN)
+por etiqueta: son una única subconsulta agrupada sobre TransaccionEtiqueta,
+resuelta con su índice (etiqueta, transaccion):
+
+    id IN (SELECT transaccion_id FROM tareas_transaccionetiqueta
+           WHERE etiqueta_id IN (...) GROUP BY transaccion_id HAVING COUNT(*) = N)
+
+Como las filas se conservan al archivar un año, los filtros valen también
+para las tablas de archivo. La asignación masiva inserta con INSERT ... SELECT
+por lotes de ids y registra las transacciones cambiadas para /api/sync/.
+"""
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Transaccion, TransaccionEtiqueta
+from .sincronizacion import registrar_consulta
+
+CONFIGURACION_POR_DEFECTO = {
+    'MAX_TRANSACCIONES': 50000,  # ids por petición de asignación masiva
+    'LOTE': 500,
+}
+
+
+def configuracion_etiquetas():
+    """Configuración efectiva de ETIQUETAS con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'ETIQUETAS', {})}
+
+
+def leer_ids(valor):
+    """Ids de una lista o de un texto separado por comas, sin repetir. Lanza ValueError"""
+    if isinstance(valor, str):
+        valor = [parte for parte in valor.split(',') if parte.strip()]
+    return list(dict.fromkeys(int(pk) for pk in valor))
+
+
+def con_todas(etiqueta_ids):
+    """Subconsulta con los ids de las transacciones que tienen todas las etiquetas"""
+    return (
+        TransaccionEtiqueta.objects.filter(etiqueta_id__in=etiqueta_ids)
+        .values('transaccion_id').annotate(cantidad=Count('*'))
+        .filter(cantidad=len(etiqueta_ids)).values('transaccion_id')
+    )
+
+
+def con_alguna(etiqueta_ids):
+    """Subconsulta con los ids de las transacciones que tienen al menos una de las etiquetas"""
+    return TransaccionEtiqueta.objects.filter(etiqueta_id__in=etiqueta_ids).values('transaccion_id')
+
+
+def filtrar_etiquetas(queryset, params):
+    """Filtros `etiquetas_todas` y `etiquetas_alguna` (ids separados por comas). Lanza ValueError"""
+    todas = leer_ids(params.get('etiquetas_todas', ''))
+    alguna = leer_ids(params.get('etiquetas_alguna', ''))
+    if todas:
+        queryset = queryset.filter(pk__in=con_todas(todas))
+    if alguna:
+        queryset = queryset.filter(pk__in=con_alguna(alguna))
+    return queryset
+
+
+def _lotes(ids, tamaño):
+    for inicio in range(0, len(ids), tamaño):
+        yield ids[inicio:inicio + tamaño]
+
+
+def asignar(etiqueta, transaccion_ids):
+    """
+    Agrega la etiqueta a las transacciones (de la tabla activa) que aún no la
+    tienen: un INSERT ... SELECT por lote de ids. Devuelve las filas agregadas.
+    """
+    alias = router.db_for_write(TransaccionEtiqueta)
+    conexion = connections[alias]
+    opciones = TransaccionEtiqueta._meta
+    tabla = conexion.ops.quote_name(opciones.db_table)
+    columnas = ', '.join(
+        conexion.ops.quote_name(opciones.get_field(nombre).column) for nombre in ('transaccion', 'etiqueta')
+    )
+    clave = conexion.ops.quote_name(Transaccion._meta.pk.column)
+    agregadas = 0
+    with transaction.atomic(using=alias):
+        for lote in _lotes(transaccion_ids, configuracion_etiquetas()['LOTE']):
+            nuevas = Transaccion.objects.filter(pk__in=lote).exclude(
+                pk__in=TransaccionEtiqueta.objects.filter(etiqueta=etiqueta).values('transaccion_id')
+            )
+            registrar_consulta(nuevas)
+            subconsulta, parametros = nuevas.order_by().values('pk').query.sql_with_params()
+            with conexion.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {tabla} ({columnas}) SELECT sub.{clave}, %s FROM ({subconsulta}) sub',
+                    (etiqueta.pk, *parametros),
+                )
+                agregadas += cursor.rowcount
+    return agregadas
+
+
+def quitar(etiqueta, transaccion_ids):
+    """Quita la etiqueta de las transacciones con un DELETE por lote. Devuelve las filas borradas"""
+    alias = router.db_for_write(TransaccionEtiqueta)
+    quitadas = 0
+    with transaction.atomic(using=alias):
+        for lote in _lotes(transaccion_ids, configuracion_etiquetas()['LOTE']):
+            filas = TransaccionEtiqueta.objects.filter(etiqueta=etiqueta, transaccion_id__in=lote)
+            registrar_consulta(Transaccion.objects.filter(pk__in=filas.values('transaccion_id')))
+            quitadas += filas._raw_delete(alias)
+    return quitadas
+
+
+def totales_por_etiqueta(desde, hasta, tipo='gasto'):
+    """
+    Importe y cantidad de movimientos por etiqueta en [desde, hasta]: un JOIN con
+    TransaccionEtiqueta agrupado por etiqueta. Solo la tabla activa (el archivo guarda totales mensuales).
+    """
+    return Transaccion.objects.filter(
+        tipo=tipo, fecha__gte=desde, fecha__lte=hasta, etiquetas__isnull=False
+    ).order_by().values(etiqueta=F('etiquetas')).annotate(total=Sum('monto'), cantidad=Count('id'))
@@ -0,0 +1,391 @@
+"""
+Flujo de eventos de cambios (Server-Sent Events) para clientes en vivo.
+
+Los guardados y borrados de Transaccion, Presupuesto y MetaFinanciera publican
+un evento {modelo, id, operacion, mes}: se guarda como EventoCambio en la misma
+transacción que la escritura (si se revierte, no hay evento). El Broker de cada
+proceso servidor lee los eventos nuevos de esa tabla cada EVENTOS['SONDEO']
+segundos (o apenas se confirma una escritura del mismo proceso) y GET
+/api/eventos/ (solo bajo ASGI, ver proyectoaulico/asgi.py) los reenvía a cada
+suscriptor como `event: cambio`. Así llegan también los cambios atendidos por
+otros workers (WSGI o ASGI) y los de los trabajos en segundo plano.
+
+- Cada suscriptor tiene una cola acotada (EVENTOS['BUFFER_CLIENTE']). Si un
+  cliente lento la llena se descartan sus eventos pendientes y recibe un
+  evento `reset` para que recargue todo: el resto no se frena y la memoria
+  por cliente está acotada.
+- El Broker conserva los últimos EVENTOS['HISTORIAL'] eventos en un búfer
+  circular: un cliente que reconecta con la cabecera Last-Event-ID (el id del
+  EventoCambio, el mismo en todos los procesos) recibe lo que se perdió, o
+  `reset` si ya no está en el búfer. La tabla se recorta a ese mismo tamaño.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
+
+from . import metricas
+from .models import EventoCambio
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'HISTORIAL': 1000,
+    'BUFFER_CLIENTE': 100,
+    'MAX_SUSCRIPTORES': 5000,
+    'LATIDO': 15,
+    'REINTENTO_MS': 3000,
+    'SONDEO': 0.5,           # segundos entre lecturas de EventoCambio
+    'RECORTE': 60,           # segundos entre recortes de la tabla
+}
+
+RUTA = '/api/eventos/'
+
+# Marcadores internos de la cola de cada suscriptor
+RESET = object()
+CIERRE = object()
+
+
+def configuracion_eventos():
+    """Configuración efectiva de EVENTOS con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'EVENTOS', {})}
+
+
+class Suscripcion:
+    """Cola acotada de un cliente; solo se usa desde el bucle de eventos del cliente"""
+
+    __slots__ = ('cola', 'modelos', 'desbordada', 'desde')
+
+    def __init__(self, capacidad, modelos=None, desde=0):
+        self.cola = asyncio.Queue(capacidad)
+        self.modelos = modelos
+        self.desbordada = False
+        # Eventos ya recibidos al reanudar (p. ej. de otro worker que los leyó antes que este)
+        self.desde = desde
+
+    def entregar(self, evento):
+        if self.modelos and evento['modelo'] not in self.modelos:
+            return
+        if int(evento['id']) <= self.desde:
+            return
+        if self.desbordada:
+            return
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente lento: se libera su cola y se le pide que recargue
+            descartados = self.cola.qsize()
+            self._vaciar()
+            self.cola.put_nowait(RESET)
+            self.desbordada = True
+            metricas.registro.incrementar('sse_eventos_descartados_total', valor=descartados + 1)
+
+    def cerrar(self):
+        self._vaciar()
+        self.cola.put_nowait(CIERRE)
+
+    def _vaciar(self):
+        while not self.cola.empty():
+            self.cola.get_nowait()
+
+
+class Broker:
+    """
+    Reparte a los suscriptores del proceso los eventos que lee de EventoCambio
+    en un hilo de sondeo (se inicia con el primer suscriptor)
+    """
+
+    def __init__(self, historial=None):
+        self._bloqueo = threading.Lock()
+        self._historial_maximo = historial
+        self._historial = None
+        self._ultimo = 0
+        # El sondeo está listo cuando cargó el historial inicial
+        self._listo = False
+        self._sondeo = None
+        self._despertar = threading.Event()
+        # bucle: suscripciones atendidas por ese bucle de eventos
+        self._suscripciones = {}
+
+    @property
+    def historial(self):
+        if self._historial is None:
+            self._historial = deque(maxlen=self._historial_maximo or configuracion_eventos()['HISTORIAL'])
+        return self._historial
+
+    @property
+    def cantidad_suscriptores(self):
+        return sum(len(suscripciones) for suscripciones in self._suscripciones.values())
+
+    def despertar(self):
+        """Adelanta la próxima lectura (tras confirmarse una escritura de este proceso)"""
+        self._despertar.set()
+
+    def iniciar(self):
+        """Inicia el hilo de sondeo si aún no corre (o no sobrevivió a un fork)"""
+        with self._bloqueo:
+            if self._sondeo is None or not self._sondeo.is_alive():
+                self._sondeo = threading.Thread(target=self._sondear, name='eventos_sondeo', daemon=True)
+                self._sondeo.start()
+
+    def _leer(self, limite):
+        return list(
+            EventoCambio.objects.filter(pk__gt=self._ultimo).order_by('pk').values_list('pk', 'datos')[:limite]
+        )
+
+    def _sondear(self):
+        configuracion = configuracion_eventos()
+        limite = self.historial.maxlen
+        recortado = time.monotonic()
+        while True:
+            try:
+                if not self._listo:
+                    # Historial inicial: los últimos eventos, sin repartirlos
+                    ultimos = list(
+                        EventoCambio.objects.order_by('-pk').values_list('pk', 'datos')[:limite]
+                    )
+                    with self._bloqueo:
+                        for pk, datos in reversed(ultimos):
+                            self.historial.append((pk, {'id': str(pk), **datos}))
+                        self._ultimo = ultimos[0][0] if ultimos else 0
+                        self._listo = True
+                while True:
+                    filas = self._leer(limite)
+                    for pk, datos in filas:
+                        self._difundir(pk, {'id': str(pk), **datos})
+                    if len(filas) < limite:
+                        break
+                if time.monotonic() - recortado > configuracion['RECORTE']:
+                    EventoCambio.objects.filter(pk__lte=self._ultimo - limite).delete()
+                    recortado = time.monotonic()
+            except DatabaseError:
+                logger.warning('No se pudieron leer los eventos de cambio', exc_info=True)
+                connections.close_all()
+            self._despertar.wait(configuracion['SONDEO'])
+            self._despertar.clear()
+
+    def _difundir(self, numero, evento):
+        """Guarda el evento en el historial y lo reparte a los suscriptores"""
+        with self._bloqueo:
+            self.historial.append((numero, evento))
+            self._ultimo = numero
+            bucles = list(self._suscripciones)
+        # Una sola llamada por bucle (no por suscriptor) aunque haya miles de clientes
+        for bucle in bucles:
+            try:
+                bucle.call_soon_threadsafe(self._repartir, bucle, evento)
+            except RuntimeError:
+                # Bucle ya cerrado (p. ej. worker detenido)
+                with self._bloqueo:
+                    self._suscripciones.pop(bucle, None)
+
+    def _repartir(self, bucle, evento):
+        with self._bloqueo:
+            suscripciones = list(self._suscripciones.get(bucle, ()))
+        for suscripcion in suscripciones:
+            suscripcion.entregar(evento)
+
+    def suscribir(self, modelos=None, ultimo_id=None, capacidad=None, maximo=None):
+        """
+        Registra un suscriptor en el bucle actual. Devuelve (suscripcion, perdidos)
+        donde `perdidos` son los eventos posteriores a `ultimo_id` o None si no se
+        pueden reanudar. Devuelve (None, None) si se alcanzó el máximo de suscriptores.
+        """
+        configuracion = configuracion_eventos()
+        bucle = asyncio.get_running_loop()
+        self.iniciar()
+        numero = int(ultimo_id) if ultimo_id and str(ultimo_id).isdigit() else 0
+        suscripcion = Suscripcion(capacidad or configuracion['BUFFER_CLIENTE'], modelos, numero)
+        with self._bloqueo:
+            if self.cantidad_suscriptores >= (maximo or configuracion['MAX_SUSCRIPTORES']):
+                return None, None
+            # Con el bloqueo tomado no se cuela ningún evento entre la reanudación y el registro
+            perdidos = self._desde(ultimo_id, modelos) if ultimo_id else []
+            self._suscripciones.setdefault(bucle, set()).add(suscripcion)
+        metricas.registro.ajustar('sse_suscriptores', 1)
+        return suscripcion, perdidos
+
+    def desuscribir(self, suscripcion):
+        with self._bloqueo:
+            for bucle, suscripciones in list(self._suscripciones.items()):
+                if suscripcion in suscripciones:
+                    suscripciones.discard(suscripcion)
+                    if not suscripciones:
+                        del self._suscripciones[bucle]
+                    metricas.registro.ajustar('sse_suscriptores', -1)
+                    return
+
+    def _desde(self, ultimo_id, modelos):
+        numero = str(ultimo_id)
+        if not self._listo or not numero.isdigit():
+            return None
+        numero = int(numero)
+        primero = self.historial[0][0] if self.historial else self._ultimo + 1
+        if numero < primero - 1:
+            return None
+        # Un id posterior al último leído es de otro worker que sondeó antes: llegará por la cola
+        return [
+            evento for n, evento in self.historial
+            if n > numero and (not modelos or evento['modelo'] in modelos)
+        ]
+
+
+broker = Broker()
+
+
+def _mes(fecha):
+    if isinstance(fecha, str):
+        fecha = parse_date(fecha)
+    return f'{fecha.year:04d}-{fecha.month:02d}' if fecha else None
+
+
+def datos_cambio(instance, operacion):
+    """Evento de cambio {modelo, id, operacion, mes} de una instancia guardada o eliminada"""
+    modelo = instance._meta.model_name
+    datos = {'modelo': modelo, 'objeto_id': instance.pk, 'operacion': operacion, 'mes': None}
+    if modelo == 'transaccion':
+        datos['mes'] = _mes(instance.fecha)
+        anterior = getattr(instance, '_estado_anterior', None) if operacion == 'actualizado' else None
+        if anterior and _mes(anterior['fecha']) != datos['mes']:
+            datos['mes_anterior'] = _mes(anterior['fecha'])
+    elif modelo == 'presupuesto':
+        datos['mes'] = f'{int(instance.año):04d}-{int(instance.mes):02d}'
+    return datos
+
+
+def publicar(eventos):
+    """Guarda los eventos en la transacción en curso; se reparten al confirmarse (no si se revierte)"""
+    if not eventos:
+        return
+    EventoCambio.objects.bulk_create([EventoCambio(datos=datos) for datos in eventos])
+    transaction.on_commit(broker.despertar)
+
+
+def publicar_cambio(instance, operacion):
+    """Publica el cambio de una instancia guardada o eliminada"""
+    publicar([datos_cambio(instance, operacion)])
+
+
+def publicar_lote(modelo, meses):
+    """Un evento por mes para las escrituras masivas que no disparan señales"""
+    publicar([
+        {'modelo': modelo, 'objeto_id': None, 'operacion': 'lote', 'mes': f'{año:04d}-{mes:02d}'}
+        for año, mes in sorted(meses)
+    ])
+
+
+def formatear(evento):
+    """Texto SSE de un evento"""
+    return f"id: {evento['id']}\nevent: cambio\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n"
+
+
+async def _flujo(suscripcion, perdidos, latido, reintento_ms):
+    try:
+        yield f'retry: {reintento_ms}\n\n'
+        if perdidos is None:
+            yield 'event: reset\ndata: {}\n\n'
+        else:
+            for evento in perdidos:
+                yield formatear(evento)
+        while True:
+            try:
+                evento = await asyncio.wait_for(suscripcion.cola.get(), latido)
+            except asyncio.TimeoutError:
+                # Comentario SSE: mantiene viva la conexión a través de proxies
+                yield ': latido\n\n'
+                continue
+            if evento is CIERRE:
+                return
+            if evento is RESET:
+                suscripcion.desbordada = False
+                yield 'event: reset\ndata: {}\n\n'
+                continue
+            yield formatear(evento)
+    finally:
+        broker.desuscribir(suscripcion)
+
+
+def _modelos(valor):
+    return {m.strip().lower() for m in valor.split(',') if m.strip()} or None
+
+
+def flujo_eventos(request):
+    """Ruta de Django de /api/eventos/: bajo ASGI la atiende antes aplicacion_eventos()"""
+    return JsonResponse(
+        {'error': 'El flujo de eventos requiere el servidor ASGI (./run_asgi.sh)'}, status=501
+    )
+
+
+async def _responder_json(send, estado, datos):
+    await send({
+        'type': 'http.response.start', 'status': estado,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(datos, ensure_ascii=False).encode()})
+
+
+async def servir_eventos(scope, receive, send):
+    """
+    GET /api/eventos/?modelos=transaccion,presupuesto — flujo SSE de cambios.
+    Admite la cabecera Last-Event-ID (o ?ultimo_id=) para reanudar.
+
+    Es una aplicación ASGI directa y no una vista: el manejador de Django
+    mantiene un hilo por petición mientras dura la respuesta (para el
+    middleware síncrono), lo que con miles de clientes inactivos costaría un
+    hilo por cliente.
+    """
+    if scope['method'] != 'GET':
+        return await _responder_json(send, 405, {'error': 'Método no permitido'})
+
+    configuracion = configuracion_eventos()
+    consulta = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    cabeceras = {clave.lower(): valor for clave, valor in scope.get('headers', [])}
+    ultimo_id = cabeceras.get(b'last-event-id', b'').decode('latin-1') or consulta.get('ultimo_id', [None])[0]
+    suscripcion, perdidos = broker.suscribir(_modelos(consulta.get('modelos', [''])[0]), ultimo_id)
+    if suscripcion is None:
+        return await _responder_json(send, 503, {'error': 'Demasiados suscriptores, reintente más tarde'})
+
+    async def vigilar_desconexion():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        suscripcion.cerrar()
+
+    respuesta = [
+        (b'content-type', b'text/event-stream; charset=utf-8'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),
+    ]
+    origen = cabeceras.get(b'origin', b'').decode('latin-1')
+    if origen and origen in getattr(settings, 'CORS_ALLOWED_ORIGINS', []):
+        respuesta.append((b'access-control-allow-origin', origen.encode('latin-1')))
+
+    vigilancia = asyncio.ensure_future(vigilar_desconexion())
+    flujo = _flujo(suscripcion, perdidos, configuracion['LATIDO'], configuracion['REINTENTO_MS'])
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': respuesta})
+        async for fragmento in flujo:
+            await send({'type': 'http.response.body', 'body': fragmento.encode(), 'more_body': True})
+        if not vigilancia.done():
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        vigilancia.cancel()
+        await flujo.aclose()
+
+
+def aplicacion_eventos(aplicacion, ruta=RUTA):
+    """Envuelve la aplicación ASGI de Django atendiendo `ruta` con servir_eventos()"""
+    # Con el historial ya cargado, el primer cliente que reconecta a este worker puede reanudar
+    broker.iniciar()
+    async def envoltura(scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == ruta:
+            return await servir_eventos(scope, receive, send)
+        return await aplicacion(scope, receive, send)
+    return envoltura
@@ -0,0 +1,38 @@
+"""Filtros de consulta compartidos entre vistas"""
+from .etiquetas import filtrar_etiquetas
+from .jerarquia import subarbol
+
+
+def filtrar_categoria(queryset, params):
+    """
+    Filtro `categoria` de listados y análisis: la categoría y todas sus
+    subcategorías (con subcategorias=0, solo la categoría). Lanza ValueError
+    si el id no es un número.
+    """
+    categoria = params.get('categoria', None)
+    if not categoria:
+        return queryset
+    if params.get('subcategorias', '1').lower() in ('0', 'false', 'no'):
+        return queryset.filter(categoria_id=categoria)
+    return queryset.filter(categoria_id__in=subarbol(categoria))
+
+
+def filtrar_transacciones(queryset, params):
+    """
+    Aplica los filtros de query string de TransaccionViewSet (tipo, categoría,
+    etiquetas y rango de fechas). Lanza ValueError si un id no es un número.
+    """
+    tipo = params.get('tipo', None)
+    fecha_desde = params.get('fecha_desde', None)
+    fecha_hasta = params.get('fecha_hasta', None)
+
+    if tipo:
+        queryset = queryset.filter(tipo=tipo)
+    queryset = filtrar_categoria(queryset, params)
+    queryset = filtrar_etiquetas(queryset, params)
+    if fecha_desde:
+        queryset = queryset.filter(fecha__gte=fecha_desde)
+    if fecha_hasta:
+        queryset = queryset.filter(fecha__lte=fecha_hasta)
+
+    return queryset
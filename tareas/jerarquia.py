@@ -0,0 +1,121 @@
+"""
+Jerarquía de categorías (p. ej. Alimentación > Supermercado) sobre una tabla
+de clausura.
+
+CategoriaAncestro guarda una fila por cada par (ancestro, descendiente),
+incluida la de cada categoría consigo misma. Así el subárbol de una categoría
+es `ancestro_id = X` y sus ancestros `descendiente_id = X`, ambos por índice:
+los totales de un subárbol son un JOIN y un SUM, sin recorrer el árbol en
+Python.
+
+Las filas se mantienen con sentencias masivas:
+
+- al crear una categoría se copian las filas de los ancestros de su padre
+  (INSERT ... SELECT);
+- al mover un subárbol se borran sus filas con los ancestros anteriores y se
+  inserta el producto cruzado de los nuevos ancestros por los descendientes;
+- reconstruir() regenera toda la tabla desde `padre` con una CTE recursiva
+  (tras altas con bulk_create, que no emiten señales).
+"""
+from django.db import connections, router, transaction
+
+from .models import Categoria, CategoriaAncestro
+
+
+def subarbol(categoria_id):
+    """Subconsulta con los ids de la categoría y todas sus descendientes"""
+    return CategoriaAncestro.objects.filter(ancestro_id=categoria_id).values('descendiente_id')
+
+
+def ancestros(categoria_id):
+    """Subconsulta con los ids de la categoría y todos sus ancestros"""
+    return CategoriaAncestro.objects.filter(descendiente_id=categoria_id).values('ancestro_id')
+
+
+def en_subarbol(categoria_id, posible_descendiente_id):
+    return CategoriaAncestro.objects.filter(
+        ancestro_id=categoria_id, descendiente_id=posible_descendiente_id
+    ).exists()
+
+
+def validar_padre(categoria_id, tipo, padre):
+    """Error (texto) si `padre` no puede ser el padre de la categoría, o None"""
+    if padre is None:
+        return None
+    if padre.tipo != tipo:
+        return 'La categoría padre debe ser del mismo tipo'
+    if categoria_id is not None and en_subarbol(categoria_id, padre.pk):
+        return 'Una categoría no puede colgar de sí misma ni de una de sus subcategorías'
+    return None
+
+
+def _ejecutar(sql, parametros=()):
+    conexion = connections[router.db_for_write(CategoriaAncestro)]
+    opciones = CategoriaAncestro._meta
+    nombres = {
+        'clausura': conexion.ops.quote_name(opciones.db_table),
+        'categoria': conexion.ops.quote_name(Categoria._meta.db_table),
+    }
+    with conexion.cursor() as cursor:
+        cursor.execute(sql.format(**nombres), parametros)
+        return cursor.rowcount
+
+
+def insertar(categoria):
+    """Filas de una categoría nueva: ella misma y los ancestros de su padre"""
+    return _ejecutar(
+        'INSERT INTO {clausura} (ancestro_id, descendiente_id, profundidad) '
+        'SELECT %s, %s, 0 '
+        'UNION ALL '
+        'SELECT ancestro_id, %s, profundidad + 1 FROM {clausura} WHERE descendiente_id = %s',
+        (categoria.pk, categoria.pk, categoria.pk, categoria.padre_id or 0),
+    )
+
+
+def _desprender(subarbol_movido):
+    """Borra las filas que unen los nodos de `subarbol_movido` con ancestros de fuera de él"""
+    return CategoriaAncestro.objects.filter(
+        descendiente_id__in=subarbol_movido
+    ).exclude(ancestro_id__in=subarbol_movido).delete()[0]
+
+
+def mover(categoria_id, padre_id):
+    """
+    Cuelga el subárbol de la categoría de `padre_id` (None: lo deja como raíz)
+    con un DELETE y un INSERT ... SELECT, sin importar su tamaño.
+    """
+    if padre_id is not None and en_subarbol(categoria_id, padre_id):
+        raise ValueError('Una categoría no puede moverse dentro de su propio subárbol')
+    with transaction.atomic(using=router.db_for_write(CategoriaAncestro)):
+        _desprender(subarbol(categoria_id))
+        if padre_id is not None:
+            _ejecutar(
+                'INSERT INTO {clausura} (ancestro_id, descendiente_id, profundidad) '
+                'SELECT arriba.ancestro_id, abajo.descendiente_id, arriba.profundidad + abajo.profundidad + 1 '
+                'FROM {clausura} arriba, {clausura} abajo '
+                'WHERE arriba.descendiente_id = %s AND abajo.ancestro_id = %s',
+                (padre_id, categoria_id),
+            )
+
+
+def desprender_subcategorias(categoria_id):
+    """
+    Antes de borrar una categoría: sus hijas quedan como raíces (padre NULL) y
+    sus subárboles se separan de los ancestros de la borrada.
+    """
+    return _desprender(subarbol(categoria_id).filter(profundidad__gt=0))
+
+
+def reconstruir():
+    """Regenera la tabla de clausura completa a partir de `padre`. Devuelve las filas insertadas"""
+    with transaction.atomic(using=router.db_for_write(CategoriaAncestro)):
+        _ejecutar('DELETE FROM {clausura}')
+        return _ejecutar(
+            'INSERT INTO {clausura} (ancestro_id, descendiente_id, profundidad) '
+            'WITH RECURSIVE arbol (ancestro_id, descendiente_id, profundidad) AS ('
+            '  SELECT id, id, 0 FROM {categoria}'
+            '  UNION ALL'
+            '  SELECT arbol.ancestro_id, hija.id, arbol.profundidad + 1'
+            '  FROM arbol JOIN {categoria} hija ON hija.padre_id = arbol.descendiente_id'
+            ') SELECT ancestro_id, descendiente_id, profundidad FROM arbol'
+        )
@@ -0,0 +1,163 @@
+"""
+Endpoint de lotes: varias peticiones GET de la API en un solo viaje.
+
+POST /api/batch/ recibe una lista de subpeticiones GET y las resuelve en el
+mismo proceso con el enrutador de URLs, sin repetir el viaje HTTP ni el
+middleware. Cada subpetición hereda las cabeceras, cookies y usuario de la
+petición original, y su respuesta vuelve con su propio estado:
+
+    {"peticiones": [
+        {"id": "dashboard", "ruta": "analisis/dashboard"},
+        {"id": "resumen", "ruta": "transacciones/resumen_mensual", "params": {"mes": 5}}
+     ],
+     "concurrente": true}
+
+Con `concurrente` las subpeticiones se ejecutan en un grupo de hilos (cada
+uno con su conexión a la base de datos). Cada subpetición tiene su propio
+estado de enrutamiento a la réplica (replicas.estado_propio).
+"""
+import contextvars
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import resolve
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from .replicas import estado_propio
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'MAX_PETICIONES': 20,
+    'HILOS': 4,
+}
+
+PREFIJO_API = '/api/'
+
+# Datos de la petición original que se copian a cada subpetición
+META_HEREDADOS = ('SERVER_NAME', 'SERVER_PORT', 'REMOTE_ADDR', 'wsgi.url_scheme')
+
+
+def configuracion_lotes():
+    """Configuración efectiva de LOTES_API con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'LOTES_API', {})}
+
+
+def normalizar_ruta(ruta):
+    """Ruta absoluta dentro de /api/ a partir de 'analisis/dashboard' o '/api/analisis/dashboard/'"""
+    ruta = '/' + str(ruta).strip().strip('/') + '/'
+    if not ruta.startswith(PREFIJO_API):
+        ruta = PREFIJO_API.rstrip('/') + ruta
+    return ruta
+
+
+def construir_subpeticion(request, ruta, params):
+    """HttpRequest GET para `ruta` con las cabeceras, sesión y usuario de la petición original"""
+    original = request._request
+    consulta = urlencode(params or {}, doseq=True)
+    subpeticion = HttpRequest()
+    subpeticion.method = 'GET'
+    subpeticion.path = subpeticion.path_info = ruta
+    subpeticion.META = {
+        **{clave: valor for clave, valor in original.META.items()
+           if clave.startswith('HTTP_') or clave in META_HEREDADOS},
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': ruta,
+        'QUERY_STRING': consulta,
+    }
+    subpeticion.GET = QueryDict(consulta)
+    subpeticion.COOKIES = original.COOKIES
+    for atributo in ('session', 'user'):
+        if hasattr(original, atributo):
+            setattr(subpeticion, atributo, getattr(original, atributo))
+    # La subpetición no pasa por CsrfViewMiddleware (solo se admiten GET)
+    subpeticion._dont_enforce_csrf_checks = True
+    return subpeticion
+
+
+def _datos(response):
+    """Datos de la respuesta: los de DRF tal cual, JSON decodificado o texto"""
+    if hasattr(response, 'data'):
+        return response.data
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(response.content)
+    return response.content.decode(response.charset or 'utf-8')
+
+
+def ejecutar_subpeticion(request, item):
+    """Resuelve y ejecuta una subpetición; devuelve {'id', 'estado', 'datos'}"""
+    identificador = item.get('id')
+    ruta = normalizar_ruta(item['ruta'])
+    try:
+        coincidencia = resolve(ruta)
+    except Http404:
+        return {'id': identificador, 'estado': 404, 'datos': {'detail': f'No existe la ruta {ruta}'}}
+    if coincidencia.func is lote:
+        return {'id': identificador, 'estado': 400, 'datos': {'detail': 'Un lote no puede contener lotes'}}
+
+    subpeticion = construir_subpeticion(request, ruta, item.get('params'))
+    try:
+        with estado_propio():
+            if iscoroutinefunction(coincidencia.func):
+                response = async_to_sync(coincidencia.func)(subpeticion, *coincidencia.args, **coincidencia.kwargs)
+            else:
+                response = coincidencia.func(subpeticion, *coincidencia.args, **coincidencia.kwargs)
+    except Exception:
+        logger.exception('Error en la subpetición %s', ruta)
+        return {'id': identificador, 'estado': 500, 'datos': {'detail': 'Error interno'}}
+    return {'id': identificador, 'estado': response.status_code, 'datos': _datos(response)}
+
+
+def _en_hilo(contexto, request, item):
+    # El contexto copiado conserva la instrumentación de la petición (el estado de réplica
+    # se copia aparte en ejecutar_subpeticion)
+    try:
+        return contexto.run(ejecutar_subpeticion, request, item)
+    finally:
+        connections.close_all()
+
+
+def validar_peticiones(peticiones, maximo):
+    """Devuelve un mensaje de error o None si la lista de subpeticiones es válida"""
+    if not isinstance(peticiones, list) or not peticiones:
+        return 'Debe enviar "peticiones" como una lista no vacía'
+    if len(peticiones) > maximo:
+        return f'Un lote admite como máximo {maximo} peticiones'
+    for posicion, item in enumerate(peticiones):
+        if not isinstance(item, dict) or not item.get('ruta'):
+            return f'La petición {posicion} debe ser un objeto con "ruta"'
+        if str(item.get('metodo', 'GET')).upper() != 'GET':
+            return f'La petición {posicion} no es GET: los lotes solo admiten lecturas'
+        if item.get('params') is not None and not isinstance(item['params'], dict):
+            return f'Los "params" de la petición {posicion} deben ser un objeto'
+    return None
+
+
+@api_view(['POST'])
+def lote(request):
+    """Ejecuta una lista de peticiones GET de la API y devuelve todas sus respuestas"""
+    configuracion = configuracion_lotes()
+    peticiones = request.data.get('peticiones', None)
+    error = validar_peticiones(peticiones, configuracion['MAX_PETICIONES'])
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.data.get('concurrente') and len(peticiones) > 1:
+        # Un contexto por subpetición, copiado en este hilo (un Context no admite dos hilos a la vez)
+        contextos = [contextvars.copy_context() for _ in peticiones]
+        with ThreadPoolExecutor(max_workers=min(configuracion['HILOS'], len(peticiones))) as grupo:
+            respuestas = list(grupo.map(
+                lambda contexto, item: _en_hilo(contexto, request, item), contextos, peticiones
+            ))
+    else:
+        respuestas = [ejecutar_subpeticion(request, item) for item in peticiones]
+
+    return Response({'respuestas': respuestas})
@@ -0,0 +1,25 @@
+"""Utilidades compartidas por los comandos de benchmark"""
+import statistics
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    if not valores:
+        return None
+    indice = max(0, min(len(valores) - 1, round(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+def resumir_tiempos(tiempos_ms):
+    """Resume una lista de tiempos en milisegundos (media, percentiles y máximo)"""
+    tiempos = sorted(tiempos_ms)
+    if not tiempos:
+        return {'iteraciones': 0}
+    return {
+        'iteraciones': len(tiempos),
+        'media_ms': round(statistics.fmean(tiempos), 3),
+        'p50_ms': round(percentil(tiempos, 50), 3),
+        'p95_ms': round(percentil(tiempos, 95), 3),
+        'p99_ms': round(percentil(tiempos, 99), 3),
+        'max_ms': round(tiempos[-1], 3),
+    }
@@ -0,0 +1,67 @@
+"""
+Archiva y restaura años cerrados de transacciones.
+
+Archivar mueve las transacciones del año a la tabla `tareas_transaccion_<año>`
+y guarda sus totales mensuales en ResumenMensualArchivado; restaurar hace el
+camino inverso. Con --automatico se archivan todos los años anteriores a los
+ARCHIVO['AÑOS_ACTIVOS'] más recientes (pensado para ejecutarse cada enero).
+
+Uso:
+    python manage.py archivar_transacciones listar
+    python manage.py archivar_transacciones archivar --año 2023
+    python manage.py archivar_transacciones archivar --automatico
+    python manage.py archivar_transacciones restaurar --año 2023
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tareas import archivo
+from tareas.models import ArchivoAnual, Transaccion
+
+
+class Command(BaseCommand):
+    help = 'Mueve años cerrados de transacciones a tablas de archivo (o los restaura)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('accion', choices=['archivar', 'restaurar', 'listar'])
+        parser.add_argument('--año', '--anio', dest='año', type=int, default=None)
+        parser.add_argument('--automatico', action='store_true',
+                            help='Archiva los años que quedan fuera de ARCHIVO["AÑOS_ACTIVOS"]')
+
+    def handle(self, *args, **options):
+        accion = options['accion']
+        if accion == 'listar':
+            self.listar()
+            return
+
+        if accion == 'archivar' and options['automatico']:
+            años = archivo.años_para_archivar()
+        elif options['año']:
+            años = [options['año']]
+        else:
+            raise CommandError('Debe indicar --año (o --automatico al archivar)')
+
+        funcion = archivo.archivar_año if accion == 'archivar' else archivo.restaurar_año
+        for año in años:
+            if accion == 'archivar' and ArchivoAnual.objects.filter(año=año).exists():
+                continue
+            inicio = time.perf_counter()
+            try:
+                filas = funcion(año)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            verbo = 'archivadas' if accion == 'archivar' else 'restauradas'
+            self.stdout.write(self.style.SUCCESS(
+                f'{año}: {filas:,} transacciones {verbo} en {time.perf_counter() - inicio:.1f}s'
+            ))
+        if not años:
+            self.stdout.write('No hay años para archivar')
+
+    def listar(self):
+        self.stdout.write(f'Tabla activa: {Transaccion.objects.count():,} transacciones')
+        for registro in ArchivoAnual.objects.all():
+            self.stdout.write(
+                f'{registro.año}: {registro.filas:,} transacciones en {registro.tabla} '
+                f'(archivado el {registro.fecha_archivo:%Y-%m-%d})'
+            )
@@ -0,0 +1,107 @@
+"""
+Benchmark de las páginas de listado del admin.
+
+Mide el tiempo y las consultas SQL de los changelists de transacciones,
+presupuestos y alertas (sin filtros, filtrados por período y categoría, con
+búsqueda y en una página profunda). Con --tamaños regenera los datos con
+generar_datos para cada cantidad de transacciones y muestra que el tiempo
+por página se mantiene plano al crecer la tabla.
+
+Uso:
+    python manage.py benchmark_admin
+    python manage.py benchmark_admin --tamaños 10000 100000 1000000   # ¡borra los datos existentes!
+"""
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from tareas.models import Categoria, Transaccion
+
+from ._medicion import resumir_tiempos
+
+USUARIO_BENCHMARK = 'benchmark_admin'
+
+
+def escenarios():
+    """Rutas del admin a medir, según los datos actuales"""
+    ultima = Transaccion.objects.order_by('-fecha').values_list('fecha', flat=True).first()
+    categoria = Categoria.objects.filter(tipo='gasto').values_list('pk', flat=True).first()
+    base = '/admin/tareas/transaccion/'
+    rutas = {
+        'transacciones': base,
+        'transacciones_pagina_50': f'{base}?p=50',
+        'transacciones_busqueda': f'{base}?q=Supermercado',
+        'presupuestos': '/admin/tareas/presupuesto/',
+        'alertas': '/admin/tareas/alertapresupuesto/',
+    }
+    if ultima:
+        rutas['transacciones_mes'] = f'{base}?periodo={ultima:%Y-%m}'
+    if categoria:
+        rutas['transacciones_categoria'] = f'{base}?categoria={categoria}&tipo__exact=gasto'
+    return rutas
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo de las páginas de listado del admin (opcionalmente para varios tamaños de datos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iteraciones', type=int, default=10)
+        parser.add_argument('--tamaños', '--tamanos', type=int, nargs='+', dest='tamaños', default=None,
+                            help='Cantidades de transacciones a generar (borra los datos existentes)')
+        parser.add_argument('--salida', default=None, help='Archivo donde guardar el JSON')
+
+    def handle(self, *args, **options):
+        if options['iteraciones'] < 1:
+            raise CommandError('--iteraciones debe ser mayor que 0')
+
+        modelo_usuario = get_user_model()
+        usuario, creado = modelo_usuario.objects.get_or_create(
+            username=USUARIO_BENCHMARK, defaults={'is_staff': True, 'is_superuser': True}
+        )
+        cliente = Client(SERVER_NAME='localhost')
+        cliente.force_login(usuario)
+
+        try:
+            informe = {}
+            for tamaño in options['tamaños'] or [None]:
+                if tamaño is not None:
+                    self.stderr.write(f'Generando {tamaño} transacciones...')
+                    call_command('generar_datos', transacciones=tamaño, limpiar=True, stdout=self.stderr)
+                filas = Transaccion.objects.count()
+                informe[str(filas)] = {
+                    nombre: self.medir(cliente, ruta, options['iteraciones'])
+                    for nombre, ruta in escenarios().items()
+                }
+                for nombre, datos in informe[str(filas)].items():
+                    self.stderr.write(f"{filas} filas - {nombre}: p50={datos.get('p50_ms')} ms, {datos['consultas']} consultas")
+        finally:
+            if creado:
+                usuario.delete()
+
+        salida = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(salida)
+        self.stdout.write(salida)
+
+    def medir(self, cliente, ruta, iteraciones):
+        # request_started vacía el registro de consultas: se parte de cero para no desfasar la captura
+        reset_queries()
+        with CaptureQueriesContext(connection) as capturadas:
+            estado = cliente.get(ruta).status_code
+
+        tiempos = []
+        for _ in range(iteraciones):
+            inicio = time.perf_counter()
+            cliente.get(ruta)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        resumen = resumir_tiempos(tiempos)
+        resumen.update({'estado': estado, 'consultas': len(capturadas)})
+        return resumen
@@ -0,0 +1,111 @@
+"""
+Mide la detección de gastos inusuales (tareas/anomalias.py).
+
+- calculo: detectar() sobre N gastos sintéticos (montos log-normales por
+  categoría a lo largo de --dias días), sin base de datos;
+- base: la consulta completa sobre los gastos reales del período (versión,
+  lectura, cálculo y detalle de la respuesta) sin caché, con las columnas de
+  los meses cerrados ya guardadas (lo que cuesta después de anotar un gasto
+  del mes en curso) y servida desde la caché; además la lectura y el cálculo
+  por separado.
+
+Uso:
+    python manage.py benchmark_anomalias --filas 1000000 --repeticiones 5
+"""
+import json
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tareas import anomalias
+
+from ._medicion import resumir_tiempos
+
+
+def gastos_sinteticos(filas, categorias, dias, semilla=0):
+    """Arreglos (ids, día, categoría, monto) con un 0.1% de gastos multiplicados por 3 a 10"""
+    generador = np.random.default_rng(semilla)
+    categoria = generador.integers(0, categorias, filas)
+    base = np.exp(generador.uniform(10, 13, categorias))
+    montos = base[categoria] * generador.lognormal(0, 0.3, filas)
+    inusuales = generador.random(filas) < 0.001
+    montos[inusuales] *= generador.uniform(3, 10, inusuales.sum())
+    dias_hoy = (np.datetime64(timezone.localdate(), 'D') - np.datetime64(0, 'D')).astype(np.int64)
+    dia = dias_hoy - generador.integers(0, dias, filas)
+    return np.arange(1, filas + 1, dtype=np.int64), dia, categoria, np.round(montos), inusuales
+
+
+class Command(BaseCommand):
+    help = 'Mide el cálculo vectorizado de anomalías de gasto y el endpoint con su caché'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=1_000_000)
+        parser.add_argument('--categorias', type=int, default=20)
+        parser.add_argument('--dias', type=int, default=365)
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--sin-base', action='store_true', help='Omite la medición sobre la base de datos')
+
+    def handle(self, *args, **options):
+        if options['filas'] < 1 or options['repeticiones'] < 1:
+            raise CommandError('--filas y --repeticiones deben ser mayores que 0')
+        configuracion = anomalias.configuracion_anomalias()
+        parametros = (configuracion['UMBRAL'], configuracion['VENTANA_DIAS'], configuracion['MIN_MUESTRAS'])
+
+        ids, dia, categoria, montos, inusuales = gastos_sinteticos(
+            options['filas'], options['categorias'], options['dias']
+        )
+        tiempos = []
+        for _ in range(options['repeticiones']):
+            inicio = time.perf_counter()
+            marcadas, _, _ = anomalias.detectar(ids, dia, categoria, montos, *parametros)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        detectadas = np.isin(ids[inusuales], marcadas)
+        resultado = {
+            'calculo': {
+                'filas': options['filas'],
+                'anomalias': len(marcadas),
+                'inusuales_plantadas': int(inusuales.sum()),
+                'inusuales_detectadas': int(detectadas.sum()),
+                'tiempos': resumir_tiempos(tiempos),
+            },
+        }
+        if not options['sin_base']:
+            resultado['base'] = self.medir_base(options['dias'], parametros)
+        self.stdout.write(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+    def medir_base(self, dias, parametros):
+        hasta = timezone.localdate()
+        desde = hasta - timedelta(days=dias - 1)
+        limite = anomalias.configuracion_anomalias()['LIMITE']
+
+        def consulta():
+            inicio = time.perf_counter()
+            resultado = anomalias.anomalias_cacheadas(desde, hasta, *parametros)
+            anomalias.formatear_anomalias(resultado, limite)
+            return (time.perf_counter() - inicio) * 1000
+
+        anomalias.limpiar_cache()
+        inicio = time.perf_counter()
+        columnas = anomalias.columnas_gastos(desde, hasta)
+        lectura = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        marcadas, _, _ = anomalias.detectar(*columnas, *parametros)
+        calculo = time.perf_counter() - inicio
+
+        anomalias.limpiar_cache()
+        sin_cache = consulta()
+        anomalias.limpiar_cache(columnas=False)
+        mes_en_curso = consulta()
+        cacheada = consulta()
+        return {
+            'filas': len(columnas[0]),
+            'anomalias': len(marcadas),
+            'lectura_ms': round(lectura * 1000, 1),
+            'calculo_ms': round(calculo * 1000, 1),
+            'consulta_sin_cache_ms': round(sin_cache, 1),
+            'consulta_mes_en_curso_ms': round(mes_en_curso, 1),
+            'consulta_cacheada_ms': round(cacheada, 1),
+        }
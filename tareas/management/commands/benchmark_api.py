@@ -0,0 +1,157 @@
+"""
+Benchmark de extremo a extremo de la API.
+
+Recorre todos los endpoints GET registrados en tareas/urls.py (listados,
+detalles y acciones) y reporta latencia p50/p95/p99, throughput y número de
+consultas SQL en JSON para comparar ejecuciones.
+
+Uso:
+    python manage.py generar_datos --transacciones 1000000 --limpiar
+    python manage.py benchmark_api --iteraciones 50 --salida resultados.json
+    python manage.py benchmark_api --url http://localhost:8000   # contra un servidor local
+"""
+import json
+import platform
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tareas.urls import router
+
+from ._medicion import resumir_tiempos
+
+
+def descubrir_endpoints(prefijo='/api/'):
+    """Lista las rutas GET del router: listados, detalles y acciones extra"""
+    endpoints = [prefijo]
+    for ruta, viewset, _ in router.registry:
+        base = f'{prefijo}{ruta}/'
+        modelo = getattr(getattr(viewset, 'queryset', None), 'model', None)
+        pk = None
+        if modelo is not None and hasattr(viewset, 'retrieve'):
+            pk = viewset.queryset.order_by('pk').values_list('pk', flat=True).first()
+
+        if hasattr(viewset, 'list'):
+            endpoints.append(base)
+        if pk is not None:
+            endpoints.append(f'{base}{pk}/')
+
+        for accion in viewset.get_extra_actions():
+            if 'get' not in accion.mapping:
+                continue
+            if accion.detail:
+                if pk is not None:
+                    endpoints.append(f'{base}{pk}/{accion.url_path}/')
+            else:
+                endpoints.append(f'{base}{accion.url_path}/')
+    return endpoints
+
+
+class ClienteLocal:
+    """Ejecuta las peticiones en el mismo proceso con el cliente de pruebas de Django"""
+
+    cuenta_consultas = True
+
+    def __init__(self):
+        self.cliente = Client(SERVER_NAME='localhost')
+
+    def get(self, ruta):
+        return self.cliente.get(ruta).status_code
+
+
+class ClienteServidor:
+    """Ejecuta las peticiones por HTTP contra un servidor en ejecución"""
+
+    cuenta_consultas = False
+
+    def __init__(self, url):
+        import requests
+        self.url = url.rstrip('/')
+        self.sesion = requests.Session()
+
+    def get(self, ruta):
+        return self.sesion.get(self.url + ruta).status_code
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia, throughput y consultas SQL de todos los endpoints GET de la API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iteraciones', type=int, default=30)
+        parser.add_argument('--calentamiento', type=int, default=2)
+        parser.add_argument('--url', default=None, help='URL de un servidor local; por defecto usa el cliente de pruebas')
+        parser.add_argument('--filtro', default=None, help='Solo mide rutas que contengan este texto')
+        parser.add_argument('--salida', default=None, help='Archivo donde guardar el JSON')
+
+    def handle(self, *args, **options):
+        if options['iteraciones'] < 1:
+            raise CommandError('--iteraciones debe ser mayor que 0')
+
+        cliente = ClienteServidor(options['url']) if options['url'] else ClienteLocal()
+        endpoints = descubrir_endpoints()
+        if options['filtro']:
+            endpoints = [e for e in endpoints if options['filtro'] in e]
+
+        resultados = {}
+        for ruta in endpoints:
+            resultados[ruta] = self.medir(cliente, ruta, options['iteraciones'], options['calentamiento'])
+            self.stderr.write(f"{ruta}: p50={resultados[ruta].get('p50_ms')} ms")
+
+        informe = {
+            'meta': {
+                'fecha': timezone.now().isoformat(),
+                'modo': options['url'] or 'cliente_django',
+                'iteraciones': options['iteraciones'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'filas': self.contar_filas(),
+            },
+            'endpoints': resultados,
+        }
+
+        salida = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(salida)
+        self.stdout.write(salida)
+
+    def medir(self, cliente, ruta, iteraciones, calentamiento):
+        consultas = None
+        for i in range(max(calentamiento, 1)):
+            if i == 0 and cliente.cuenta_consultas:
+                # request_started vacía el registro de consultas: se parte de cero para no desfasar la captura
+                reset_queries()
+                with CaptureQueriesContext(connection) as capturadas:
+                    estado = cliente.get(ruta)
+                consultas = len(capturadas)
+            else:
+                estado = cliente.get(ruta)
+
+        tiempos = []
+        inicio_total = time.perf_counter()
+        for _ in range(iteraciones):
+            inicio = time.perf_counter()
+            estado = cliente.get(ruta)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        duracion = time.perf_counter() - inicio_total
+
+        resumen = resumir_tiempos(tiempos)
+        resumen.update({
+            'estado': estado,
+            'consultas': consultas,
+            'throughput_rps': round(iteraciones / duracion, 2) if duracion else None,
+        })
+        return resumen
+
+    def contar_filas(self):
+        filas = {}
+        for _, viewset, _ in router.registry:
+            modelo = getattr(getattr(viewset, 'queryset', None), 'model', None)
+            if modelo is not None:
+                filas[modelo.__name__] = modelo.objects.count()
+        return filas
@@ -0,0 +1,120 @@
+"""
+Benchmark de concurrencia: vistas síncronas bajo WSGI frente a vistas
+asíncronas bajo ASGI.
+
+Lanza N clientes concurrentes (un hilo y una sesión HTTP por cliente) contra
+dos servidores ya en ejecución y reporta throughput y latencias en JSON. Las
+rutas síncronas (/api/...) se piden al servidor WSGI y sus equivalentes
+asíncronas (/api/async/...) al servidor ASGI.
+
+Uso:
+    uvicorn proyectoaulico.wsgi:application --interface wsgi --port 8000 --workers 2
+    ./run_asgi.sh 8001 2
+    python manage.py benchmark_concurrencia --clientes 100 --peticiones 20 \\
+        --wsgi http://127.0.0.1:8000 --asgi http://127.0.0.1:8001
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ._medicion import resumir_tiempos
+
+RUTAS_POR_DEFECTO = [
+    'analisis/dashboard/',
+    'transacciones/resumen_mensual/',
+    'transacciones/tendencias/?meses=12',
+    'transacciones/',
+]
+
+
+def ejecutar_clientes(url_base, rutas, clientes, peticiones):
+    """Ejecuta `clientes` clientes concurrentes que recorren las rutas `peticiones` veces"""
+    import requests
+
+    barrera = threading.Barrier(clientes)
+
+    def cliente(indice):
+        sesion = requests.Session()
+        tiempos, errores = [], 0
+        barrera.wait()
+        for i in range(peticiones):
+            ruta = rutas[(indice + i) % len(rutas)]
+            inicio = time.perf_counter()
+            try:
+                respuesta = sesion.get(url_base + ruta, timeout=60)
+                if respuesta.status_code != 200:
+                    errores += 1
+            except requests.RequestException:
+                errores += 1
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        sesion.close()
+        return tiempos, errores
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clientes) as ejecutor:
+        resultados = list(ejecutor.map(cliente, range(clientes)))
+    duracion = time.perf_counter() - inicio
+
+    tiempos = [t for parciales, _ in resultados for t in parciales]
+    resumen = resumir_tiempos(tiempos)
+    resumen.update({
+        'errores': sum(errores for _, errores in resultados),
+        'duracion_s': round(duracion, 3),
+        'throughput_rps': round(len(tiempos) / duracion, 2) if duracion else None,
+    })
+    return resumen
+
+
+class Command(BaseCommand):
+    help = 'Compara throughput de las vistas síncronas (WSGI) y asíncronas (ASGI) con clientes concurrentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', default='http://127.0.0.1:8000', help='URL del servidor WSGI')
+        parser.add_argument('--asgi', default='http://127.0.0.1:8001', help='URL del servidor ASGI')
+        parser.add_argument('--clientes', type=int, default=100)
+        parser.add_argument('--peticiones', type=int, default=20, help='Peticiones por cliente')
+        parser.add_argument('--ruta', action='append', dest='rutas', help='Ruta relativa a /api/ (repetible)')
+        parser.add_argument('--salida', default=None, help='Archivo donde guardar el JSON')
+
+    def handle(self, *args, **options):
+        if options['clientes'] < 1 or options['peticiones'] < 1:
+            raise CommandError('--clientes y --peticiones deben ser mayores que 0')
+
+        rutas = options['rutas'] or RUTAS_POR_DEFECTO
+        escenarios = {
+            'wsgi_sync': (options['wsgi'].rstrip('/'), [f'/api/{r}' for r in rutas]),
+            'asgi_async': (options['asgi'].rstrip('/'), [f'/api/async/{r}' for r in rutas]),
+        }
+
+        resultados = {}
+        for nombre, (url_base, rutas_escenario) in escenarios.items():
+            # Calentamiento: una pasada secuencial por cada ruta
+            ejecutar_clientes(url_base, rutas_escenario, 1, len(rutas_escenario))
+            resultados[nombre] = ejecutar_clientes(
+                url_base, rutas_escenario, options['clientes'], options['peticiones']
+            )
+            self.stderr.write(
+                f"{nombre}: {resultados[nombre]['throughput_rps']} req/s, "
+                f"p95={resultados[nombre].get('p95_ms')} ms, errores={resultados[nombre]['errores']}"
+            )
+
+        informe = {
+            'meta': {
+                'fecha': timezone.now().isoformat(),
+                'clientes': options['clientes'],
+                'peticiones_por_cliente': options['peticiones'],
+                'rutas': rutas,
+                'wsgi': options['wsgi'],
+                'asgi': options['asgi'],
+            },
+            'escenarios': resultados,
+        }
+        salida = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(salida)
+        self.stdout.write(salida)
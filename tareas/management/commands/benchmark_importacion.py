@@ -0,0 +1,111 @@
+"""
+Mide el costo de importación de la aplicación Streamlit con `python -X importtime`.
+
+Cada medición corre en un intérprete nuevo (arranque en frío) y reporta la
+mediana de las repeticiones:
+
+- arranque: `import app_streamlit` (marco de la aplicación y funciones comunes)
+- paginas: lo que agrega importar el módulo de cada página después del arranque
+  (se paga una vez por proceso, la primera vez que alguien abre la página)
+- primer_pintado: arranque + la página inicial de la navegación
+- referencia_monolitica: streamlit + pandas + plotly, lo que se importaba en
+  el arranque cuando todas las páginas estaban en app_streamlit.py
+
+Uso:
+    python manage.py benchmark_importacion --repeticiones 5
+"""
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# import time:       self [us] |    cumulative | imported package
+_LINEA = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$')
+
+MODULOS_MONOLITO = ['streamlit', 'pandas', 'plotly.express', 'plotly.graph_objects', 'cliente_api']
+
+
+def parsear_importtime(texto):
+    """
+    Importaciones de primer nivel de la salida de -X importtime:
+    {modulo: (acumulado_us, [(acumulado_us, submódulo directo), ...])}
+    """
+    resultado, hijos = {}, []
+    for linea in texto.splitlines():
+        coincidencia = _LINEA.match(linea)
+        if not coincidencia:
+            continue
+        _, acumulado, sangria, modulo = coincidencia.groups()
+        nivel = (len(sangria) - 1) // 2
+        if nivel == 0:
+            # -X importtime lista los submódulos antes que el módulo que los importa
+            resultado[modulo] = (int(acumulado), hijos)
+            hijos = []
+        elif nivel == 1:
+            hijos.append((int(acumulado), modulo))
+    return resultado
+
+
+def medir(modulos, previos=()):
+    """Importa `previos` y luego `modulos` en un intérprete nuevo; devuelve el costo de cada uno"""
+    codigo = '; '.join(f'import {modulo}' for modulo in (*previos, *modulos))
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=settings.BASE_DIR, capture_output=True, text=True,
+    )
+    if proceso.returncode != 0:
+        ultima = (proceso.stderr.strip().splitlines() or ['sin salida'])[-1]
+        raise CommandError(f'No se pudo importar {", ".join(modulos)}: {ultima}')
+    importaciones = parsear_importtime(proceso.stderr)
+    # Un módulo ya importado por `previos` no vuelve a aparecer: su costo adicional es 0
+    return {modulo: importaciones.get(modulo, (0, [])) for modulo in modulos}
+
+
+def _ms(microsegundos):
+    return round(microsegundos / 1000, 1)
+
+
+class Command(BaseCommand):
+    help = 'Mide con -X importtime el arranque de la aplicación Streamlit y la carga de cada página'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--top', type=int, default=5, help='Submódulos más pesados a listar')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que 0')
+        sys.path.insert(0, str(settings.BASE_DIR))
+        import paginas
+
+        self.repeticiones, self.top = options['repeticiones'], options['top']
+        arranque = self.resumir(['app_streamlit'])['app_streamlit']
+        resultado_paginas = {
+            etiqueta: self.resumir([modulo], previos=['app_streamlit'])[modulo]
+            for etiqueta, modulo in paginas.PAGINAS.items()
+        }
+        inicial = next(iter(paginas.PAGINAS))
+        monolito = self.resumir(MODULOS_MONOLITO)
+
+        self.stdout.write(json.dumps({
+            'arranque': arranque,
+            'paginas': resultado_paginas,
+            'primer_pintado_ms': round(arranque['ms'] + resultado_paginas[inicial]['ms'], 1),
+            'referencia_monolitica_ms': round(sum(m['ms'] for m in monolito.values()), 1),
+        }, indent=2, ensure_ascii=False))
+
+    def resumir(self, modulos, previos=()):
+        mediciones = [medir(modulos, previos) for _ in range(self.repeticiones)]
+        resumen = {}
+        for modulo in modulos:
+            tiempos = [medicion[modulo][0] for medicion in mediciones]
+            mas_pesados = sorted(mediciones[-1][modulo][1], reverse=True)[:self.top]
+            resumen[modulo] = {
+                'ms': _ms(statistics.median(tiempos)),
+                'mas_pesados': {nombre: _ms(acumulado) for acumulado, nombre in mas_pesados},
+            }
+        return resumen
@@ -0,0 +1,58 @@
+"""
+Mide el pronóstico de metas (tareas/pronostico.py): la consulta del
+historial de ahorro mensual (sin caché y en caché) y la simulación de
+Monte Carlo de todas las metas en progreso.
+
+Uso:
+    python manage.py benchmark_pronostico --simulaciones 5000 --repeticiones 20
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tareas import pronostico
+from tareas.models import MetaFinanciera
+
+from ._medicion import resumir_tiempos
+
+
+class Command(BaseCommand):
+    help = 'Mide el historial de ahorro y la simulación de Monte Carlo del pronóstico de metas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simulaciones', type=int, default=None)
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que 0')
+        configuracion = pronostico.configuracion_pronostico()
+        if options['simulaciones']:
+            configuracion['SIMULACIONES'] = options['simulaciones']
+        hoy = timezone.localdate()
+
+        inicio = time.perf_counter()
+        netos = pronostico.ahorro_mensual(configuracion['HISTORIAL_MESES'], hoy)
+        historial_ms = (time.perf_counter() - inicio) * 1000
+        metas = list(MetaFinanciera.objects.filter(estado='en_progreso'))
+        pronostico.pronostico_metas(configuracion['SIMULACIONES'])  # llena la caché del historial
+
+        simulacion, completo = [], []
+        for _ in range(options['repeticiones']):
+            inicio = time.perf_counter()
+            pronostico.pronosticar(metas, netos, hoy, configuracion)
+            simulacion.append((time.perf_counter() - inicio) * 1000)
+            inicio = time.perf_counter()
+            pronostico.pronostico_metas(configuracion['SIMULACIONES'])
+            completo.append((time.perf_counter() - inicio) * 1000)
+
+        self.stdout.write(json.dumps({
+            'metas': len(metas),
+            'simulaciones': configuracion['SIMULACIONES'],
+            'meses_historial': len(netos),
+            'historial_sin_cache_ms': round(historial_ms, 1),
+            'simulacion': resumir_tiempos(simulacion),
+            'pronostico_con_historial_en_cache': resumir_tiempos(completo),
+        }, indent=2, ensure_ascii=False))
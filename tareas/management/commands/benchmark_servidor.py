@@ -0,0 +1,135 @@
+"""
+Prueba de carga: servidor de desarrollo (`manage.py runserver`, DEBUG) frente
+al de producción (run_produccion.sh: gunicorn con workers precargados,
+DEBUG desactivado y conexiones persistentes).
+
+Levanta cada servidor en un puerto libre, espera a que responda, lanza N
+clientes concurrentes con las mismas rutas (ver benchmark_concurrencia) y lo
+detiene. Reporta throughput y latencias de ambos en JSON.
+
+Uso:
+    python manage.py benchmark_servidor --clientes 50 --peticiones 20 --workers 4
+"""
+import json
+import os
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from .benchmark_concurrencia import RUTAS_POR_DEFECTO, ejecutar_clientes
+
+
+def puerto_libre():
+    with socket.socket() as conector:
+        conector.bind(('127.0.0.1', 0))
+        return conector.getsockname()[1]
+
+
+def esperar_servidor(url, proceso, espera=60):
+    """Espera a que el servidor responda en `url` (o falla si el proceso termina)"""
+    import requests
+
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise CommandError(f'El servidor terminó al arrancar (código {proceso.returncode})')
+        try:
+            requests.get(url, timeout=2)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise CommandError(f'El servidor no respondió en {espera}s: {url}')
+
+
+def detener(proceso):
+    # Cada servidor corre en su propio grupo de procesos (workers incluidos)
+    try:
+        os.killpg(proceso.pid, signal.SIGTERM)
+        proceso.wait(timeout=30)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        os.killpg(proceso.pid, signal.SIGKILL)
+
+
+class Command(BaseCommand):
+    help = 'Compara con clientes concurrentes runserver y el servidor de producción (gunicorn)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=50)
+        parser.add_argument('--peticiones', type=int, default=20, help='Peticiones por cliente')
+        parser.add_argument('--workers', type=int, default=None, help='Workers de gunicorn (por defecto según CPUs)')
+        parser.add_argument('--ruta', action='append', dest='rutas', help='Ruta relativa a /api/ (repetible)')
+        parser.add_argument('--salida', default=None, help='Archivo donde guardar el JSON')
+
+    def handle(self, *args, **options):
+        if options['clientes'] < 1 or options['peticiones'] < 1:
+            raise CommandError('--clientes y --peticiones deben ser mayores que 0')
+        rutas = [f'/api/{ruta}' for ruta in (options['rutas'] or RUTAS_POR_DEFECTO)]
+
+        resultados = {}
+        for nombre, lanzar in (('runserver', self.lanzar_runserver), ('produccion', self.lanzar_produccion)):
+            puerto = puerto_libre()
+            proceso = lanzar(puerto, options)
+            url_base = f'http://127.0.0.1:{puerto}'
+            try:
+                esperar_servidor(url_base + '/api/', proceso)
+                # Calentamiento: una pasada secuencial por cada ruta
+                ejecutar_clientes(url_base, rutas, 1, len(rutas))
+                resultados[nombre] = ejecutar_clientes(url_base, rutas, options['clientes'], options['peticiones'])
+            finally:
+                detener(proceso)
+            self.stderr.write(
+                f"{nombre}: {resultados[nombre]['throughput_rps']} req/s, "
+                f"p95={resultados[nombre].get('p95_ms')} ms, errores={resultados[nombre]['errores']}"
+            )
+
+        informe = {
+            'meta': {
+                'fecha': timezone.now().isoformat(),
+                'clientes': options['clientes'],
+                'peticiones_por_cliente': options['peticiones'],
+                'rutas': rutas,
+                'cpus': os.cpu_count(),
+                'workers_produccion': options['workers'] or 'según CPUs',
+            },
+            'escenarios': resultados,
+            'aceleracion_throughput': round(
+                resultados['produccion']['throughput_rps'] / resultados['runserver']['throughput_rps'], 2
+            ) if resultados['runserver']['throughput_rps'] else None,
+        }
+        salida = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(salida)
+        self.stdout.write(salida)
+
+    def lanzar_runserver(self, puerto, options):
+        return subprocess.Popen(
+            [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{puerto}'],
+            cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    def lanzar_produccion(self, puerto, options):
+        entorno = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'proyectoaulico.settings_produccion',
+            'GUNICORN_BIND': f'127.0.0.1:{puerto}',
+        }
+        # Una clave efímera basta para medir; en producción se define en el entorno
+        entorno.setdefault('SECRET_KEY', secrets.token_urlsafe(50))
+        if options['workers']:
+            entorno['GUNICORN_WORKERS'] = str(options['workers'])
+        return subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+            cwd=settings.BASE_DIR, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
@@ -0,0 +1,149 @@
+"""
+Prueba de carga del flujo de eventos: mantiene N suscriptores SSE inactivos
+contra un servidor ASGI ya en ejecución, mide la memoria del servidor por
+suscriptor y la latencia de reparto de un cambio a todos ellos.
+
+El cambio se hace con la API del mismo servidor. La latencia incluye la
+lectura de EventoCambio (hasta EVENTOS['SONDEO'] si la escritura la atiende
+otro proceso). Con --pid se lee la memoria residente del servidor desde /proc
+(Linux): con un solo worker es la de todos los suscriptores.
+
+Uso:
+    ./run_asgi.sh 8001 1 &
+    python manage.py benchmark_sse --suscriptores 1000 --url http://127.0.0.1:8001 --pid <pid de uvicorn>
+"""
+import asyncio
+import json
+import resource
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ._medicion import resumir_tiempos
+
+
+def memoria_residente_kb(pid):
+    """VmRSS del proceso en KB (None si no se puede leer)"""
+    try:
+        with open(f'/proc/{pid}/status', encoding='utf-8') as archivo:
+            for linea in archivo:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def ampliar_limite_archivos(necesarios):
+    """Sube el límite blando de descriptores abiertos hasta el duro si hace falta"""
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if blando < necesarios:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(necesarios, duro), duro))
+
+
+async def suscriptor(host, puerto, ruta, conectados, llegadas, marcador):
+    """Abre el flujo, espera el primer evento con `marcador` y anota cuándo llegó"""
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        escritor.write(
+            f'GET {ruta} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n'.encode()
+        )
+        await escritor.drain()
+        estado = await lector.readline()
+        if b' 200 ' not in estado:
+            raise ConnectionError(estado.decode(errors='replace').strip())
+        while (await lector.readline()) not in (b'\r\n', b''):
+            pass
+        conectados.append(time.perf_counter())
+        while True:
+            linea = await lector.readline()
+            if not linea:
+                raise ConnectionError('El servidor cerró el flujo')
+            if linea.startswith(b'data:') and marcador in linea:
+                llegadas.append(time.perf_counter())
+                return
+    finally:
+        escritor.close()
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga del flujo SSE /api/eventos/ con N suscriptores inactivos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8001', help='URL del servidor ASGI')
+        parser.add_argument('--suscriptores', type=int, default=1000)
+        parser.add_argument('--pid', type=int, default=None, help='PID del servidor para medir su memoria')
+        parser.add_argument('--espera', type=float, default=2.0,
+                            help='Segundos inactivos antes de publicar el cambio')
+
+    def handle(self, *args, **options):
+        if options['suscriptores'] < 1:
+            raise CommandError('--suscriptores debe ser mayor que 0')
+        ampliar_limite_archivos(options['suscriptores'] + 100)
+        resultado = asyncio.run(self.ejecutar(options))
+        self.stdout.write(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+    async def ejecutar(self, options):
+        import requests
+
+        url = urlsplit(options['url'])
+        host, puerto = url.hostname, url.port or 80
+        cantidad, pid = options['suscriptores'], options['pid']
+        memoria_inicial = memoria_residente_kb(pid) if pid else None
+
+        conectados, llegadas = [], []
+        inicio = time.perf_counter()
+        tareas = [
+            asyncio.ensure_future(suscriptor(
+                host, puerto, '/api/eventos/?modelos=metafinanciera', conectados, llegadas, b'"creado"'
+            ))
+            for _ in range(cantidad)
+        ]
+        # Espera a que cada suscriptor esté conectado o haya fallado
+        while len(conectados) + sum(t.done() for t in tareas) < cantidad:
+            if time.perf_counter() - inicio > 60:
+                raise CommandError(f'Solo {len(conectados)} suscriptores conectados en 60s')
+            await asyncio.sleep(0.05)
+        tiempo_conexion = time.perf_counter() - inicio
+        errores = [t.exception() for t in tareas if t.done() and t.exception()]
+        await asyncio.sleep(options['espera'])
+        memoria_final = memoria_residente_kb(pid) if pid else None
+
+        # Un cambio real a través de la API del mismo proceso
+        base = f"{url.scheme}://{url.netloc}/api/metas/"
+        datos = {
+            'titulo': 'benchmark_sse', 'monto_objetivo': 1000,
+            'fecha_objetivo': str(timezone.localdate() + timedelta(days=30)),
+        }
+        publicado = time.perf_counter()
+        respuesta = await asyncio.to_thread(requests.post, base, json=datos, timeout=30)
+        if respuesta.status_code != 201:
+            raise CommandError(f'No se pudo crear la meta de prueba: {respuesta.status_code} {respuesta.text}')
+        esperando = [t for t in tareas if not t.done()]
+        if esperando:
+            await asyncio.wait(esperando, timeout=30)
+        await asyncio.to_thread(requests.delete, f"{base}{respuesta.json()['id']}/", timeout=30)
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+
+        conectados_ok = len(conectados)
+        resumen = {
+            'suscriptores': cantidad,
+            'conectados': conectados_ok,
+            'errores_conexion': len(errores),
+            'primer_error': repr(errores[0]) if errores else None,
+            'tiempo_conexion_s': round(tiempo_conexion, 3),
+            'eventos_recibidos': len(llegadas),
+            'reparto_ms': resumir_tiempos([(t - publicado) * 1000 for t in llegadas]) if llegadas else None,
+        }
+        if memoria_inicial is not None and memoria_final is not None:
+            resumen.update({
+                'memoria_servidor_inicial_kb': memoria_inicial,
+                'memoria_servidor_final_kb': memoria_final,
+                'memoria_por_suscriptor_kb': round((memoria_final - memoria_inicial) / max(1, conectados_ok), 2),
+            })
+        return resumen
@@ -0,0 +1,100 @@
+"""
+Compara los backends de datos de la aplicación Streamlit (HTTP vs embebido)
+midiendo las llamadas que hacen las páginas Dashboard, Transacciones y
+Análisis (esta última con una petición por sección y con /api/batch/).
+
+Uso:
+    python manage.py runserver            # en otra terminal, para el backend HTTP
+    python manage.py benchmark_streamlit --iteraciones 50
+"""
+import json
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cliente_api import BACKENDS_DISPONIBLES, ErrorAPI, crear_cliente
+
+from ._medicion import resumir_tiempos
+
+
+def pagina_dashboard(cliente):
+    """Llamadas realizadas por paginas.dashboard.mostrar()"""
+    cliente.get("analisis/dashboard")
+
+
+def pagina_transacciones(cliente):
+    """Llamadas realizadas por paginas.transacciones.mostrar()"""
+    cliente.get("categorias")
+    cliente.get_dataframe("transacciones")
+
+
+def pagina_analisis(cliente):
+    """Llamadas de paginas.analisis.mostrar() antes de agruparlas: una petición por sección"""
+    hoy = date.today()
+    cliente.get("transacciones/resumen_mensual", {'mes': hoy.month, 'año': hoy.year})
+    cliente.get("transacciones/tendencias", {'meses': 6})
+    cliente.get("analisis/mapa_calor", {'eje': 'dia_semana'})
+
+
+def pagina_analisis_lote(cliente):
+    """Llamadas de paginas.analisis.mostrar(): las tres secciones en un solo viaje"""
+    hoy = date.today()
+    resultados = cliente.batch({
+        'resumen': ("transacciones/resumen_mensual", {'mes': hoy.month, 'año': hoy.year}),
+        'tendencias': ("transacciones/tendencias", {'meses': 6}),
+        'mapa_calor': ("analisis/mapa_calor", {'eje': 'dia_semana'}),
+    })
+    for resultado in resultados.values():
+        if isinstance(resultado, ErrorAPI):
+            raise resultado
+
+
+PAGINAS = {
+    'dashboard': pagina_dashboard,
+    'transacciones': pagina_transacciones,
+    'analisis': pagina_analisis,
+    'analisis_lote': pagina_analisis_lote,
+}
+
+
+class Command(BaseCommand):
+    help = 'Compara el tiempo de las páginas de la aplicación Streamlit con los backends HTTP y embebido'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iteraciones', type=int, default=30)
+        parser.add_argument('--calentamiento', type=int, default=3)
+        parser.add_argument(
+            '--backends', nargs='+', default=list(BACKENDS_DISPONIBLES),
+            choices=BACKENDS_DISPONIBLES
+        )
+
+    def handle(self, *args, **options):
+        if options['iteraciones'] < 1:
+            raise CommandError('--iteraciones debe ser mayor que 0')
+
+        resultados = {}
+        for backend in options['backends']:
+            cliente = crear_cliente(backend)
+            resultados[backend] = {}
+            for nombre, pagina in PAGINAS.items():
+                try:
+                    resultados[backend][nombre] = self.medir(
+                        cliente, pagina, options['iteraciones'], options['calentamiento']
+                    )
+                except ErrorAPI as e:
+                    resultados[backend][nombre] = {'error': str(e)}
+
+        self.stdout.write(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+    def medir(self, cliente, pagina, iteraciones, calentamiento):
+        for _ in range(calentamiento):
+            pagina(cliente)
+
+        tiempos = []
+        for _ in range(iteraciones):
+            inicio = time.perf_counter()
+            pagina(cliente)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        return resumir_tiempos(tiempos)
@@ -0,0 +1,29 @@
+"""
+Reevalúa todos los presupuestos de un mes con una única consulta agrupada.
+
+Uso:
+    python manage.py evaluar_presupuestos --mes 5 --año 2025
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tareas.alertas import reevaluar_mes
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el gasto registrado de los presupuestos de un mes y registra las alertas de umbral'
+
+    def add_arguments(self, parser):
+        ahora = timezone.now()
+        parser.add_argument('--mes', type=int, default=ahora.month)
+        parser.add_argument('--año', '--anio', dest='año', type=int, default=ahora.year)
+
+    def handle(self, *args, **options):
+        mes, año = options['mes'], options['año']
+        if not 1 <= mes <= 12:
+            raise CommandError('--mes debe estar entre 1 y 12')
+
+        evaluados, alertas = reevaluar_mes(año, mes)
+        self.stdout.write(self.style.SUCCESS(
+            f'{evaluados} presupuestos evaluados para {mes}/{año}, {len(alertas)} alertas nuevas'
+        ))
@@ -0,0 +1,250 @@
+"""
+Genera datos sintéticos realistas para pruebas de volumen.
+
+Los datos dependen solo de --seed y --hasta, por lo que dos ejecuciones con
+los mismos parámetros producen el mismo contenido. Las transacciones se
+insertan por lotes con executemany, lo que permite llegar a 10M de filas.
+
+Uso:
+    python manage.py generar_datos --transacciones 1000000 --meses 36 --seed 7 --limpiar
+"""
+import itertools
+import random
+import time
+from datetime import date, datetime, time as hora, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils import timezone
+
+from tareas.alertas import reevaluar_mes
+from tareas.archivo import eliminar_archivos
+from tareas.jerarquia import reconstruir
+from tareas.sincronizacion import registrar_reinicio
+from tareas.models import (
+    AlertaPresupuesto, Categoria, CategoriaAncestro, Etiqueta, LeccionEducativa, MetaFinanciera,
+    Presupuesto, Transaccion, TransaccionEtiqueta, TransaccionRecurrente
+)
+
+MAX_TRANSACCIONES = 10_000_000
+
+# Orden de borrado respetando las claves foráneas
+MODELOS_A_LIMPIAR = [
+    AlertaPresupuesto, TransaccionEtiqueta, Transaccion, TransaccionRecurrente, Presupuesto, MetaFinanciera,
+    LeccionEducativa, Etiqueta, CategoriaAncestro, Categoria
+]
+
+# (nombre, tipo, icono, color, monto mínimo, monto máximo, peso relativo, descripciones)
+CATEGORIAS = [
+    ('Salario', 'ingreso', '💼', '#2ecc71', 2_800_000, 9_000_000, 2, ['Sueldo mensual', 'Aguinaldo', 'Horas extra']),
+    ('Trabajos Freelance', 'ingreso', '💻', '#27ae60', 300_000, 3_000_000, 1, ['Proyecto web', 'Consultoría', 'Diseño gráfico']),
+    ('Ventas', 'ingreso', '🛍️', '#16a085', 50_000, 1_500_000, 1, ['Venta de ropa usada', 'Venta online', 'Feria']),
+    ('Alimentación', 'gasto', '🍔', '#e74c3c', 15_000, 450_000, 10, ['Supermercado', 'Almuerzo', 'Despensa', 'Chipa y cocido']),
+    ('Transporte', 'gasto', '🚌', '#3498db', 2_300, 150_000, 8, ['Pasaje de colectivo', 'Bolt', 'Combustible']),
+    ('Vivienda', 'gasto', '🏠', '#8e44ad', 800_000, 3_500_000, 1, ['Alquiler', 'Expensas']),
+    ('Servicios', 'gasto', '💡', '#f1c40f', 60_000, 600_000, 2, ['ANDE', 'ESSAP', 'Internet', 'Plan de celular']),
+    ('Salud', 'gasto', '🏥', '#1abc9c', 30_000, 900_000, 1, ['Farmacia', 'Consulta médica', 'Seguro médico']),
+    ('Educación', 'gasto', '📚', '#f39c12', 50_000, 1_800_000, 1, ['Cuota universidad', 'Libros', 'Curso online']),
+    ('Entretenimiento', 'gasto', '🎮', '#9b59b6', 20_000, 400_000, 3, ['Cine', 'Streaming', 'Salida con amigos']),
+    ('Ropa', 'gasto', '👕', '#d35400', 50_000, 700_000, 1, ['Ropa', 'Calzados']),
+]
+
+NIVELES = ['basico', 'intermedio', 'avanzado']
+TEMAS_LECCIONES = [
+    'Cómo armar tu primer presupuesto', 'El fondo de emergencia', 'Ahorro programado',
+    'Tarjetas de crédito sin sorpresas', 'Intereses simples y compuestos', 'Inflación y poder de compra',
+    'Cuentas de ahorro en guaraníes', 'Metas financieras SMART', 'Deudas buenas y malas',
+    'Introducción a la inversión', 'CDA y plazo fijo', 'Impuestos para trabajadores independientes',
+]
+
+
+def primer_dia_meses_atras(hasta, meses):
+    """Primer día del mes situado `meses - 1` meses antes de `hasta`"""
+    indice = hasta.year * 12 + (hasta.month - 1) - (meses - 1)
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def iterar_meses(desde, hasta):
+    """Itera (año, mes) desde la fecha `desde` hasta `hasta` inclusive"""
+    año, mes = desde.year, desde.month
+    while (año, mes) <= (hasta.year, hasta.month):
+        yield año, mes
+        año, mes = (año + 1, 1) if mes == 12 else (año, mes + 1)
+
+
+def redondear_guaranies(monto):
+    """Redondea a múltiplos de 100 ₲ como en precios reales"""
+    return int(round(monto / 100.0)) * 100
+
+
+class Command(BaseCommand):
+    help = 'Genera categorías, transacciones, presupuestos, metas y lecciones sintéticas a escala configurable'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transacciones', type=int, default=10_000)
+        parser.add_argument('--meses', type=int, default=24, help='Meses de historia a cubrir')
+        parser.add_argument('--metas', type=int, default=20)
+        parser.add_argument('--lecciones', type=int, default=len(TEMAS_LECCIONES))
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--hasta', type=date.fromisoformat, default=None,
+                            help='Última fecha generada (AAAA-MM-DD), por defecto hoy')
+        parser.add_argument('--lote', type=int, default=20_000, help='Filas por inserción')
+        parser.add_argument('--limpiar', action='store_true', help='Elimina los datos existentes antes de generar')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['transacciones'] <= MAX_TRANSACCIONES:
+            raise CommandError(f'--transacciones debe estar entre 0 y {MAX_TRANSACCIONES:,}')
+        if options['meses'] < 1:
+            raise CommandError('--meses debe ser mayor que 0')
+
+        rng = random.Random(options['seed'])
+        hasta = options['hasta'] or timezone.localdate()
+        desde = primer_dia_meses_atras(hasta, options['meses'])
+        inicio = time.perf_counter()
+
+        if options['limpiar']:
+            self.limpiar()
+
+        categorias = self.crear_categorias()
+        self.crear_lecciones(rng, options['lecciones'])
+        self.crear_metas(rng, options['metas'], hasta)
+        self.crear_transacciones(rng, categorias, options['transacciones'], desde, hasta, options['lote'])
+        self.crear_presupuestos(rng, categorias, options['transacciones'], desde, hasta)
+        # Las altas masivas no pasan por el registro de cambios: los clientes deben recargar todo
+        registrar_reinicio()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Datos generados en {time.perf_counter() - inicio:.1f}s '
+            f'({options["transacciones"]:,} transacciones entre {desde} y {hasta})'
+        ))
+
+    def limpiar(self):
+        eliminar_archivos()
+        # DELETE directo: evita cargar millones de filas para las señales de borrado
+        with transaction.atomic(), connection.cursor() as cursor:
+            for modelo in MODELOS_A_LIMPIAR:
+                cursor.execute('DELETE FROM ' + connection.ops.quote_name(modelo._meta.db_table))
+
+    def crear_categorias(self):
+        existentes = {(c.nombre, c.tipo): c for c in Categoria.objects.all()}
+        nuevas = [
+            Categoria(nombre=nombre, tipo=tipo, icono=icono, color=color)
+            for nombre, tipo, icono, color, *_ in CATEGORIAS
+            if (nombre, tipo) not in existentes
+        ]
+        Categoria.objects.bulk_create(nuevas)
+        # bulk_create no emite señales: la tabla de clausura se regenera completa
+        reconstruir()
+        por_clave = {(c.nombre, c.tipo): c for c in Categoria.objects.all()}
+        return [
+            (por_clave[(nombre, tipo)], minimo, maximo, peso, descripciones)
+            for nombre, tipo, _, _, minimo, maximo, peso, descripciones in CATEGORIAS
+        ]
+
+    def crear_lecciones(self, rng, cantidad):
+        LeccionEducativa.objects.bulk_create([
+            LeccionEducativa(
+                titulo=TEMAS_LECCIONES[i % len(TEMAS_LECCIONES)] + (f' ({i // len(TEMAS_LECCIONES) + 1})' if i >= len(TEMAS_LECCIONES) else ''),
+                contenido=f'Contenido de la lección {i + 1} sobre finanzas personales.',
+                nivel=NIVELES[min(i * len(NIVELES) // max(cantidad, 1), len(NIVELES) - 1)],
+                duracion_minutos=rng.choice([5, 10, 15, 20]),
+                orden=i + 1,
+            )
+            for i in range(cantidad)
+        ])
+
+    def crear_metas(self, rng, cantidad, hasta):
+        metas = []
+        for i in range(cantidad):
+            objetivo = rng.choice([1, 2, 5, 10, 20, 50]) * 1_000_000
+            avance = redondear_guaranies(objetivo * rng.random())
+            metas.append(MetaFinanciera(
+                titulo=rng.choice(['Fondo de emergencia', 'Viaje', 'Notebook', 'Moto', 'Matrícula', 'Ahorro']) + f' #{i + 1}',
+                monto_objetivo=objetivo,
+                monto_actual=avance,
+                fecha_objetivo=hasta + timedelta(days=rng.randint(30, 900)),
+                estado=rng.choices(['en_progreso', 'completada', 'cancelada'], weights=[8, 1, 1])[0],
+            ))
+        MetaFinanciera.objects.bulk_create(metas)
+
+    def crear_transacciones(self, rng, categorias, cantidad, desde, hasta, lote):
+        if not cantidad:
+            return
+
+        # Se usa la conexión real (no el proxy por hilo) para no pagar su resolución en cada fila
+        conexion = connections[DEFAULT_DB_ALIAS]
+        columnas = ['descripcion', 'monto', 'tipo', 'categoria', 'fecha', 'notas',
+                    'fecha_creacion', 'fecha_actualizacion']
+        campos = {nombre: Transaccion._meta.get_field(nombre) for nombre in columnas}
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            conexion.ops.quote_name(Transaccion._meta.db_table),
+            ', '.join(conexion.ops.quote_name(campos[c].column) for c in columnas),
+            ', '.join(['%s'] * len(columnas)),
+        )
+
+        # Valores ya adaptados a la base de datos por día y hora, calculados una sola vez
+        tz = timezone.get_current_timezone()
+        fechas = [desde + timedelta(days=d) for d in range((hasta - desde).days + 1)]
+        fechas_db = [campos['fecha'].get_db_prep_value(f, conexion) for f in fechas]
+        horas = range(7, 23)
+        creadas_db = [
+            [campos['fecha_creacion'].get_db_prep_value(datetime.combine(f, hora(h), tzinfo=tz), conexion)
+             for h in horas]
+            for f in fechas
+        ]
+        campo_monto = campos['monto']
+        pesos_acumulados = list(itertools.accumulate(peso for _, _, _, peso, _ in categorias))
+
+        insertadas = 0
+        while insertadas < cantidad:
+            tamaño = min(lote, cantidad - insertadas)
+            elegidas = rng.choices(categorias, cum_weights=pesos_acumulados, k=tamaño)
+            filas = []
+            for categoria, minimo, maximo, _, descripciones in elegidas:
+                dia = rng.randrange(len(fechas))
+                creada = creadas_db[dia][rng.randrange(len(horas))]
+                # Distribución sesgada hacia montos bajos, como los gastos cotidianos
+                monto = redondear_guaranies(minimo + (maximo - minimo) * rng.random() ** 2)
+                filas.append((
+                    rng.choice(descripciones),
+                    campo_monto.get_db_prep_save(monto, conexion),
+                    categoria.tipo,
+                    categoria.id,
+                    fechas_db[dia],
+                    '',
+                    creada,
+                    creada,
+                ))
+            with transaction.atomic(), conexion.cursor() as cursor:
+                cursor.executemany(sql, filas)
+            insertadas += tamaño
+            self.stdout.write(f'  {insertadas:,}/{cantidad:,} transacciones', ending='\r')
+        self.stdout.write('')
+
+    def crear_presupuestos(self, rng, categorias, transacciones, desde, hasta):
+        meses = list(iterar_meses(desde, hasta))
+        total_pesos = sum(peso for _, _, _, peso, _ in categorias)
+        por_mes = transacciones / len(meses)
+
+        existentes = set(Presupuesto.objects.values_list('categoria_id', 'año', 'mes'))
+        presupuestos = []
+        for categoria, minimo, maximo, peso, _ in categorias:
+            if categoria.tipo != 'gasto':
+                continue
+            # Gasto mensual esperado: cantidad esperada por el monto medio de la distribución
+            esperado = por_mes * peso / total_pesos * (minimo + (maximo - minimo) / 3)
+            for año, mes in meses:
+                if (categoria.id, año, mes) in existentes:
+                    continue
+                presupuestos.append(Presupuesto(
+                    nombre=f'{categoria.nombre} {mes:02d}/{año}',
+                    categoria=categoria,
+                    monto_limite=max(redondear_guaranies(esperado * rng.uniform(0.8, 1.3)), 100_000),
+                    mes=mes,
+                    año=año,
+                ))
+        Presupuesto.objects.bulk_create(presupuestos, batch_size=500)
+
+        # bulk_create no dispara señales: se calcula el gasto de cada mes con una consulta agrupada
+        for año, mes in meses:
+            reevaluar_mes(año, mes)
@@ -0,0 +1,39 @@
+"""
+Genera las transacciones pendientes de las transacciones recurrentes.
+
+Es idempotente: puede ejecutarse a diario (cron o Programador de tareas) y
+solo crea las ocurrencias que todavía no existen.
+
+Uso:
+    python manage.py materializar_recurrencias
+    python manage.py materializar_recurrencias --hasta 2026-12-31 --ids 3 7
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from tareas.recurrencias import materializar
+
+
+class Command(BaseCommand):
+    help = 'Genera las transacciones de las recurrencias activas hasta una fecha (hoy por defecto)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hasta', default=None, help='Fecha límite AAAA-MM-DD')
+        parser.add_argument('--ids', type=int, nargs='+', default=None, help='Solo estas recurrencias')
+
+    def handle(self, *args, **options):
+        hasta = None
+        if options['hasta']:
+            hasta = parse_date(options['hasta'])
+            if hasta is None:
+                raise CommandError('--hasta debe ser una fecha AAAA-MM-DD')
+
+        inicio = time.perf_counter()
+        resumen = materializar(hasta, options['ids'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['transacciones']:,} transacciones generadas de {resumen['recurrencias']:,} "
+            f"recurrencias en {time.perf_counter() - inicio:.2f}s "
+            f"({resumen['meses_reevaluados']} meses de presupuestos reevaluados)"
+        ))
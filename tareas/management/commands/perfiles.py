@@ -0,0 +1,100 @@
+"""
+Lista y compara los perfiles guardados por PerfiladoMiddleware.
+
+Uso:
+    python manage.py perfiles listar
+    python manage.py perfiles diff <perfil_a> <perfil_b> --top 20
+"""
+import json
+import pstats
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tareas.middleware import configuracion_perfilado
+
+
+def leer_metadatos(ruta_txt):
+    """Lee la primera línea JSON del resumen de un perfil"""
+    try:
+        with open(ruta_txt, encoding='utf-8') as archivo:
+            return json.loads(archivo.readline())
+    except (OSError, ValueError):
+        return {}
+
+
+def tiempos_por_funcion(ruta_prof):
+    """Devuelve {función: (llamadas, tiempo propio, tiempo acumulado)} de un .prof"""
+    estadisticas = pstats.Stats(str(ruta_prof)).strip_dirs()
+    tiempos = {}
+    for (archivo, linea, nombre), (_, llamadas, propio, acumulado, _) in estadisticas.stats.items():
+        tiempos[f'{archivo}:{linea}({nombre})'] = (llamadas, propio, acumulado)
+    return tiempos
+
+
+class Command(BaseCommand):
+    help = 'Lista o compara los perfiles de cProfile guardados en PERFILADO["DIRECTORIO"]'
+
+    def add_arguments(self, parser):
+        subcomandos = parser.add_subparsers(dest='subcomando', required=True)
+        subcomandos.add_parser('listar', help='Lista los perfiles guardados')
+        diff = subcomandos.add_parser('diff', help='Compara el tiempo por función de dos perfiles')
+        diff.add_argument('perfil_a')
+        diff.add_argument('perfil_b')
+        diff.add_argument('--top', type=int, default=25)
+        diff.add_argument('--orden', choices=['acumulado', 'propio'], default='acumulado')
+
+    def handle(self, *args, **options):
+        self.directorio = Path(configuracion_perfilado()['DIRECTORIO'])
+        if options['subcomando'] == 'listar':
+            self.listar()
+        else:
+            self.diff(options['perfil_a'], options['perfil_b'], options['top'], options['orden'])
+
+    def resolver(self, nombre):
+        """Acepta una ruta a un .prof o el nombre de un perfil del directorio"""
+        ruta = Path(nombre)
+        candidatos = [ruta, ruta.with_suffix('.prof'), self.directorio / ruta.name,
+                      (self.directorio / ruta.name).with_suffix('.prof')]
+        for candidato in candidatos:
+            if candidato.suffix == '.prof' and candidato.is_file():
+                return candidato
+        raise CommandError(f'No se encontró el perfil "{nombre}" en {self.directorio}')
+
+    def listar(self):
+        perfiles = sorted(self.directorio.glob('*.prof')) if self.directorio.is_dir() else []
+        if not perfiles:
+            self.stdout.write(f'No hay perfiles en {self.directorio}')
+            return
+
+        for ruta in perfiles:
+            datos = leer_metadatos(ruta.with_suffix('.txt'))
+            self.stdout.write(
+                f"{ruta.stem}  {datos.get('metodo', '?'):6} {datos.get('estado', '?')} "
+                f"{datos.get('duracion_ms', 0):>10.1f} ms  {datos.get('motivo', '?'):10} {datos.get('ruta', '')}"
+            )
+
+    def diff(self, nombre_a, nombre_b, top, orden):
+        ruta_a, ruta_b = self.resolver(nombre_a), self.resolver(nombre_b)
+        tiempos_a, tiempos_b = tiempos_por_funcion(ruta_a), tiempos_por_funcion(ruta_b)
+        indice = 2 if orden == 'acumulado' else 1
+
+        filas = []
+        for funcion in tiempos_a.keys() | tiempos_b.keys():
+            llamadas_a, *valores_a = tiempos_a.get(funcion, (0, 0.0, 0.0))
+            llamadas_b, *valores_b = tiempos_b.get(funcion, (0, 0.0, 0.0))
+            antes, despues = valores_a[indice - 1], valores_b[indice - 1]
+            filas.append((despues - antes, antes, despues, llamadas_a, llamadas_b, funcion))
+        filas.sort(key=lambda fila: abs(fila[0]), reverse=True)
+
+        total_a = leer_metadatos(ruta_a.with_suffix('.txt')).get('duracion_ms')
+        total_b = leer_metadatos(ruta_b.with_suffix('.txt')).get('duracion_ms')
+        self.stdout.write(f'A: {ruta_a.stem} ({total_a} ms)')
+        self.stdout.write(f'B: {ruta_b.stem} ({total_b} ms)')
+        self.stdout.write(f'Tiempo {orden} por función (ms), ordenado por diferencia absoluta:\n')
+        self.stdout.write(f"{'diferencia':>11} {'A':>10} {'B':>10} {'llamadas A':>11} {'llamadas B':>11}  función")
+        for diferencia, antes, despues, llamadas_a, llamadas_b, funcion in filas[:top]:
+            self.stdout.write(
+                f'{diferencia * 1000:>+11.2f} {antes * 1000:>10.2f} {despues * 1000:>10.2f} '
+                f'{llamadas_a:>11} {llamadas_b:>11}  {funcion}'
+            )
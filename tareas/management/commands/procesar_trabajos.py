@@ -0,0 +1,92 @@
+"""
+Ejecuta los trabajos en segundo plano de la tabla Trabajo.
+
+Lanza un grupo de procesos que reclaman trabajos de forma atómica (por
+prioridad y antigüedad) y los ejecutan. Ctrl+C o SIGTERM detiene los
+procesos al terminar su trabajo actual.
+
+Uso:
+    python manage.py procesar_trabajos --procesos 4
+    python manage.py procesar_trabajos --una-vez          # vacía la cola y termina
+    python manage.py procesar_trabajos --tipo importar_transacciones
+"""
+import multiprocessing
+import signal
+import time
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+
+def bucle_trabajador(detener, tipos, una_vez, intervalo):
+    """Reclama y ejecuta trabajos hasta que se pida detenerse (o se vacíe la cola con una_vez)"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if not apps.ready:
+        # Con el método de arranque spawn (Windows) el proceso hijo parte de cero
+        django.setup()
+    from tareas import trabajos
+
+    trabajador = trabajos.nombre_trabajador()
+    ultima_recuperacion = 0.0
+    while not detener.is_set():
+        close_old_connections()
+        if time.monotonic() - ultima_recuperacion > 60:
+            trabajos.recuperar_abandonados()
+            ultima_recuperacion = time.monotonic()
+
+        trabajo = trabajos.reclamar(trabajador, tipos)
+        if trabajo is None:
+            if una_vez:
+                break
+            detener.wait(intervalo)
+            continue
+        trabajos.ejecutar(trabajo)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de trabajos en segundo plano con un grupo de procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=None, help='Procesos trabajadores (TRABAJOS["PROCESOS"])')
+        parser.add_argument('--tipo', action='append', dest='tipos', help='Solo procesa este tipo (repetible)')
+        parser.add_argument('--una-vez', action='store_true', help='Termina cuando no queden trabajos disponibles')
+        parser.add_argument('--intervalo', type=float, default=None, help='Segundos entre sondeos de la cola')
+
+    def handle(self, *args, **options):
+        from tareas import trabajos
+
+        configuracion = trabajos.configuracion_trabajos()
+        procesos = options['procesos'] or configuracion['PROCESOS']
+        intervalo = options['intervalo'] or configuracion['INTERVALO_SONDEO']
+        if procesos < 1:
+            raise CommandError('--procesos debe ser mayor que 0')
+        desconocidos = set(options['tipos'] or []) - set(trabajos.REGISTRO)
+        if desconocidos:
+            raise CommandError(f'Tipos desconocidos: {", ".join(sorted(desconocidos))}')
+
+        detener = multiprocessing.Event()
+        argumentos = (detener, options['tipos'], options['una_vez'], intervalo)
+
+        def solicitar_detencion(*_):
+            self.stderr.write('Deteniendo al terminar los trabajos en curso...')
+            detener.set()
+
+        signal.signal(signal.SIGTERM, solicitar_detencion)
+        signal.signal(signal.SIGINT, solicitar_detencion)
+
+        # Las conexiones abiertas no deben heredarse en los procesos hijos
+        connections.close_all()
+        hijos = [
+            multiprocessing.Process(target=bucle_trabajador, args=argumentos, name=f'trabajador-{i}')
+            for i in range(procesos)
+        ]
+        for hijo in hijos:
+            hijo.start()
+        self.stdout.write(f'{procesos} procesos trabajadores en ejecución (tipos: {", ".join(sorted(trabajos.REGISTRO))})')
+
+        for hijo in hijos:
+            hijo.join()
+        self.stdout.write('Trabajadores detenidos')
@@ -0,0 +1,37 @@
+"""
+Borra los registros de cambios más antiguos que la retención configurada.
+
+Los clientes con un token anterior a lo conservado reciben `reinicio` en
+/api/sync/ y recargan las colecciones completas. Siempre se conserva el
+último registro, que marca hasta dónde llega la secuencia.
+
+Uso:
+    python manage.py purgar_cambios
+    python manage.py purgar_cambios --dias 30
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tareas.models import RegistroCambio
+from tareas.sincronizacion import configuracion_sincronizacion, token_actual
+
+
+class Command(BaseCommand):
+    help = 'Borra los registros de cambios de /api/sync/ más antiguos que la retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None,
+                            help='Días a conservar (SINCRONIZACION["DIAS_RETENCION"] por defecto)')
+
+    def handle(self, *args, **options):
+        dias = options['dias'] if options['dias'] is not None else configuracion_sincronizacion()['DIAS_RETENCION']
+        if dias < 0:
+            raise CommandError('--dias no puede ser negativo')
+
+        limite = timezone.now() - timedelta(days=dias)
+        borrados, _ = RegistroCambio.objects.filter(fecha__lt=limite, pk__lt=token_actual()).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'{borrados:,} registros de cambios anteriores a {limite:%Y-%m-%d} eliminados'
+        ))
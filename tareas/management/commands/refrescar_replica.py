@@ -0,0 +1,87 @@
+"""
+Refresca la réplica SQLite local con una copia consistente de la base principal.
+
+Usa la API de backup de SQLite (copia consistente aunque haya escrituras en
+curso) sobre un archivo temporal y luego lo reemplaza de forma atómica, así
+las conexiones abiertas a la réplica siguen leyendo la copia anterior hasta
+cerrarse. Con --intervalo repite la copia cada N segundos.
+
+Uso:
+    DB_REPLICA=db_replica.sqlite3 python manage.py refrescar_replica
+    DB_REPLICA=db_replica.sqlite3 python manage.py refrescar_replica --intervalo 60
+"""
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from tareas.replicas import configuracion_replicas
+
+
+def ruta_sqlite(alias):
+    """Ruta del archivo de una base SQLite (admite nombres URI `file:...?mode=ro`)"""
+    base = settings.DATABASES[alias]
+    if base['ENGINE'] != 'django.db.backends.sqlite3':
+        raise CommandError(f'La base "{alias}" no es SQLite')
+    nombre = str(base['NAME'])
+    if nombre.startswith('file:'):
+        nombre = nombre[len('file:'):].split('?', 1)[0]
+    return Path(nombre)
+
+
+def copiar(origen, destino):
+    """Copia origen en destino con la API de backup y reemplaza el archivo de forma atómica"""
+    temporal = destino.with_name(destino.name + '.tmp')
+    fuente = sqlite3.connect(origen)
+    copia = sqlite3.connect(temporal)
+    try:
+        fuente.backup(copia)
+        # La copia hereda el modo WAL del primario; la réplica se reemplaza entera y sin -wal/-shm
+        copia.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        copia.close()
+        fuente.close()
+    try:
+        os.replace(temporal, destino)
+    except PermissionError:
+        # En Windows no se puede reemplazar un archivo abierto: se copia sobre la réplica
+        fuente, copia = sqlite3.connect(temporal), sqlite3.connect(destino)
+        try:
+            fuente.backup(copia)
+        finally:
+            copia.close()
+            fuente.close()
+        temporal.unlink(missing_ok=True)
+
+
+class Command(BaseCommand):
+    help = 'Copia la base SQLite principal sobre la réplica local de solo lectura'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=float, default=0,
+                            help='Segundos entre copias (0 = una sola copia)')
+
+    def handle(self, *args, **options):
+        alias = configuracion_replicas()['ALIAS']
+        if alias not in settings.DATABASES:
+            raise CommandError('No hay réplica configurada: defina la variable de entorno DB_REPLICA')
+        origen, destino = ruta_sqlite(DEFAULT_DB_ALIAS), ruta_sqlite(alias)
+        if origen.resolve() == destino.resolve():
+            raise CommandError('La réplica no puede ser el mismo archivo que la base principal')
+
+        while True:
+            inicio = time.perf_counter()
+            copiar(origen, destino)
+            self.stdout.write(
+                f'Réplica {destino} actualizada en {time.perf_counter() - inicio:.2f}s'
+            )
+            if not options['intervalo']:
+                return
+            try:
+                time.sleep(options['intervalo'])
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,243 @@
+"""
+Actualización y borrado masivos de transacciones.
+
+La selección es una lista de ids o los mismos filtros que el listado de
+transacciones (filtrar_transacciones), siempre sobre la tabla activa: los
+años archivados no se modifican. Las filas se recorren por clave primaria en
+lotes de MASIVAS['LOTE'] y cada lote es un UPDATE o DELETE por conjunto en su
+propia transacción, de modo que el bloqueo de escritura de SQLite se suelta
+entre lotes (con una PAUSA para que entren otros escritores).
+
+Hasta MAX_SINCRONO filas la operación se hace dentro de la petición; por
+encima se encola como trabajo `transacciones_masivas` (trabajos.py), que
+guarda con cada lote su punto de control (último id y meses afectados): si el
+proceso cae, el reintento continúa desde ahí y termina la reevaluación.
+
+Las sentencias directas no disparan señales: cada lote se anota en el registro
+de cambios (/api/sync/) y, al terminar, se reevalúan de una vez los
+presupuestos de cada mes afectado y se publica un evento por mes. Las cachés
+por versión de datos (anomalías, pronóstico) se invalidan solas con el registro.
+"""
+import time
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .alertas import reevaluar_mes
+from .eventos import publicar_lote
+from .filtros import filtrar_transacciones
+from .models import RegistroCambio, Transaccion, TransaccionEtiqueta
+from .sincronizacion import registrar_consulta
+
+CONFIGURACION_POR_DEFECTO = {
+    'LOTE': 2000,
+    'PAUSA': 0.01,  # segundos entre lotes
+    'MAX_SINCRONO': 20000,  # más filas: se encola como trabajo
+    'MAX_TRANSACCIONES': 1000000,  # tamaño máximo de una selección
+}
+
+# Parámetros de TransaccionViewSet admitidos como filtros de selección
+FILTROS = (
+    'tipo', 'categoria', 'subcategorias', 'etiquetas_todas', 'etiquetas_alguna', 'fecha_desde', 'fecha_hasta',
+)
+
+# Campos que se pueden asignar en masa
+CAMPOS_ACTUALIZABLES = ('categoria', 'tipo', 'descripcion', 'notas')
+
+
+def configuracion_masivas():
+    """Configuración efectiva de MASIVAS con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'MASIVAS', {})}
+
+
+class Seleccion:
+    """Transacciones de la tabla activa indicadas por ids o por filtros del listado"""
+
+    def __init__(self, ids=None, filtros=None):
+        if (ids is None) == (filtros is None):
+            raise ValueError('Debe indicar "ids" o "filtros" (uno de los dos)')
+        if ids is not None:
+            if not isinstance(ids, list) or not ids:
+                raise ValueError('"ids" debe ser una lista no vacía')
+            self.ids = sorted({int(pk) for pk in ids})
+            self.filtros = None
+            self.queryset = None
+        else:
+            if not isinstance(filtros, dict) or not filtros:
+                raise ValueError('"filtros" debe ser un objeto con al menos un filtro')
+            desconocidos = set(filtros) - set(FILTROS)
+            if desconocidos:
+                raise ValueError(f'Filtros no admitidos: {", ".join(sorted(desconocidos))}')
+            params = {
+                nombre: ','.join(str(v) for v in valor) if isinstance(valor, list) else str(valor)
+                for nombre, valor in filtros.items()
+            }
+            for nombre in ('fecha_desde', 'fecha_hasta'):
+                if params.get(nombre) and parse_date(params[nombre]) is None:
+                    raise ValueError(f'"{nombre}" debe ser una fecha AAAA-MM-DD')
+            self.ids = None
+            self.filtros = filtros
+            self.queryset = filtrar_transacciones(Transaccion.objects.all(), params)
+
+    def contar(self, tamaño):
+        """Cantidad de transacciones existentes en la selección"""
+        if self.ids is not None:
+            return sum(
+                Transaccion.objects.filter(pk__in=self.ids[i:i + tamaño]).count()
+                for i in range(0, len(self.ids), tamaño)
+            )
+        return self.queryset.count()
+
+    def lotes(self, tamaño, despues_de=0):
+        """Listas de (pk, fecha) de hasta `tamaño` filas con id mayor que `despues_de`, en orden de clave primaria"""
+        if self.ids is not None:
+            pendientes = [pk for pk in self.ids if pk > despues_de]
+            for inicio in range(0, len(pendientes), tamaño):
+                filas = list(
+                    Transaccion.objects.filter(pk__in=pendientes[inicio:inicio + tamaño])
+                    .order_by('pk').values_list('pk', 'fecha')
+                )
+                if filas:
+                    yield filas
+            return
+        ultimo = despues_de
+        while True:
+            filas = list(self.queryset.filter(pk__gt=ultimo).order_by('pk').values_list('pk', 'fecha')[:tamaño])
+            if not filas:
+                return
+            yield filas
+            ultimo = filas[-1][0]
+
+    def resumen(self, tamaño):
+        """Cantidad de transacciones por (año, mes), sin modificar nada"""
+        consultas = (
+            [Transaccion.objects.filter(pk__in=self.ids[i:i + tamaño]) for i in range(0, len(self.ids), tamaño)]
+            if self.ids is not None else [self.queryset]
+        )
+        por_mes = {}
+        for consulta in consultas:
+            for fila in (
+                consulta.annotate(año=ExtractYear('fecha'), mes=ExtractMonth('fecha'))
+                .order_by().values('año', 'mes').annotate(cantidad=Count('id'))
+            ):
+                clave = (fila['año'], fila['mes'])
+                por_mes[clave] = por_mes.get(clave, 0) + fila['cantidad']
+        return por_mes
+
+
+def validar_cambios(cambios):
+    """Valores validados con TransaccionSerializer (solo CAMPOS_ACTUALIZABLES). Lanza ValueError"""
+    from .serializers import TransaccionSerializer
+
+    if not isinstance(cambios, dict) or not cambios:
+        raise ValueError(f'"cambios" debe indicar al menos uno de: {", ".join(CAMPOS_ACTUALIZABLES)}')
+    no_admitidos = set(cambios) - set(CAMPOS_ACTUALIZABLES)
+    if no_admitidos:
+        raise ValueError(f'Campos no actualizables en masa: {", ".join(sorted(no_admitidos))}')
+    serializador = TransaccionSerializer(data=cambios, partial=True)
+    if not serializador.is_valid():
+        raise ValueError('; '.join(
+            f'{campo}: {" ".join(str(e) for e in errores)}' for campo, errores in serializador.errors.items()
+        ))
+    return {campo: serializador.validated_data[campo] for campo in cambios}
+
+
+def comprobar_limite(seleccion):
+    """Cantidad de filas seleccionadas; ValueError si supera MAX_TRANSACCIONES"""
+    configuracion = configuracion_masivas()
+    maximo = configuracion['MAX_TRANSACCIONES']
+    if seleccion.ids is not None and len(seleccion.ids) > maximo:
+        raise ValueError(f'Se admiten hasta {maximo} transacciones por operación')
+    total = seleccion.contar(configuracion['LOTE'])
+    if total > maximo:
+        raise ValueError(f'La selección tiene {total} transacciones; se admiten hasta {maximo} por operación')
+    return total
+
+
+def simular(seleccion):
+    """Cantidad de transacciones seleccionadas y su desglose por mes, sin modificar nada"""
+    por_mes = seleccion.resumen(configuracion_masivas()['LOTE'])
+    return {
+        'simulacion': True,
+        'transacciones': sum(por_mes.values()),
+        'meses': {f'{año:04d}-{mes:02d}': por_mes[(año, mes)] for año, mes in sorted(por_mes)},
+    }
+
+
+def _aplicar(seleccion, operar, contexto=None):
+    """
+    Ejecuta operar(queryset del lote) lote a lote y luego invalida de una vez
+    los meses afectados. Con `contexto` (trabajo) cada lote se confirma junto
+    con su punto de control y un reintento continúa desde el último id.
+    """
+    configuracion = configuracion_masivas()
+    punto_control = contexto.punto_control if contexto else {}
+    procesadas = punto_control.get('procesadas', 0)
+    lotes = punto_control.get('lotes', 0)
+    meses = {tuple(periodo) for periodo in punto_control.get('meses', [])}
+    total = contexto.parametros.get('total') if contexto else None
+
+    for filas in seleccion.lotes(configuracion['LOTE'], despues_de=punto_control.get('ultimo', 0)):
+        if lotes and configuracion['PAUSA']:
+            time.sleep(configuracion['PAUSA'])
+        with transaction.atomic(using=router.db_for_write(Transaccion)):
+            procesadas += operar(Transaccion.objects.filter(pk__in=[pk for pk, _ in filas]))
+            lotes += 1
+            meses.update((fecha.year, fecha.month) for _, fecha in filas)
+            if contexto:
+                contexto.reportar(
+                    procesadas * 90 // max(total or procesadas, 1), f'{procesadas} transacciones',
+                    ultimo=filas[-1][0], procesadas=procesadas, lotes=lotes, meses=sorted(meses),
+                )
+
+    for año, mes in sorted(meses):
+        reevaluar_mes(año, mes)
+    publicar_lote('transaccion', meses)
+    return {'simulacion': False, 'transacciones': procesadas, 'lotes': lotes, 'meses_reevaluados': len(meses)}
+
+
+def actualizar(seleccion, cambios, contexto=None):
+    """UPDATE por lotes de las transacciones seleccionadas con los `cambios` ya validados"""
+
+    def operar(lote):
+        # update() no aplica auto_now
+        actualizadas = lote.update(**cambios, fecha_actualizacion=timezone.now())
+        registrar_consulta(lote)
+        return actualizadas
+    return _aplicar(seleccion, operar, contexto)
+
+
+def eliminar(seleccion, contexto=None):
+    """DELETE por lotes de las transacciones seleccionadas (y de sus etiquetas)"""
+
+    def operar(lote):
+        # Sin cargar filas ni emitir señales; la única referencia a Transaccion es TransaccionEtiqueta
+        alias = router.db_for_write(Transaccion)
+        registrar_consulta(lote, RegistroCambio.ELIMINADO)
+        TransaccionEtiqueta.objects.filter(transaccion__in=lote.values('pk'))._raw_delete(alias)
+        return lote._raw_delete(alias)
+    return _aplicar(seleccion, operar, contexto)
+
+
+def parametros_trabajo(operacion, seleccion, cambios_recibidos, total):
+    """Parámetros (JSON) del trabajo transacciones_masivas"""
+    return {
+        'operacion': operacion,
+        'ids': seleccion.ids,
+        'filtros': seleccion.filtros,
+        'cambios': cambios_recibidos,
+        'total': total,
+    }
+
+
+def ejecutar_trabajo(contexto):
+    """Cuerpo del trabajo transacciones_masivas (los cambios se validan de nuevo al ejecutarse)"""
+    parametros = contexto.parametros
+    seleccion = Seleccion(parametros.get('ids'), parametros.get('filtros'))
+    if parametros['operacion'] == 'actualizar':
+        return actualizar(seleccion, validar_cambios(parametros['cambios']), contexto=contexto)
+    return eliminar(seleccion, contexto=contexto)
@@ -0,0 +1,302 @@
+"""
+Registro de métricas en formato de exposición de Prometheus.
+
+Cada proceso acumula contadores, histogramas e indicadores en memoria y los
+vuelca periódicamente a `<DIRECTORIO>/metricas_<pid>_<inicio>.json` (escritura
+atómica; el instante de arranque evita que un pid reutilizado pise el archivo
+de un proceso anterior). El endpoint /metrics combina los archivos de todos
+los procesos: contadores e histogramas se suman siempre (también los de
+procesos ya terminados, para que no retrocedan al reciclar workers) y los
+indicadores solo de procesos vivos. Los archivos de procesos terminados se
+pliegan en `metricas_muertos.json` y se borran, así el directorio no crece
+con cada reciclado. No requiere servicios externos.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SQL = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+CONFIGURACION_POR_DEFECTO = {
+    'HABILITADAS': True,
+    'DIRECTORIO': 'metricas',
+    'INTERVALO_VOLCADO': 5,
+}
+
+# nombre: (tipo, ayuda, buckets)
+DEFINICIONES = {
+    'http_peticiones_total': ('counter', 'Peticiones atendidas por vista, acción, método y estado', None),
+    'http_peticion_duracion_segundos': ('histogram', 'Latencia de las peticiones por vista y acción', BUCKETS_LATENCIA),
+    'http_peticiones_en_curso': ('gauge', 'Peticiones en curso', None),
+    'db_consulta_duracion_segundos': ('histogram', 'Duración de las consultas SQL', BUCKETS_SQL),
+    'db_consultas_por_peticion': ('histogram', 'Consultas SQL por petición', (1, 2, 5, 10, 20, 50, 100, 500)),
+    'cache_consultas_total': ('counter', 'Consultas a cachés de la aplicación por resultado', None),
+    'coalescencia_peticiones_total': ('counter', 'Peticiones idénticas coalescidas por vista y resultado', None),
+    'sse_suscriptores': ('gauge', 'Clientes conectados al flujo de eventos', None),
+    'sse_eventos_descartados_total': ('counter', 'Eventos descartados por clientes SSE lentos', None),
+}
+
+
+def configuracion_metricas():
+    """Configuración efectiva de METRICAS con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'METRICAS', {})}
+
+
+def _clave(etiquetas):
+    return json.dumps(sorted(etiquetas.items()), ensure_ascii=False) if etiquetas else '[]'
+
+
+def _inicio_proceso(pid):
+    """Instante de arranque del proceso según /proc (None si no está disponible)"""
+    try:
+        estado = Path(f'/proc/{pid}/stat').read_text()
+    except OSError:
+        return None
+    # El campo 22 (starttime) va tras el nombre del comando, que puede contener espacios
+    return estado.rsplit(')', 1)[1].split()[19]
+
+
+def _proceso_vivo(pid, inicio=None):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    # Un pid reutilizado por otro proceso no cuenta como vivo
+    actual = _inicio_proceso(pid) if inicio else None
+    return actual is None or actual == inicio
+
+
+class RegistroMetricas:
+    """Métricas del proceso actual, respaldadas por un archivo por proceso"""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self._ultimo_volcado = 0.0
+        self._pid = None
+        self._inicio = None
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.valores = {'counter': {}, 'gauge': {}, 'histogram': {}}
+
+    def _verificar_fork(self):
+        # Un proceso hijo no debe heredar (ni volver a sumar) las métricas del padre
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            # Sin /proc basta con un valor distinto en cada arranque para el nombre del archivo
+            self._inicio = _inicio_proceso(self._pid) or str(time.time_ns())
+            self._reiniciar()
+
+    def incrementar(self, nombre, etiquetas=None, valor=1):
+        with self._bloqueo:
+            self._verificar_fork()
+            serie = self.valores['counter'].setdefault(nombre, {})
+            clave = _clave(etiquetas)
+            serie[clave] = serie.get(clave, 0) + valor
+
+    def ajustar(self, nombre, delta, etiquetas=None):
+        with self._bloqueo:
+            self._verificar_fork()
+            serie = self.valores['gauge'].setdefault(nombre, {})
+            clave = _clave(etiquetas)
+            serie[clave] = serie.get(clave, 0) + delta
+
+    def observar(self, nombre, valores, etiquetas=None):
+        """Registra una o varias observaciones en un histograma"""
+        buckets = DEFINICIONES[nombre][2]
+        if not isinstance(valores, (list, tuple)):
+            valores = (valores,)
+        with self._bloqueo:
+            self._verificar_fork()
+            serie = self.valores['histogram'].setdefault(nombre, {})
+            clave = _clave(etiquetas)
+            # [conteo por bucket..., conteo +Inf, suma]
+            datos = serie.setdefault(clave, [0] * (len(buckets) + 1) + [0.0])
+            for valor in valores:
+                for i, limite in enumerate(buckets):
+                    if valor <= limite:
+                        datos[i] += 1
+                        break
+                else:
+                    datos[len(buckets)] += 1
+                datos[-1] += valor
+
+    def volcar(self, directorio=None):
+        """Escribe atómicamente el estado del proceso en su archivo"""
+        directorio = Path(directorio or configuracion_metricas()['DIRECTORIO'])
+        with self._bloqueo:
+            self._verificar_fork()
+            contenido = {'pid': self._pid, 'inicio': self._inicio, 'valores': self.valores}
+            self._ultimo_volcado = time.monotonic()
+        _escribir(directorio / f'metricas_{self._pid}_{self._inicio}.json', contenido)
+
+    def volcar_si_corresponde(self):
+        configuracion = configuracion_metricas()
+        if time.monotonic() - self._ultimo_volcado >= configuracion['INTERVALO_VOLCADO']:
+            self.volcar(configuracion['DIRECTORIO'])
+
+
+registro = RegistroMetricas()
+
+ACUMULADOR_MUERTOS = 'metricas_muertos.json'
+BLOQUEO_PLEGADO = 'metricas_muertos.bloqueo'
+BLOQUEO_CADUCIDAD = 60
+
+
+def _escribir(destino, contenido):
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporal = destino.with_suffix('.tmp')
+    temporal.write_text(json.dumps(contenido), encoding='utf-8')
+    os.replace(temporal, destino)
+
+
+def _leer(archivo):
+    try:
+        return json.loads(archivo.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _sumar(combinadas, valores, con_indicadores=True):
+    for tipo, series in valores.items():
+        if tipo == 'gauge' and not con_indicadores:
+            continue
+        for nombre, por_clave in series.items():
+            destino = combinadas[tipo].setdefault(nombre, {})
+            for clave, valor in por_clave.items():
+                if tipo == 'histogram':
+                    acumulado = destino.setdefault(clave, [0] * len(valor))
+                    for i, v in enumerate(valor):
+                        acumulado[i] += v
+                else:
+                    destino[clave] = destino.get(clave, 0) + valor
+
+
+def _plegar_muertos(directorio, archivos):
+    """
+    Suma los archivos de procesos terminados al acumulador y los borra.
+
+    Solo pliega un proceso a la vez (si otro ya lo está haciendo se deja para
+    el siguiente scrape). El acumulador guarda los nombres ya incluidos, así
+    un lector concurrente no cuenta dos veces un archivo pendiente de borrar.
+    """
+    bloqueo = directorio / BLOQUEO_PLEGADO
+    try:
+        descriptor = os.open(bloqueo, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - bloqueo.stat().st_mtime > BLOQUEO_CADUCIDAD:
+                bloqueo.unlink()
+        except OSError:
+            pass
+        return
+    os.close(descriptor)
+    try:
+        acumulador = _leer(directorio / ACUMULADOR_MUERTOS) or {'incluidos': [], 'valores': {}}
+        valores = {'counter': {}, 'gauge': {}, 'histogram': {}}
+        _sumar(valores, acumulador['valores'])
+        incluidos = [nombre for nombre in acumulador['incluidos'] if (directorio / nombre).exists()]
+        for archivo in archivos:
+            datos = _leer(archivo)
+            if datos is None or archivo.name in incluidos:
+                continue
+            _sumar(valores, datos['valores'], con_indicadores=False)
+            incluidos.append(archivo.name)
+        _escribir(directorio / ACUMULADOR_MUERTOS, {'incluidos': incluidos, 'valores': valores})
+        for archivo in archivos:
+            archivo.unlink(missing_ok=True)
+    finally:
+        bloqueo.unlink(missing_ok=True)
+
+
+def registrar_cache(nombre, acierto):
+    """Cuenta una consulta a una caché de la aplicación (acierto o fallo)"""
+    registro.incrementar(
+        'cache_consultas_total',
+        {'cache': nombre, 'resultado': 'acierto' if acierto else 'fallo'}
+    )
+
+
+def combinar_procesos(directorio=None):
+    """Combina las métricas volcadas por todos los procesos"""
+    directorio = Path(directorio or configuracion_metricas()['DIRECTORIO'])
+    registro.volcar(directorio)
+
+    combinadas = {'counter': {}, 'gauge': {}, 'histogram': {}}
+    acumulador = _leer(directorio / ACUMULADOR_MUERTOS) or {'incluidos': [], 'valores': {}}
+    _sumar(combinadas, acumulador['valores'], con_indicadores=False)
+    incluidos = set(acumulador['incluidos'])
+
+    muertos = []
+    for archivo in directorio.glob('metricas_*.json'):
+        if archivo.name == ACUMULADOR_MUERTOS or archivo.name in incluidos:
+            continue
+        datos = _leer(archivo)
+        if datos is None:
+            continue
+        vivo = _proceso_vivo(datos['pid'], datos.get('inicio'))
+        _sumar(combinadas, datos['valores'], con_indicadores=vivo)
+        if not vivo:
+            muertos.append(archivo)
+
+    if muertos:
+        _plegar_muertos(directorio, muertos)
+    return combinadas
+
+
+def _formatear_etiquetas(clave, extra=None):
+    pares = [tuple(par) for par in json.loads(clave)]
+    if extra:
+        pares.append(extra)
+    if not pares:
+        return ''
+    texto = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pares
+    )
+    return '{' + texto + '}'
+
+
+def _formatear_numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def exponer(directorio=None):
+    """Genera el texto de exposición de Prometheus con las métricas de todos los procesos"""
+    combinadas = combinar_procesos(directorio)
+    lineas = []
+    for nombre, (tipo, ayuda, buckets) in DEFINICIONES.items():
+        series = combinadas[tipo].get(nombre, {})
+        lineas.append(f'# HELP {nombre} {ayuda}')
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        for clave, valor in sorted(series.items()):
+            if tipo != 'histogram':
+                lineas.append(f'{nombre}{_formatear_etiquetas(clave)} {_formatear_numero(valor)}')
+                continue
+            acumulado = 0
+            for limite, conteo in zip(list(buckets) + ['+Inf'], valor[:-1]):
+                acumulado += conteo
+                lineas.append(f'{nombre}_bucket{_formatear_etiquetas(clave, ("le", limite))} {acumulado}')
+            lineas.append(f'{nombre}_sum{_formatear_etiquetas(clave)} {_formatear_numero(valor[-1])}')
+            lineas.append(f'{nombre}_count{_formatear_etiquetas(clave)} {acumulado}')
+
+    # Tasa de aciertos derivada de los contadores de caché
+    lineas.append('# HELP cache_tasa_aciertos Proporción de aciertos por caché')
+    lineas.append('# TYPE cache_tasa_aciertos gauge')
+    por_cache = {}
+    for clave, valor in combinadas['counter'].get('cache_consultas_total', {}).items():
+        etiquetas = dict(tuple(par) for par in json.loads(clave))
+        totales = por_cache.setdefault(etiquetas['cache'], [0, 0])
+        totales[0 if etiquetas['resultado'] == 'acierto' else 1] += valor
+    for cache, (aciertos, fallos) in sorted(por_cache.items()):
+        tasa = aciertos / (aciertos + fallos) if aciertos + fallos else 0.0
+        lineas.append(f'cache_tasa_aciertos{_formatear_etiquetas(_clave({"cache": cache}))} {tasa!r}')
+
+    return '\n'.join(lineas) + '\n'
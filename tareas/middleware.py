@@ -0,0 +1,393 @@
+"""
+Middleware de instrumentación de la API.
+
+InstrumentacionSQLMiddleware mide cada petición mediante el `execute_wrapper`
+observar_consultas, instalado en cada conexión al crearse (funciona con
+DEBUG = False, no guarda el texto de todas las consultas y también captura
+las consultas que el ORM asíncrono ejecuta en otros hilos) y agrega las cabeceras `Server-Timing` y `X-Query-Count`. Las
+peticiones que superan el umbral se escriben en el log estructurado
+`tareas.consultas_lentas` con el SQL normalizado y sus parámetros.
+
+MetricasMiddleware alimenta el registro de tareas.metricas (latencia por
+acción de viewset, consultas SQL y peticiones en curso) que expone /metrics.
+
+ReplicaMiddleware da a cada petición su propio estado de enrutamiento de
+tareas.replicas (lectura tras escritura) y, con REPLICAS['TODOS_LOS_GET'],
+manda a la réplica las lecturas de las peticiones GET/HEAD.
+
+PerfiladoMiddleware ejecuta peticiones puntuales bajo cProfile cuando
+PERFILADO['HABILITADO'] está activo. Si está desactivado Django lo descarta
+al arrancar (MiddlewareNotUsed), por lo que no agrega ningún costo.
+"""
+import contextvars
+import cProfile
+import heapq
+import itertools
+import json
+import logging
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metricas, replicas
+
+logger_consultas_lentas = logging.getLogger('tareas.consultas_lentas')
+
+CONFIGURACION_POR_DEFECTO = {
+    'HABILITADA': True,
+    'UMBRAL_LENTO_MS': 500,
+    'MAX_CONSULTAS_REGISTRADAS': 5,
+    'MAX_LARGO_PARAMETROS': 200,
+}
+
+_ESPACIOS = re.compile(r'\s+')
+_LISTA_PARAMETROS = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_LITERAL_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_LITERAL_NUMERO = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+
+
+def configuracion_instrumentacion():
+    """Configuración efectiva de INSTRUMENTACION_SQL con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'INSTRUMENTACION_SQL', {})}
+
+
+# Observadores de consultas de la petición en curso. Al ser una ContextVar se
+# propaga a los hilos donde sync_to_async ejecuta el ORM en vistas asíncronas.
+_observadores_sql = contextvars.ContextVar('observadores_sql', default=())
+
+
+def observar_consultas(execute, sql, params, many, context):
+    """execute_wrapper de cada conexión: notifica la duración a los observadores activos"""
+    observadores = _observadores_sql.get()
+    if not observadores:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracion = time.perf_counter() - inicio
+        for observador in observadores:
+            observador(duracion, sql, params, many)
+
+
+@contextmanager
+def observando_consultas(observador):
+    """Activa `observador(duracion, sql, params, many)` para las consultas del contexto actual"""
+    token = _observadores_sql.set(_observadores_sql.get() + (observador,))
+    try:
+        yield observador
+    finally:
+        _observadores_sql.reset(token)
+
+
+def normalizar_sql(sql):
+    """Normaliza el SQL para agrupar consultas equivalentes (literales y listas IN colapsadas)"""
+    sql = _LITERAL_TEXTO.sub('?', sql)
+    sql = _LITERAL_NUMERO.sub('?', sql)
+    sql = _LISTA_PARAMETROS.sub('(%s, ...)', sql)
+    return _ESPACIOS.sub(' ', sql).strip()
+
+
+class MedicionSQL:
+    """Acumula cantidad y tiempo de consultas, y conserva las N más lentas"""
+
+    def __init__(self, max_consultas):
+        self.max_consultas = max_consultas
+        self.cantidad = 0
+        self.tiempo = 0.0
+        self.mas_lentas = []
+        self._orden = itertools.count()
+
+    def __call__(self, duracion, sql, params, many):
+        self.cantidad += 1
+        self.tiempo += duracion
+        if self.max_consultas:
+            entrada = (duracion, next(self._orden), sql, params, many)
+            if len(self.mas_lentas) < self.max_consultas:
+                heapq.heappush(self.mas_lentas, entrada)
+            elif duracion > self.mas_lentas[0][0]:
+                heapq.heapreplace(self.mas_lentas, entrada)
+
+    def consultas_ordenadas(self, max_largo_parametros):
+        """Consultas más lentas, de mayor a menor duración, listas para el log"""
+        consultas = []
+        for duracion, _, sql, params, many in sorted(self.mas_lentas, reverse=True):
+            if many:
+                params = list(params or [])
+                parametros = {'lotes': len(params), 'primero': params[0] if params else None}
+            else:
+                parametros = params
+            consultas.append({
+                'sql': normalizar_sql(sql),
+                'parametros': repr(parametros)[:max_largo_parametros],
+                'duracion_ms': round(duracion * 1000, 3),
+            })
+        return consultas
+
+
+class InstrumentacionSQLMiddleware:
+    """Mide SQL, vista y renderizado de cada petición y los expone en cabeceras"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.configuracion = configuracion_instrumentacion()
+        if not self.configuracion['HABILITADA']:
+            raise MiddlewareNotUsed
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        medicion = self.iniciar(request)
+        inicio = time.perf_counter()
+        with observando_consultas(medicion):
+            response = self.get_response(request)
+        return self.finalizar(request, response, medicion, inicio)
+
+    async def __acall__(self, request):
+        medicion = self.iniciar(request)
+        inicio = time.perf_counter()
+        with observando_consultas(medicion):
+            response = await self.get_response(request)
+        return self.finalizar(request, response, medicion, inicio)
+
+    def iniciar(self, request):
+        request._instrumentacion = {'inicio_vista': None, 'fin_vista': None}
+        return MedicionSQL(self.configuracion['MAX_CONSULTAS_REGISTRADAS'])
+
+    def finalizar(self, request, response, medicion, inicio):
+        fin = time.perf_counter()
+        tiempos = self.calcular_tiempos(request._instrumentacion, inicio, fin, medicion)
+        response['X-Query-Count'] = str(medicion.cantidad)
+        response['Server-Timing'] = ', '.join(
+            f'{nombre};dur={duracion:.2f}' + (f';desc="{medicion.cantidad} consultas"' if nombre == 'db' else '')
+            for nombre, duracion in tiempos.items()
+        )
+
+        if tiempos['total'] >= self.configuracion['UMBRAL_LENTO_MS']:
+            self.registrar_peticion_lenta(request, response, medicion, tiempos)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._instrumentacion['inicio_vista'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Las respuestas de DRF se renderizan después de este punto
+        request._instrumentacion['fin_vista'] = time.perf_counter()
+        return response
+
+    @staticmethod
+    def calcular_tiempos(marcas, inicio, fin, medicion):
+        """Tiempos en ms: db, vista (sin SQL), render y total"""
+        inicio_vista = marcas['inicio_vista'] or inicio
+        fin_vista = marcas['fin_vista'] or fin
+        db = medicion.tiempo * 1000
+        return {
+            'db': db,
+            'vista': max(0.0, (fin_vista - inicio_vista) * 1000 - db),
+            'render': (fin - fin_vista) * 1000,
+            'total': (fin - inicio) * 1000,
+        }
+
+    def registrar_peticion_lenta(self, request, response, medicion, tiempos):
+        registro = {
+            'metodo': request.method,
+            'ruta': request.path,
+            'query': request.META.get('QUERY_STRING', ''),
+            'estado': response.status_code,
+            'consultas': medicion.cantidad,
+            **{f'{nombre}_ms': round(duracion, 3) for nombre, duracion in tiempos.items()},
+            'consultas_lentas': medicion.consultas_ordenadas(self.configuracion['MAX_LARGO_PARAMETROS']),
+        }
+        logger_consultas_lentas.warning(json.dumps(registro, ensure_ascii=False, default=str))
+
+
+class ReplicaMiddleware:
+    """Estado de enrutamiento a la réplica por petición (sin réplica configurada no se usa)"""
+
+    sync_capable = True
+    async_capable = True
+    metodos_lectura = ('GET', 'HEAD')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        configuracion = replicas.configuracion_replicas()
+        if configuracion['ALIAS'] not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.todos_los_get = configuracion['TODOS_LOS_GET']
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with replicas.contexto_peticion(self.en_replica(request)):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with replicas.contexto_peticion(self.en_replica(request)):
+            return await self.get_response(request)
+
+    def en_replica(self, request):
+        return self.todos_los_get and request.method in self.metodos_lectura
+
+
+CONFIGURACION_PERFILADO_POR_DEFECTO = {
+    'HABILITADO': False,
+    'TOKEN': '',
+    'MUESTREO': 0,
+    'DIRECTORIO': 'perfiles',
+    'TOP_FUNCIONES': 40,
+}
+
+_RUTA_A_NOMBRE = re.compile(r'[^A-Za-z0-9]+')
+
+
+def configuracion_perfilado():
+    """Configuración efectiva de PERFILADO con sus valores por defecto"""
+    return {**CONFIGURACION_PERFILADO_POR_DEFECTO, **getattr(settings, 'PERFILADO', {})}
+
+
+class PerfiladoMiddleware:
+    """
+    Perfila con cProfile las peticiones autorizadas con la cabecera
+    `X-Perfilar: <token>` o el parámetro `?perfilar=<token>`, y además una de
+    cada N peticiones si PERFILADO['MUESTREO'] = N. Guarda el `.prof` y un
+    resumen `.txt` con las funciones más costosas en PERFILADO['DIRECTORIO'].
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.configuracion = configuracion_perfilado()
+        if not self.configuracion['HABILITADO']:
+            raise MiddlewareNotUsed
+        self.directorio = Path(self.configuracion['DIRECTORIO'])
+        self.muestreo = int(self.configuracion['MUESTREO'] or 0)
+        self._contador = itertools.count(1)
+        # cProfile no admite dos perfiles activos a la vez en el mismo proceso
+        self._bloqueo = threading.Lock()
+
+    def __call__(self, request):
+        motivo = self.motivo_perfilado(request)
+        if motivo is None or not self._bloqueo.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            perfil = cProfile.Profile()
+            inicio = time.perf_counter()
+            perfil.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                perfil.disable()
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+        finally:
+            self._bloqueo.release()
+
+        nombre = self.guardar(perfil, request, response, duracion_ms, motivo)
+        response['X-Perfil'] = nombre
+        return response
+
+    def motivo_perfilado(self, request):
+        """Devuelve 'solicitado', 'muestreo' o None si la petición no se perfila"""
+        token = self.configuracion['TOKEN']
+        if token and token in (request.headers.get('X-Perfilar'), request.GET.get('perfilar')):
+            return 'solicitado'
+        if self.muestreo and next(self._contador) % self.muestreo == 0:
+            return 'muestreo'
+        return None
+
+    def guardar(self, perfil, request, response, duracion_ms, motivo):
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        ruta = _RUTA_A_NOMBRE.sub('_', request.path).strip('_') or 'raiz'
+        nombre = f"{datetime.now():%Y%m%d_%H%M%S_%f}_{request.method}_{ruta}"
+
+        perfil.dump_stats(self.directorio / f'{nombre}.prof')
+        with open(self.directorio / f'{nombre}.txt', 'w', encoding='utf-8') as archivo:
+            archivo.write(json.dumps({
+                'metodo': request.method,
+                'ruta': request.get_full_path(),
+                'estado': response.status_code,
+                'duracion_ms': round(duracion_ms, 3),
+                'motivo': motivo,
+            }, ensure_ascii=False) + '\n\n')
+            estadisticas = pstats.Stats(perfil, stream=archivo)
+            estadisticas.strip_dirs().sort_stats('cumulative').print_stats(self.configuracion['TOP_FUNCIONES'])
+        return nombre
+
+
+class MetricasMiddleware:
+    """Registra latencia, estado, consultas SQL y peticiones en curso por acción de viewset"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not metricas.configuracion_metricas()['HABILITADAS']:
+            raise MiddlewareNotUsed
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        duraciones_sql = []
+        request._metricas_vista = ('sin_resolver', '')
+        metricas.registro.ajustar('http_peticiones_en_curso', 1)
+        inicio = time.perf_counter()
+        try:
+            with observando_consultas(lambda duracion, *_: duraciones_sql.append(duracion)):
+                response = self.get_response(request)
+        finally:
+            metricas.registro.ajustar('http_peticiones_en_curso', -1)
+        return self.registrar(request, response, time.perf_counter() - inicio, duraciones_sql)
+
+    async def __acall__(self, request):
+        duraciones_sql = []
+        request._metricas_vista = ('sin_resolver', '')
+        metricas.registro.ajustar('http_peticiones_en_curso', 1)
+        inicio = time.perf_counter()
+        try:
+            with observando_consultas(lambda duracion, *_: duraciones_sql.append(duracion)):
+                response = await self.get_response(request)
+        finally:
+            metricas.registro.ajustar('http_peticiones_en_curso', -1)
+        return self.registrar(request, response, time.perf_counter() - inicio, duraciones_sql)
+
+    def registrar(self, request, response, duracion, duraciones_sql):
+
+        vista, accion = request._metricas_vista
+        etiquetas = {'vista': vista, 'accion': accion, 'metodo': request.method}
+        metricas.registro.observar('http_peticion_duracion_segundos', duracion, etiquetas)
+        metricas.registro.incrementar('http_peticiones_total', {**etiquetas, 'estado': str(response.status_code)})
+        metricas.registro.observar('db_consultas_por_peticion', len(duraciones_sql))
+        if duraciones_sql:
+            metricas.registro.observar('db_consulta_duracion_segundos', duraciones_sql)
+        metricas.registro.volcar_si_corresponde()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        clase = getattr(view_func, 'cls', None)
+        if clase is not None:
+            # Vistas de DRF: nombre del viewset y acción resuelta para el método
+            acciones = getattr(view_func, 'actions', None) or {}
+            accion = acciones.get(request.method.lower(), request.method.lower())
+            request._metricas_vista = (clase.__name__, accion)
+        else:
+            request._metricas_vista = (f'{view_func.__module__}.{view_func.__name__}', '')
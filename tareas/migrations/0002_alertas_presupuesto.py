@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:24
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def inicializar_gasto_registrado(apps, schema_editor):
+    """Calcula el gasto acumulado de los presupuestos existentes (una consulta agrupada por mes)"""
+    from django.db.models import Sum
+    from django.db.models.functions import ExtractMonth, ExtractYear
+
+    Presupuesto = apps.get_model('tareas', 'Presupuesto')
+    Transaccion = apps.get_model('tareas', 'Transaccion')
+
+    totales = {
+        (fila['categoria_id'], fila['año'], fila['mes']): fila['total']
+        for fila in Transaccion.objects.filter(tipo='gasto', categoria__isnull=False)
+        .annotate(año=ExtractYear('fecha'), mes=ExtractMonth('fecha'))
+        .order_by()
+        .values('categoria_id', 'año', 'mes')
+        .annotate(total=Sum('monto'))
+    }
+    presupuestos = list(Presupuesto.objects.all())
+    for presupuesto in presupuestos:
+        presupuesto.gasto_registrado = totales.get(
+            (presupuesto.categoria_id, presupuesto.año, presupuesto.mes)
+        ) or Decimal('0.00')
+    Presupuesto.objects.bulk_update(presupuestos, ['gasto_registrado'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='presupuesto',
+            name='gasto_registrado',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, help_text='Gasto acumulado mantenido de forma incremental por el motor de alertas', max_digits=12, verbose_name='Gasto Registrado'),
+        ),
+        migrations.CreateModel(
+            name='AlertaPresupuesto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('umbral', models.PositiveSmallIntegerField(verbose_name='Umbral (%)')),
+                ('porcentaje', models.DecimalField(decimal_places=2, max_digits=7, verbose_name='Porcentaje Alcanzado')),
+                ('gasto', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Gasto al Cruzar')),
+                ('leida', models.BooleanField(default=False, verbose_name='Leída')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('presupuesto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alertas', to='tareas.presupuesto', verbose_name='Presupuesto')),
+            ],
+            options={
+                'verbose_name': 'Alerta de Presupuesto',
+                'verbose_name_plural': 'Alertas de Presupuesto',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['leida', 'id'], name='alerta_leida_id_idx')],
+            },
+        ),
+        migrations.RunPython(inicializar_gasto_registrado, migrations.RunPython.noop),
+    ]
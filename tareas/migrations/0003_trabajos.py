@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:48
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0002_alertas_presupuesto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabajo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=100, verbose_name='Tipo')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En Curso'), ('completado', 'Completado'), ('fallido', 'Fallido')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('prioridad', models.SmallIntegerField(default=0, help_text='Mayor valor, antes se ejecuta', verbose_name='Prioridad')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('max_intentos', models.PositiveSmallIntegerField(default=3, verbose_name='Máximo de Intentos')),
+                ('progreso', models.PositiveSmallIntegerField(default=0, verbose_name='Progreso (%)')),
+                ('mensaje', models.CharField(blank=True, max_length=255, verbose_name='Mensaje')),
+                ('punto_control', models.JSONField(blank=True, default=dict, help_text='Estado parcial que permite reanudar el trabajo al reintentarlo', verbose_name='Punto de Control')),
+                ('resultado', models.JSONField(blank=True, null=True, verbose_name='Resultado')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('trabajador', models.CharField(blank=True, max_length=100, verbose_name='Trabajador')),
+                ('disponible_desde', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponible Desde')),
+                ('latido', models.DateTimeField(blank=True, null=True, verbose_name='Último Latido')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Trabajo',
+                'verbose_name_plural': 'Trabajos',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['estado', '-prioridad', 'disponible_desde'], name='trabajo_cola_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0003_trabajos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaccion',
+            index=models.Index(fields=['fecha', 'id'], name='transaccion_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaccion',
+            index=models.Index(fields=['categoria', 'fecha'], name='transaccion_cat_fecha_idx'),
+        ),
+    ]
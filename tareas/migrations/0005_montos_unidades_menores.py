@@ -0,0 +1,77 @@
+"""
+Pasa los importes de DecimalField a MontoField (enteros en unidades menores).
+
+Para cada importe se agrega una columna entera, se copia el valor escalado
+por 10 ** MONEDA_DECIMALES con un único UPDATE por tabla, se elimina la
+columna decimal y se renombra la nueva.
+"""
+from django.db import migrations
+from django.db.models import BigIntegerField, DecimalField, F
+from django.db.models.functions import Cast, Round
+
+import tareas.campos
+
+# modelo: [(campo, opciones del MontoField)]
+IMPORTES = {
+    'presupuesto': [
+        ('monto_limite', {'verbose_name': 'Monto Límite'}),
+        ('gasto_registrado', {
+            'default': 0, 'editable': False, 'verbose_name': 'Gasto Registrado',
+            'help_text': 'Gasto acumulado mantenido de forma incremental por el motor de alertas',
+        }),
+    ],
+    'transaccion': [('monto', {'verbose_name': 'Monto'})],
+    'metafinanciera': [
+        ('monto_objetivo', {'verbose_name': 'Monto Objetivo'}),
+        ('monto_actual', {'default': 0, 'verbose_name': 'Monto Actual'}),
+    ],
+    'alertapresupuesto': [('gasto', {'verbose_name': 'Gasto al Cruzar'})],
+}
+
+
+def _factor():
+    return 10 ** tareas.campos.decimales_moneda()
+
+
+def a_unidades_menores(apps, schema_editor):
+    factor = _factor()
+    for modelo, campos in IMPORTES.items():
+        apps.get_model('tareas', modelo).objects.update(**{
+            f'{campo}_menor': Cast(Round(F(campo) * factor), BigIntegerField())
+            for campo, _ in campos
+        })
+
+
+def a_decimales(apps, schema_editor):
+    factor = _factor()
+    for modelo, campos in IMPORTES.items():
+        apps.get_model('tareas', modelo).objects.update(**{
+            campo: Cast(F(f'{campo}_menor'), DecimalField(max_digits=14, decimal_places=2)) / factor
+            for campo, _ in campos
+        })
+
+
+def _operaciones():
+    agregar, quitar, renombrar = [], [], []
+    for modelo, campos in IMPORTES.items():
+        for campo, opciones in campos:
+            agregar.append(migrations.AddField(
+                model_name=modelo,
+                name=f'{campo}_menor',
+                field=tareas.campos.MontoField(**{'default': 0, **opciones}),
+                preserve_default='default' in opciones,
+            ))
+            quitar.append(migrations.RemoveField(model_name=modelo, name=campo))
+            renombrar.append(migrations.RenameField(
+                model_name=modelo, old_name=f'{campo}_menor', new_name=campo
+            ))
+    return agregar + [migrations.RunPython(a_unidades_menores, a_decimales)] + quitar + renombrar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0004_indices_transaccion'),
+    ]
+
+    operations = _operaciones()
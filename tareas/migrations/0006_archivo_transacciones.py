@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+import tareas.campos
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0005_montos_unidades_menores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoAnual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('año', models.PositiveSmallIntegerField(unique=True, verbose_name='Año')),
+                ('tabla', models.CharField(max_length=100, verbose_name='Tabla')),
+                ('filas', models.PositiveIntegerField(verbose_name='Filas')),
+                ('fecha_archivo', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Año Archivado',
+                'verbose_name_plural': 'Años Archivados',
+                'ordering': ['año'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenMensualArchivado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('año', models.PositiveSmallIntegerField(verbose_name='Año')),
+                ('mes', models.PositiveSmallIntegerField(verbose_name='Mes')),
+                ('tipo', models.CharField(choices=[('ingreso', 'Ingreso'), ('gasto', 'Gasto')], max_length=20, verbose_name='Tipo')),
+                ('monto', tareas.campos.MontoField(verbose_name='Monto Total')),
+                ('cantidad', models.PositiveIntegerField(verbose_name='Cantidad de Transacciones')),
+                ('categoria', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='tareas.categoria', verbose_name='Categoría')),
+            ],
+            options={
+                'verbose_name': 'Resumen Mensual Archivado',
+                'verbose_name_plural': 'Resúmenes Mensuales Archivados',
+                'ordering': ['año', 'mes'],
+                'indexes': [models.Index(fields=['año', 'mes'], name='resumen_archivado_mes_idx')],
+            },
+        ),
+    ]
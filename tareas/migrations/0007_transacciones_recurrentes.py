@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+import tareas.campos
+
+
+def _columna_archivos(apps, schema_editor, sql):
+    """Las tablas de archivo anual (sin migraciones) replican las columnas de Transaccion"""
+    campo = apps.get_model('tareas', 'Transaccion')._meta.get_field('recurrencia')
+    tipo = campo.db_type(schema_editor.connection)
+    for tabla in apps.get_model('tareas', 'ArchivoAnual').objects.values_list('tabla', flat=True):
+        schema_editor.execute(sql.format(
+            tabla=schema_editor.quote_name(tabla), columna=schema_editor.quote_name(campo.column), tipo=tipo
+        ))
+
+
+def agregar_columna_archivos(apps, schema_editor):
+    _columna_archivos(apps, schema_editor, 'ALTER TABLE {tabla} ADD COLUMN {columna} {tipo} NULL')
+
+
+def quitar_columna_archivos(apps, schema_editor):
+    _columna_archivos(apps, schema_editor, 'ALTER TABLE {tabla} DROP COLUMN {columna}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0006_archivo_transacciones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransaccionRecurrente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descripcion', models.CharField(max_length=200, verbose_name='Descripción')),
+                ('monto', tareas.campos.MontoField(verbose_name='Monto')),
+                ('tipo', models.CharField(choices=[('ingreso', 'Ingreso'), ('gasto', 'Gasto')], max_length=20, verbose_name='Tipo')),
+                ('frecuencia', models.CharField(choices=[('semanal', 'Semanal'), ('quincenal', 'Quincenal'), ('mensual', 'Mensual'), ('anual', 'Anual')], default='mensual', max_length=20, verbose_name='Frecuencia')),
+                ('intervalo', models.PositiveSmallIntegerField(default=1, help_text='Cada cuántas unidades de la frecuencia se repite (2 = cada dos meses)', verbose_name='Intervalo')),
+                ('fecha_inicio', models.DateField(verbose_name='Fecha de Inicio')),
+                ('fecha_fin', models.DateField(blank=True, null=True, verbose_name='Fecha de Fin')),
+                ('activa', models.BooleanField(default=True, verbose_name='Activa')),
+                ('notas', models.TextField(blank=True, verbose_name='Notas')),
+                ('materializada_hasta', models.DateField(blank=True, editable=False, help_text='Última fecha hasta la que ya se generaron sus transacciones', null=True, verbose_name='Materializada Hasta')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Transacción Recurrente',
+                'verbose_name_plural': 'Transacciones Recurrentes',
+                'ordering': ['descripcion'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaccionrecurrente',
+            name='categoria',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='tareas.categoria', verbose_name='Categoría'),
+        ),
+        migrations.AddField(
+            model_name='transaccion',
+            name='recurrencia',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transacciones', to='tareas.transaccionrecurrente', verbose_name='Recurrencia'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaccion',
+            constraint=models.UniqueConstraint(fields=('recurrencia', 'fecha'), name='transaccion_ocurrencia_unica'),
+        ),
+        migrations.RunPython(agregar_columna_archivos, quitar_columna_archivos),
+    ]
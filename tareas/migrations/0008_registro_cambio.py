@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0007_transacciones_recurrentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroCambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=50, verbose_name='Modelo')),
+                ('objeto_id', models.BigIntegerField(null=True, verbose_name='ID del Objeto')),
+                ('operacion', models.CharField(choices=[('guardado', 'Creado o Actualizado'), ('eliminado', 'Eliminado'), ('reinicio', 'Reinicio de Datos')], max_length=10, verbose_name='Operación')),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Registro de Cambio',
+                'verbose_name_plural': 'Registro de Cambios',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['fecha'], name='registro_cambio_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def filas_propias(apps, schema_editor):
+    """Las categorías existentes son raíces: solo les falta su fila de profundidad 0"""
+    Categoria = apps.get_model('tareas', 'Categoria')
+    CategoriaAncestro = apps.get_model('tareas', 'CategoriaAncestro')
+    CategoriaAncestro.objects.bulk_create(
+        [
+            CategoriaAncestro(ancestro_id=pk, descendiente_id=pk, profundidad=0)
+            for pk in Categoria.objects.values_list('pk', flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0008_registro_cambio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='padre',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subcategorias', to='tareas.categoria', verbose_name='Categoría Padre'),
+        ),
+        migrations.CreateModel(
+            name='CategoriaAncestro',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profundidad', models.PositiveSmallIntegerField(verbose_name='Profundidad')),
+                ('ancestro', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendientes', to='tareas.categoria', verbose_name='Ancestro')),
+                ('descendiente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestros', to='tareas.categoria', verbose_name='Descendiente')),
+            ],
+            options={
+                'verbose_name': 'Ancestro de Categoría',
+                'verbose_name_plural': 'Ancestros de Categorías',
+                'indexes': [models.Index(fields=['descendiente', 'ancestro'], name='categoria_descendiente_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='categoriaancestro',
+            constraint=models.UniqueConstraint(fields=('ancestro', 'descendiente'), name='categoria_ancestro_unico'),
+        ),
+        migrations.RunPython(filas_propias, migrations.RunPython.noop),
+    ]
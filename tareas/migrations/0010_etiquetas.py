@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0009_jerarquia_categorias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Etiqueta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True, verbose_name='Nombre')),
+                ('color', models.CharField(default='#95a5a6', max_length=20, verbose_name='Color')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Etiqueta',
+                'verbose_name_plural': 'Etiquetas',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TransaccionEtiqueta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etiqueta', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='tareas.etiqueta', verbose_name='Etiqueta')),
+                ('transaccion', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, to='tareas.transaccion', verbose_name='Transacción')),
+            ],
+            options={
+                'verbose_name': 'Etiqueta de Transacción',
+                'verbose_name_plural': 'Etiquetas de Transacciones',
+            },
+        ),
+        # Sin columna en la tabla: en SQLite AddField reconstruiría la tabla de transacciones entera
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AddField(
+                model_name='transaccion',
+                name='etiquetas',
+                field=models.ManyToManyField(blank=True, related_name='transacciones', through='tareas.TransaccionEtiqueta', to='tareas.etiqueta', verbose_name='Etiquetas'),
+            ),
+        ]),
+        migrations.AddIndex(
+            model_name='transaccionetiqueta',
+            index=models.Index(fields=['transaccion', 'etiqueta'], name='etiqueta_transaccion_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaccionetiqueta',
+            constraint=models.UniqueConstraint(fields=('etiqueta', 'transaccion'), name='transaccion_etiqueta_unica'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0010_etiquetas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaccion',
+            index=models.Index(fields=['tipo', 'fecha', 'categoria', 'monto'], name='transaccion_tipo_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0011_indice_gastos_cubriente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoCambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('datos', models.JSONField(verbose_name='Datos')),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Evento de Cambio',
+                'verbose_name_plural': 'Eventos de Cambio',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
-from decimal import Decimal
+
+from .campos import MontoField, porcentaje_entero
 
 
 class Categoria(models.Model):
@@ -20,6 +22,10 @@ class Categoria(models.Model):
     )
     icono = models.CharField(max_length=50, default='💰', verbose_name='Icono')
     color = models.CharField(max_length=20, default='#3498db', verbose_name='Color')
+    padre = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='subcategorias', verbose_name='Categoría Padre'
+    )
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -29,6 +35,41 @@ class Categoria(models.Model):
     
     def __str__(self):
         return f"{self.nombre} ({self.get_tipo_display()})"
+    
+    def clean(self):
+        from .jerarquia import validar_padre
+        error = validar_padre(self.pk, self.tipo, self.padre)
+        if error:
+            raise ValidationError({'padre': error})
+
+
+class CategoriaAncestro(models.Model):
+    """
+    Tabla de clausura de la jerarquía de categorías: una fila por cada par
+    (ancestro, descendiente), incluida la de cada categoría consigo misma
+    (profundidad 0). La mantiene jerarquia.py.
+    """
+    
+    ancestro = models.ForeignKey(
+        Categoria, on_delete=models.CASCADE, related_name='descendientes', verbose_name='Ancestro'
+    )
+    descendiente = models.ForeignKey(
+        Categoria, on_delete=models.CASCADE, related_name='ancestros', verbose_name='Descendiente'
+    )
+    profundidad = models.PositiveSmallIntegerField(verbose_name='Profundidad')
+    
+    class Meta:
+        verbose_name = 'Ancestro de Categoría'
+        verbose_name_plural = 'Ancestros de Categorías'
+        constraints = [
+            models.UniqueConstraint(fields=['ancestro', 'descendiente'], name='categoria_ancestro_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['descendiente', 'ancestro'], name='categoria_descendiente_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.ancestro_id} → {self.descendiente_id} ({self.profundidad})"
 
 
 class Presupuesto(models.Model):
@@ -41,13 +82,15 @@ class Presupuesto(models.Model):
         limit_choices_to={'tipo': 'gasto'},
         verbose_name='Categoría'
     )
-    monto_limite = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        verbose_name='Monto Límite'
-    )
+    monto_limite = MontoField(verbose_name='Monto Límite')
     mes = models.IntegerField(verbose_name='Mes')
     año = models.IntegerField(verbose_name='Año')
+    gasto_registrado = MontoField(
+        default=0,
+        editable=False,
+        verbose_name='Gasto Registrado',
+        help_text='Gasto acumulado mantenido de forma incremental por el motor de alertas'
+    )
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     
@@ -62,26 +105,58 @@ class Presupuesto(models.Model):
     
     @property
     def gasto_actual(self):
-        """Calcula el gasto actual en esta categoría para el mes/año"""
-        from django.db.models import Sum
-        total = self.categoria.transaccion_set.filter(
-            tipo='gasto',
-            fecha__year=self.año,
-            fecha__month=self.mes
-        ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0.00')
-        return total
+        """Calcula el gasto actual en esta categoría y sus subcategorías para el mes/año (incluye años archivados)"""
+        from .alertas import calcular_gasto
+        return calcular_gasto(self.categoria_id, self.año, self.mes)
     
     @property
     def porcentaje_usado(self):
         """Calcula el porcentaje del presupuesto usado"""
-        if self.monto_limite > 0:
-            return round((self.gasto_actual / self.monto_limite) * 100, 2)
-        return 0
+        return porcentaje_entero(self.gasto_actual, self.monto_limite)
     
     @property
     def monto_restante(self):
         """Calcula el monto restante del presupuesto"""
-        return max(Decimal('0.00'), self.monto_limite - self.gasto_actual)
+        return max(0, self.monto_limite - self.gasto_actual)
+
+
+class TransaccionRecurrente(models.Model):
+    """Regla de una transacción que se repite (salario, alquiler, suscripciones)"""
+    
+    FRECUENCIA_CHOICES = [
+        ('semanal', 'Semanal'),
+        ('quincenal', 'Quincenal'),
+        ('mensual', 'Mensual'),
+        ('anual', 'Anual'),
+    ]
+    
+    descripcion = models.CharField(max_length=200, verbose_name='Descripción')
+    monto = MontoField(verbose_name='Monto')
+    tipo = models.CharField(max_length=20, choices=Categoria.TIPO_CHOICES, verbose_name='Tipo')
+    categoria = models.ForeignKey(Categoria, on_delete=models.SET_NULL, null=True, verbose_name='Categoría')
+    frecuencia = models.CharField(max_length=20, choices=FRECUENCIA_CHOICES, default='mensual', verbose_name='Frecuencia')
+    intervalo = models.PositiveSmallIntegerField(
+        default=1, verbose_name='Intervalo',
+        help_text='Cada cuántas unidades de la frecuencia se repite (2 = cada dos meses)'
+    )
+    fecha_inicio = models.DateField(verbose_name='Fecha de Inicio')
+    fecha_fin = models.DateField(null=True, blank=True, verbose_name='Fecha de Fin')
+    activa = models.BooleanField(default=True, verbose_name='Activa')
+    notas = models.TextField(blank=True, verbose_name='Notas')
+    materializada_hasta = models.DateField(
+        null=True, blank=True, editable=False, verbose_name='Materializada Hasta',
+        help_text='Última fecha hasta la que ya se generaron sus transacciones'
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Transacción Recurrente'
+        verbose_name_plural = 'Transacciones Recurrentes'
+        ordering = ['descripcion']
+    
+    def __str__(self):
+        return f"{self.descripcion} ({self.get_frecuencia_display()}) - {self.monto}"
 
 
 class Transaccion(models.Model):
@@ -93,11 +168,19 @@ class Transaccion(models.Model):
     ]
     
     descripcion = models.CharField(max_length=200, verbose_name='Descripción')
-    monto = models.DecimalField(max_digits=12, decimal_places=2, verbose_name='Monto')
+    monto = MontoField(verbose_name='Monto')
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name='Tipo')
     categoria = models.ForeignKey(Categoria, on_delete=models.SET_NULL, null=True, verbose_name='Categoría')
     fecha = models.DateField(verbose_name='Fecha', default=timezone.now)
     notas = models.TextField(blank=True, verbose_name='Notas')
+    recurrencia = models.ForeignKey(
+        TransaccionRecurrente, on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='transacciones', verbose_name='Recurrencia'
+    )
+    etiquetas = models.ManyToManyField(
+        'Etiqueta', through='TransaccionEtiqueta', blank=True,
+        related_name='transacciones', verbose_name='Etiquetas'
+    )
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     
@@ -105,11 +188,65 @@ class Transaccion(models.Model):
         verbose_name = 'Transacción'
         verbose_name_plural = 'Transacciones'
         ordering = ['-fecha', '-fecha_creacion']
+        indexes = [
+            models.Index(fields=['fecha', 'id'], name='transaccion_fecha_id_idx'),
+            models.Index(fields=['categoria', 'fecha'], name='transaccion_cat_fecha_idx'),
+            # Cubriente para la lectura en columnas de gastos (anomalias.py)
+            models.Index(fields=['tipo', 'fecha', 'categoria', 'monto'], name='transaccion_tipo_fecha_idx'),
+        ]
+        constraints = [
+            # Una ocurrencia por fecha: la materialización de recurrencias es idempotente
+            models.UniqueConstraint(fields=['recurrencia', 'fecha'], name='transaccion_ocurrencia_unica'),
+        ]
     
     def __str__(self):
         return f"{self.get_tipo_display()}: {self.descripcion} - {self.monto}"
 
 
+class Etiqueta(models.Model):
+    """Etiquetas transversales a las categorías (vacaciones, trabajo, ...)"""
+    
+    nombre = models.CharField(max_length=50, unique=True, verbose_name='Nombre')
+    color = models.CharField(max_length=20, default='#95a5a6', verbose_name='Color')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Etiqueta'
+        verbose_name_plural = 'Etiquetas'
+        ordering = ['nombre']
+    
+    def __str__(self):
+        return self.nombre
+
+
+class TransaccionEtiqueta(models.Model):
+    """
+    Etiqueta asignada a una transacción. Sin restricción en la base hacia
+    Transaccion: al archivar un año sus filas se conservan (los ids no cambian)
+    y vuelven a valer al restaurarlo.
+    """
+    
+    # Sin índices propios: los cubren los índices compuestos de Meta
+    transaccion = models.ForeignKey(
+        Transaccion, on_delete=models.CASCADE, db_constraint=False, db_index=False, verbose_name='Transacción'
+    )
+    etiqueta = models.ForeignKey(Etiqueta, on_delete=models.CASCADE, db_index=False, verbose_name='Etiqueta')
+    
+    class Meta:
+        verbose_name = 'Etiqueta de Transacción'
+        verbose_name_plural = 'Etiquetas de Transacciones'
+        constraints = [
+            # Índice (etiqueta, transacción): los filtros por etiquetas agrupan por transacción sin leer la tabla
+            models.UniqueConstraint(fields=['etiqueta', 'transaccion'], name='transaccion_etiqueta_unica'),
+        ]
+        indexes = [
+            models.Index(fields=['transaccion', 'etiqueta'], name='etiqueta_transaccion_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.transaccion_id} #{self.etiqueta_id}"
+
+
 class MetaFinanciera(models.Model):
     """Metas financieras a largo plazo"""
     
@@ -121,17 +258,8 @@ class MetaFinanciera(models.Model):
     
     titulo = models.CharField(max_length=200, verbose_name='Título')
     descripcion = models.TextField(blank=True, verbose_name='Descripción')
-    monto_objetivo = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        verbose_name='Monto Objetivo'
-    )
-    monto_actual = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=Decimal('0.00'),
-        verbose_name='Monto Actual'
-    )
+    monto_objetivo = MontoField(verbose_name='Monto Objetivo')
+    monto_actual = MontoField(default=0, verbose_name='Monto Actual')
     fecha_objetivo = models.DateField(verbose_name='Fecha Objetivo')
     estado = models.CharField(
         max_length=20,
@@ -153,14 +281,12 @@ class MetaFinanciera(models.Model):
     @property
     def porcentaje_completado(self):
         """Calcula el porcentaje completado de la meta"""
-        if self.monto_objetivo > 0:
-            return min(100, round((self.monto_actual / self.monto_objetivo) * 100, 2))
-        return 0
+        return min(100, porcentaje_entero(self.monto_actual, self.monto_objetivo))
     
     @property
     def monto_restante(self):
         """Calcula el monto restante para alcanzar la meta"""
-        return max(Decimal('0.00'), self.monto_objetivo - self.monto_actual)
+        return max(0, self.monto_objetivo - self.monto_actual)
     
     @property
     def dias_restantes(self):
@@ -201,3 +327,183 @@ class LeccionEducativa(models.Model):
     def __str__(self):
         return self.titulo
 
+
+
+class AlertaPresupuesto(models.Model):
+    """Registro de cruces de umbral (80%, 100%, ...) de un presupuesto"""
+    
+    presupuesto = models.ForeignKey(
+        Presupuesto,
+        on_delete=models.CASCADE,
+        related_name='alertas',
+        verbose_name='Presupuesto'
+    )
+    umbral = models.PositiveSmallIntegerField(verbose_name='Umbral (%)')
+    porcentaje = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+        verbose_name='Porcentaje Alcanzado'
+    )
+    gasto = MontoField(verbose_name='Gasto al Cruzar')
+    leida = models.BooleanField(default=False, verbose_name='Leída')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Alerta de Presupuesto'
+        verbose_name_plural = 'Alertas de Presupuesto'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['leida', 'id'], name='alerta_leida_id_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.presupuesto.nombre}: {self.umbral}% ({self.porcentaje}%)"
+
+
+class Trabajo(models.Model):
+    """Trabajo en segundo plano ejecutado por `manage.py procesar_trabajos`"""
+    
+    PENDIENTE = 'pendiente'
+    EN_CURSO = 'en_curso'
+    COMPLETADO = 'completado'
+    FALLIDO = 'fallido'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_CURSO, 'En Curso'),
+        (COMPLETADO, 'Completado'),
+        (FALLIDO, 'Fallido'),
+    ]
+    
+    tipo = models.CharField(max_length=100, verbose_name='Tipo')
+    parametros = models.JSONField(default=dict, blank=True, verbose_name='Parámetros')
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default=PENDIENTE,
+        verbose_name='Estado'
+    )
+    prioridad = models.SmallIntegerField(default=0, verbose_name='Prioridad', help_text='Mayor valor, antes se ejecuta')
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')
+    max_intentos = models.PositiveSmallIntegerField(default=3, verbose_name='Máximo de Intentos')
+    progreso = models.PositiveSmallIntegerField(default=0, verbose_name='Progreso (%)')
+    mensaje = models.CharField(max_length=255, blank=True, verbose_name='Mensaje')
+    punto_control = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Punto de Control',
+        help_text='Estado parcial que permite reanudar el trabajo al reintentarlo'
+    )
+    resultado = models.JSONField(null=True, blank=True, verbose_name='Resultado')
+    error = models.TextField(blank=True, verbose_name='Error')
+    trabajador = models.CharField(max_length=100, blank=True, verbose_name='Trabajador')
+    disponible_desde = models.DateTimeField(default=timezone.now, verbose_name='Disponible Desde')
+    latido = models.DateTimeField(null=True, blank=True, verbose_name='Último Latido')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Trabajo'
+        verbose_name_plural = 'Trabajos'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['estado', '-prioridad', 'disponible_desde'], name='trabajo_cola_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_estado_display()})"
+
+
+class ArchivoAnual(models.Model):
+    """Año cerrado cuyas transacciones se movieron a su tabla de archivo"""
+    
+    año = models.PositiveSmallIntegerField(unique=True, verbose_name='Año')
+    tabla = models.CharField(max_length=100, verbose_name='Tabla')
+    filas = models.PositiveIntegerField(verbose_name='Filas')
+    fecha_archivo = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Año Archivado'
+        verbose_name_plural = 'Años Archivados'
+        ordering = ['año']
+    
+    def __str__(self):
+        return f"{self.año} ({self.filas} transacciones)"
+
+
+class ResumenMensualArchivado(models.Model):
+    """
+    Totales exactos por mes, categoría y tipo de un año archivado. Usa los
+    mismos nombres de campo que Transaccion (monto, tipo, categoria) para que
+    los agregados de análisis sirvan para ambos.
+    """
+    
+    año = models.PositiveSmallIntegerField(verbose_name='Año')
+    mes = models.PositiveSmallIntegerField(verbose_name='Mes')
+    categoria = models.ForeignKey(Categoria, on_delete=models.SET_NULL, null=True, verbose_name='Categoría')
+    tipo = models.CharField(max_length=20, choices=Transaccion.TIPO_CHOICES, verbose_name='Tipo')
+    monto = MontoField(verbose_name='Monto Total')
+    cantidad = models.PositiveIntegerField(verbose_name='Cantidad de Transacciones')
+    
+    class Meta:
+        verbose_name = 'Resumen Mensual Archivado'
+        verbose_name_plural = 'Resúmenes Mensuales Archivados'
+        ordering = ['año', 'mes']
+        indexes = [
+            models.Index(fields=['año', 'mes'], name='resumen_archivado_mes_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.mes}/{self.año} {self.get_tipo_display()}: {self.monto}"
+
+
+class RegistroCambio(models.Model):
+    """
+    Cambio de una fila sincronizable, para la sincronización incremental
+    (/api/sync/). El id autoincremental es la secuencia monótona de cambios.
+    """
+    
+    GUARDADO = 'guardado'
+    ELIMINADO = 'eliminado'
+    REINICIO = 'reinicio'
+    OPERACION_CHOICES = [
+        (GUARDADO, 'Creado o Actualizado'),
+        (ELIMINADO, 'Eliminado'),
+        (REINICIO, 'Reinicio de Datos'),
+    ]
+    
+    modelo = models.CharField(max_length=50, verbose_name='Modelo')
+    objeto_id = models.BigIntegerField(null=True, verbose_name='ID del Objeto')
+    operacion = models.CharField(max_length=10, choices=OPERACION_CHOICES, verbose_name='Operación')
+    fecha = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Registro de Cambio'
+        verbose_name_plural = 'Registro de Cambios'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['fecha'], name='registro_cambio_fecha_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.pk} {self.modelo} {self.objeto_id} ({self.operacion})"
+
+
+class EventoCambio(models.Model):
+    """
+    Evento del flujo SSE (/api/eventos/). Se guarda con la escritura que lo
+    origina y cada proceso servidor lo lee de esta tabla, de modo que los
+    cambios hechos por otros workers o por los trabajos en segundo plano
+    también llegan a los suscriptores. El id es el id del evento SSE.
+    """
+    
+    datos = models.JSONField(verbose_name='Datos')
+    fecha = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Evento de Cambio'
+        verbose_name_plural = 'Eventos de Cambio'
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"#{self.pk} {self.datos.get('modelo')} {self.datos.get('operacion')}"
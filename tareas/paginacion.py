@@ -0,0 +1,48 @@
+"""
+Paginación para tablas grandes sin COUNT(*) completo.
+
+Sin filtros, en PostgreSQL y MySQL el total se estima con las estadísticas
+del motor, que no requieren recorrer la tabla. En SQLite, y siempre que hay
+filtros, el total es un COUNT exacto: un total acotado o sobreestimado deja
+páginas inalcanzables o vacías. En SQLite COUNT(*) sin filtros recorre el
+índice más chico de la tabla (milisegundos con cientos de miles de filas);
+MAX(id) sobreestimaba después de borrar o archivar filas.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimar_filas(modelo, using='default'):
+    """Número aproximado de filas de la tabla de un modelo, o None si el motor no lo estima"""
+    conexion = connections[using]
+    tabla = modelo._meta.db_table
+    if conexion.vendor not in ('postgresql', 'mysql'):
+        return None
+    with conexion.cursor() as cursor:
+        if conexion.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [tabla])
+            fila = cursor.fetchone()
+            # reltuples es -1 (o 0) en tablas que aún no se analizaron
+            return fila[0] if fila and fila[0] > 0 else None
+        cursor.execute(
+            'SELECT table_rows FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s', [tabla]
+        )
+        fila = cursor.fetchone()
+        return fila[0] if fila else None
+
+
+class PaginadorEstimado(Paginator):
+    """Paginator cuyo total sin filtros es estimado por el motor en tablas grandes; con filtros, exacto"""
+
+    umbral_estimacion = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimado = estimar_filas(queryset.model, queryset.db)
+            if estimado is not None and estimado >= self.umbral_estimacion:
+                return estimado
+        return queryset.count()
@@ -0,0 +1,200 @@
+"""
+Pronóstico de cumplimiento de las metas financieras por simulación de Monte Carlo.
+
+El ahorro neto mensual (ingresos - gastos) de los últimos HISTORIAL_MESES
+meses cerrados, incluidos los años archivados, forma la distribución
+empírica. Se simulan SIMULACIONES trayectorias de ahorro remuestreando esos
+meses, todas a la vez en una matriz (trayectorias x meses) de NumPy.
+
+El ahorro de cada mes se reparte entre las metas en progreso en proporción
+al aporte mensual que necesita cada una para llegar a tiempo (lo que falta
+dividido por los meses hasta su fecha objetivo). Una meta se cumple en el
+primer cierre de mes en que su parte acumulada alcanza lo que le falta.
+
+El historial mensual es la parte costosa (una consulta agrupada sobre dos
+años) y solo incluye meses cerrados: se guarda con la versión de las
+transacciones de esos meses (sincronizacion.version_periodo), de modo que las
+escrituras del mes en curso o de otros modelos (p. ej. aportar a una meta) no
+lo invalidan.
+"""
+import calendar
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from . import analisis
+from .campos import decimales_moneda, monto_json
+from .metricas import registrar_cache
+from .models import MetaFinanciera
+from .sincronizacion import periodo_sin_cambios, version_periodo
+
+CONFIGURACION_POR_DEFECTO = {
+    'SIMULACIONES': 5000,
+    'SIMULACIONES_MAXIMO': 50000,
+    'HISTORIAL_MESES': 24,
+    'HORIZONTE_EXTRA_MESES': 24,  # meses simulados después de la última fecha objetivo
+    'HORIZONTE_MAXIMO_MESES': 240,
+    'PERCENTILES': (10, 50, 90),
+    'SEMILLA': 0,                 # misma semilla: mismo pronóstico para los mismos datos
+}
+
+_historial = {}
+_bloqueo_historial = threading.Lock()
+
+
+def configuracion_pronostico():
+    """Configuración efectiva de PRONOSTICO con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'PRONOSTICO', {})}
+
+
+def _indice_mes(fecha):
+    return fecha.year * 12 + fecha.month - 1
+
+
+def fin_de_mes(indice):
+    """Último día del mes con índice año * 12 + mes - 1"""
+    año, mes = divmod(indice, 12)
+    return date(año, mes + 1, calendar.monthrange(año, mes + 1)[1])
+
+
+def ahorro_mensual(meses, hoy):
+    """
+    Ahorro neto de los últimos `meses` meses cerrados (sin el mes en curso),
+    desde el primer mes con movimientos. Arreglo vacío si no hay historial.
+    """
+    periodos = analisis.periodos_tendencia(meses + 1, hoy)[:-1]
+    filas = analisis.combinar_filas(
+        [list(fuente) for fuente in analisis.fuentes_por_periodo(periodos)], ('año', 'mes')
+    )
+    por_periodo = {
+        (fila['año'], fila['mes']): float((fila['ingresos'] or 0) - (fila['gastos'] or 0)) for fila in filas
+    }
+    netos = np.array([por_periodo.get(periodo, 0.0) for periodo in periodos])
+    con_datos = np.flatnonzero([periodo in por_periodo for periodo in periodos])
+    return netos[con_datos[0]:] if len(con_datos) else netos[:0]
+
+
+def ahorro_mensual_cacheado(meses, hoy):
+    """ahorro_mensual() reutilizado mientras no cambien las transacciones de los meses cerrados"""
+    periodos = analisis.periodos_tendencia(meses + 1, hoy)[:-1]
+    desde = analisis.rango_mes(*periodos[0])[0]
+    hasta = analisis.rango_mes(*periodos[-1])[1] - timedelta(days=1)
+    clave = (meses, _indice_mes(hoy))
+    with _bloqueo_historial:
+        version, netos = _historial.get(clave, (None, None))
+    if netos is not None:
+        version = periodo_sin_cambios(version, desde, hasta)
+    registrar_cache('pronostico_historial', version is not None)
+    if version is None:
+        # La versión se toma antes de leer: lo escrito durante el cálculo invalidará el resultado
+        version = version_periodo(desde, hasta)
+        netos = ahorro_mensual(meses, hoy)
+    with _bloqueo_historial:
+        _historial.clear()
+        _historial[clave] = (version, netos)
+    return netos
+
+
+def simular(netos, faltantes, meses_objetivo, simulaciones, horizonte, semilla=None):
+    """
+    Meses hasta cumplir cada meta en cada trayectoria, matriz (metas x trayectorias).
+    El mes 1 es el cierre del mes en curso; horizonte + 1 significa "no se cumple".
+    """
+    generador = np.random.default_rng(semilla)
+    acumulado = netos[generador.integers(0, len(netos), size=(simulaciones, horizonte))]
+    # Lo ya acumulado no se pierde: un mes negativo retrasa, pero no deshace una meta cumplida
+    np.cumsum(acumulado, axis=1, out=acumulado)
+    np.maximum.accumulate(acumulado, axis=1, out=acumulado)
+
+    necesario = faltantes / np.maximum(meses_objetivo, 1)
+    partes = necesario / necesario.sum()
+    # Ahorro total que hace falta para que la parte de cada meta cubra lo que le falta
+    umbrales = faltantes / partes
+    # Cada trayectoria es creciente: el primer mes que alcanza el umbral es un argmax
+    # por meta, sin materializar la matriz metas x trayectorias x meses
+    cumplimiento = np.empty((len(umbrales), simulaciones), dtype=np.int64)
+    for i, umbral in enumerate(umbrales):
+        alcanzado = acumulado >= umbral
+        cumplimiento[i] = np.where(alcanzado[:, -1], alcanzado.argmax(axis=1) + 1, horizonte + 1)
+    return cumplimiento
+
+
+def pronosticar(metas, netos, hoy, configuracion):
+    """Probabilidad de llegar a tiempo y fechas percentiles de cumplimiento de cada meta"""
+    percentiles = list(configuracion['PERCENTILES'])
+    mes_actual = _indice_mes(hoy)
+    resultados = {}
+    pendientes = []
+    for meta in metas:
+        faltante = float(meta.monto_objetivo - meta.monto_actual)
+        if faltante <= 0:
+            resultados[meta.pk] = (1.0, {p: hoy for p in percentiles}, 0.0)
+            continue
+        # Cierres de mes hasta la fecha objetivo inclusive
+        meses = _indice_mes(meta.fecha_objetivo) - mes_actual
+        if meta.fecha_objetivo == fin_de_mes(_indice_mes(meta.fecha_objetivo)):
+            meses += 1
+        pendientes.append((meta, faltante, meses))
+
+    if pendientes and len(netos) and netos.mean() > 0:
+        faltantes = np.array([faltante for _, faltante, _ in pendientes])
+        meses_objetivo = np.array([meses for _, _, meses in pendientes])
+        horizonte = int(min(
+            max(meses_objetivo.max(), 1) + configuracion['HORIZONTE_EXTRA_MESES'],
+            configuracion['HORIZONTE_MAXIMO_MESES'],
+        ))
+        cumplimiento = simular(
+            netos, faltantes, meses_objetivo, configuracion['SIMULACIONES'], horizonte, configuracion['SEMILLA']
+        )
+        probabilidades = (cumplimiento <= meses_objetivo[:, np.newaxis]).mean(axis=1)
+        meses_percentil = np.percentile(cumplimiento, percentiles, axis=1, method='inverted_cdf').T
+        partes = faltantes / np.maximum(meses_objetivo, 1)
+        aportes = netos.mean() * partes / partes.sum()
+        for (meta, _, _), probabilidad, fila, aporte in zip(pendientes, probabilidades, meses_percentil, aportes):
+            fechas = {
+                p: fin_de_mes(mes_actual + int(m) - 1) if m <= horizonte else None
+                for p, m in zip(percentiles, fila)
+            }
+            resultados[meta.pk] = (float(probabilidad), fechas, float(aporte))
+    else:
+        # Sin historial o sin ahorro promedio positivo no hay trayectoria que llegue
+        for meta, _, _ in pendientes:
+            resultados[meta.pk] = (0.0, {p: None for p in percentiles}, 0.0)
+    return resultados
+
+
+def formatear_pronostico(metas, resultados, netos):
+    decimales = decimales_moneda()
+    datos = []
+    for meta in metas:
+        probabilidad, fechas, aporte = resultados[meta.pk]
+        datos.append({
+            'id': meta.pk,
+            'titulo': meta.titulo,
+            'monto_restante': monto_json(max(meta.monto_objetivo - meta.monto_actual, 0)),
+            'fecha_objetivo': meta.fecha_objetivo.isoformat(),
+            'probabilidad': round(probabilidad, 3),
+            'aporte_mensual_esperado': round(aporte, decimales) if decimales else round(aporte),
+            'fechas_cumplimiento': {
+                f'p{p}': fecha.isoformat() if fecha else None for p, fecha in fechas.items()
+            },
+        })
+    return {
+        'meses_historial': len(netos),
+        'ahorro_mensual_medio': round(float(netos.mean()), decimales or None) if len(netos) else None,
+        'metas': datos,
+    }
+
+
+def pronostico_metas(simulaciones=None):
+    """Pronóstico de todas las metas en progreso"""
+    configuracion = configuracion_pronostico()
+    if simulaciones:
+        configuracion['SIMULACIONES'] = min(simulaciones, configuracion['SIMULACIONES_MAXIMO'])
+    hoy = timezone.localdate()
+    netos = ahorro_mensual_cacheado(configuracion['HISTORIAL_MESES'], hoy)
+    metas = list(MetaFinanciera.objects.filter(estado='en_progreso').order_by('fecha_objetivo', 'pk'))
+    return formatear_pronostico(metas, pronosticar(metas, netos, hoy, configuracion), netos)
@@ -0,0 +1,197 @@
+"""
+Materialización de transacciones recurrentes.
+
+Cada TransaccionRecurrente describe una regla (frecuencia, intervalo, inicio y
+fin). materializar() genera todas las ocurrencias pendientes hasta una fecha
+con un INSERT por lotes (executemany) por cada lote de recurrencias y avanza
+`materializada_hasta`.
+La restricción única (recurrencia, fecha) de Transaccion hace que repetir la
+materialización, o ejecutarla en paralelo, no duplique filas.
+
+Si cambia la regla, descartar_futuras() borra las ocurrencias futuras que la
+regla anterior generó y nadie editó, antes de volver a materializar.
+
+La inserción directa no dispara señales, así que al final se reevalúan los
+presupuestos de los meses con gastos nuevos y se publica un evento por mes
+en el flujo de eventos.
+"""
+import calendar
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F, Max
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from .archivo import años_archivados
+from .models import Transaccion, TransaccionRecurrente
+
+TAMAÑO_LOTE = 1000
+
+# frecuencia: (unidad, cantidad por intervalo)
+PASOS = {
+    'semanal': ('dias', 7),
+    'quincenal': ('dias', 14),
+    'mensual': ('meses', 1),
+    'anual': ('meses', 12),
+}
+
+
+def sumar_meses(fecha, meses):
+    """Suma meses conservando el día (ajustado al último día si el mes es más corto)"""
+    indice = fecha.year * 12 + fecha.month - 1 + meses
+    año, mes = indice // 12, indice % 12 + 1
+    return fecha.replace(year=año, month=mes, day=min(fecha.day, calendar.monthrange(año, mes)[1]))
+
+
+def ocurrencias(recurrencia, desde, hasta):
+    """Fechas de la recurrencia dentro de [desde, hasta], contadas siempre desde fecha_inicio"""
+    if recurrencia.fecha_fin and recurrencia.fecha_fin < hasta:
+        hasta = recurrencia.fecha_fin
+    unidad, cantidad = PASOS[recurrencia.frecuencia]
+    paso = cantidad * max(1, recurrencia.intervalo)
+    inicio = recurrencia.fecha_inicio
+
+    if unidad == 'dias':
+        # Salta directamente a la primera ocurrencia >= desde
+        n = max(0, -(-(desde - inicio).days // paso))
+        fecha = inicio + timedelta(days=n * paso)
+        while fecha <= hasta:
+            yield fecha
+            n += 1
+            fecha = inicio + timedelta(days=n * paso)
+    else:
+        n = max(0, ((desde.year - inicio.year) * 12 + desde.month - inicio.month) // paso - 1)
+        fecha = sumar_meses(inicio, n * paso)
+        while fecha <= hasta:
+            if fecha >= desde:
+                yield fecha
+            n += 1
+            fecha = sumar_meses(inicio, n * paso)
+
+
+def pendientes(hasta, ids=None):
+    """Recurrencias activas con ocurrencias aún no materializadas hasta la fecha dada"""
+    recurrencias = TransaccionRecurrente.objects.filter(activa=True, fecha_inicio__lte=hasta).exclude(
+        materializada_hasta__gte=hasta
+    )
+    if ids is not None:
+        recurrencias = recurrencias.filter(pk__in=ids)
+    return recurrencias.order_by('pk')
+
+
+def _ocurrencias_pendientes(recurrencias, hasta, archivados):
+    """(recurrencia, fecha) de cada ocurrencia posterior a lo ya materializado"""
+    for recurrencia in recurrencias:
+        desde = recurrencia.fecha_inicio
+        if recurrencia.materializada_hasta:
+            desde = max(desde, recurrencia.materializada_hasta + timedelta(days=1))
+        for fecha in ocurrencias(recurrencia, desde, hasta):
+            # Los años archivados están cerrados: no se generan filas en ellos
+            if fecha.year not in archivados:
+                yield recurrencia, fecha
+
+
+def descartar_futuras(recurrencia, hoy=None):
+    """
+    Borra las ocurrencias de la recurrencia posteriores a hoy que siguen como
+    se generaron (sin editar ni etiquetar). Devuelve la cantidad borrada.
+    """
+    futuras = Transaccion.objects.filter(
+        recurrencia=recurrencia,
+        fecha__gt=hoy or timezone.localdate(),
+        # La materialización escribe la misma marca de tiempo en ambas; guardar la transacción la cambia
+        fecha_actualizacion=F('fecha_creacion'),
+        etiquetas__isnull=True,
+    )
+    # delete() con señales: descuenta el gasto de los presupuestos y publica la eliminación
+    return futuras.delete()[1].get(Transaccion._meta.label, 0)
+
+
+COLUMNAS = ['descripcion', 'monto', 'tipo', 'categoria', 'fecha', 'notas', 'recurrencia',
+            'fecha_creacion', 'fecha_actualizacion']
+
+
+def _sentencia_insercion(conexion):
+    """INSERT que ignora las ocurrencias ya existentes (restricción única recurrencia/fecha)"""
+    campos = [Transaccion._meta.get_field(nombre) for nombre in COLUMNAS]
+    return '{} {} ({}) VALUES ({}) {}'.format(
+        conexion.ops.insert_statement(on_conflict=OnConflict.IGNORE),
+        conexion.ops.quote_name(Transaccion._meta.db_table),
+        ', '.join(conexion.ops.quote_name(campo.column) for campo in campos),
+        ', '.join(['%s'] * len(campos)),
+        conexion.ops.on_conflict_suffix_sql(campos, OnConflict.IGNORE, None, None),
+    ).strip()
+
+
+def materializar(hasta=None, ids=None, tamaño_lote=TAMAÑO_LOTE):
+    """
+    Genera las transacciones de las recurrencias (todas o las de `ids`) hasta
+    la fecha `hasta` (hoy por defecto). Devuelve un resumen con la cantidad de
+    recurrencias procesadas, transacciones creadas y meses reevaluados.
+    """
+    from .alertas import reevaluar_mes
+    from .eventos import publicar_lote
+    from .sincronizacion import registrar_consulta
+
+    hasta = hasta or timezone.localdate()
+    archivados = set(años_archivados())
+    procesadas = creadas = 0
+    meses = set()
+    meses_con_filas = set()
+
+    # Como en generar_datos: valores ya adaptados a la base y executemany, sin instanciar modelos
+    conexion = connections[DEFAULT_DB_ALIAS]
+    sql = _sentencia_insercion(conexion)
+    campo = Transaccion._meta.get_field
+    ahora = campo('fecha_creacion').get_db_prep_value(timezone.now(), conexion)
+    fechas_db = {}
+
+    recurrencias = list(pendientes(hasta, ids))
+    for inicio in range(0, len(recurrencias), tamaño_lote):
+        lote = recurrencias[inicio:inicio + tamaño_lote]
+        nuevas = list(_ocurrencias_pendientes(lote, hasta, archivados))
+        if nuevas:
+            # Ocurrencias ya existentes (materializadas a mano o por otro proceso)
+            existentes = set(
+                Transaccion.objects.filter(
+                    recurrencia__in=lote,
+                    fecha__gte=min(fecha for _, fecha in nuevas),
+                    fecha__lte=hasta,
+                ).values_list('recurrencia_id', 'fecha')
+            )
+            nuevas = [(r, fecha) for r, fecha in nuevas if (r.pk, fecha) not in existentes]
+
+        valores = {
+            r.pk: (r.descripcion, campo('monto').get_db_prep_save(r.monto, conexion), r.tipo, r.categoria_id)
+            for r in lote
+        }
+        filas = []
+        for recurrencia, fecha in nuevas:
+            if fecha not in fechas_db:
+                fechas_db[fecha] = campo('fecha').get_db_prep_value(fecha, conexion)
+            filas.append((
+                *valores[recurrencia.pk], fechas_db[fecha], recurrencia.notas, recurrencia.pk, ahora, ahora
+            ))
+
+        insertadas = 0
+        with transaction.atomic(using=conexion.alias):
+            if filas:
+                ultimo = Transaccion.objects.aggregate(ultimo=Max('pk'))['ultimo'] or 0
+                with conexion.cursor() as cursor:
+                    cursor.executemany(sql, filas)
+                # ON CONFLICT IGNORE descarta las ocurrencias ya existentes: se cuentan las filas nuevas
+                insertadas = registrar_consulta(Transaccion.objects.filter(pk__gt=ultimo, recurrencia__in=lote))
+            TransaccionRecurrente.objects.filter(pk__in=[r.pk for r in lote]).update(materializada_hasta=hasta)
+
+        procesadas += len(lote)
+        creadas += insertadas
+        meses.update(
+            (fecha.year, fecha.month) for r, fecha in nuevas if r.tipo == 'gasto' and r.categoria_id
+        )
+        meses_con_filas.update((fecha.year, fecha.month) for _, fecha in nuevas)
+
+    for año, mes in sorted(meses):
+        reevaluar_mes(año, mes)
+    publicar_lote('transaccion', meses_con_filas)
+    return {'recurrencias': procesadas, 'transacciones': creadas, 'meses_reevaluados': len(meses)}
@@ -0,0 +1,182 @@
+"""
+Enrutamiento de lecturas a una réplica de solo lectura.
+
+RouterReplica manda a REPLICAS['ALIAS'] las lecturas de los modelos de
+REPLICAS['APPS'] solo dentro de un contexto de réplica: las vistas marcadas
+con @en_replica (análisis) y, si REPLICAS['TODOS_LOS_GET'] está activo, todas
+las peticiones GET/HEAD (ReplicaMiddleware). Las escrituras van siempre al
+primario y, desde la primera escritura, el resto de la petición también lee
+del primario (lectura tras escritura).
+
+Si la réplica no está configurada o no responde se lee del primario; la
+disponibilidad se vuelve a comprobar cada REPLICAS['REINTENTO'] segundos.
+
+Localmente la réplica puede ser una copia de db.sqlite3 que se refresca
+periódicamente con `manage.py refrescar_replica`.
+"""
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'ALIAS': 'replica',
+    'TODOS_LOS_GET': False,
+    'REINTENTO': 30,
+    'APPS': ['tareas'],
+    # Modelos que siempre se leen del primario (p. ej. el estado de los trabajos se consulta en vivo)
+    'MODELOS_PRIMARIO': ['tareas.trabajo'],
+}
+
+
+def configuracion_replicas():
+    """Configuración efectiva de REPLICAS con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'REPLICAS', {})}
+
+
+class EstadoPeticion:
+    """Estado de enrutamiento de la petición en curso"""
+
+    __slots__ = ('replica', 'escribio')
+
+    def __init__(self, replica=False):
+        self.replica = replica
+        self.escribio = False
+
+
+# Al ser una ContextVar se propaga a los hilos donde sync_to_async ejecuta el ORM
+_peticion = contextvars.ContextVar('peticion_replica', default=None)
+
+# alias: (disponible, instante de la última comprobación)
+_disponibilidad = {}
+
+
+@contextmanager
+def contexto_peticion(replica=False):
+    """Estado nuevo de enrutamiento para una petición (lo usa ReplicaMiddleware)"""
+    token = _peticion.set(EstadoPeticion(replica))
+    try:
+        yield
+    finally:
+        _peticion.reset(token)
+
+
+@contextmanager
+def estado_propio():
+    """
+    Copia del estado de la petición en curso para una subpetición (lotes.py):
+    las subpeticiones concurrentes no comparten el estado mutable, de modo que
+    leyendo_de_replica() o una escritura en una no cambia el enrutamiento de otra.
+    """
+    estado = _peticion.get()
+    copia = None
+    if estado is not None:
+        copia = EstadoPeticion(estado.replica)
+        copia.escribio = estado.escribio
+    token = _peticion.set(copia)
+    try:
+        yield
+    finally:
+        _peticion.reset(token)
+
+
+@contextmanager
+def leyendo_de_replica():
+    """Lee de la réplica dentro del bloque (salvo que la petición ya haya escrito)"""
+    estado = _peticion.get()
+    token = None
+    if estado is None:
+        token = _peticion.set(EstadoPeticion())
+        estado = _peticion.get()
+    anterior, estado.replica = estado.replica, True
+    try:
+        yield
+    finally:
+        estado.replica = anterior
+        if token is not None:
+            _peticion.reset(token)
+
+
+def en_replica(vista):
+    """Decorador de vistas (síncronas o asíncronas) y acciones cuyas lecturas van a la réplica"""
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(*args, **kwargs):
+            with leyendo_de_replica():
+                return await vista(*args, **kwargs)
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        with leyendo_de_replica():
+            return vista(*args, **kwargs)
+    return envoltura
+
+
+def replica_disponible(alias, reintento):
+    """Comprueba (como mucho cada `reintento` segundos) que la réplica acepta consultas"""
+    if alias not in settings.DATABASES:
+        return False
+    ahora = time.monotonic()
+    disponible, comprobado = _disponibilidad.get(alias, (False, None))
+    if comprobado is not None and ahora - comprobado < reintento:
+        return disponible
+
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        disponible = True
+    except DatabaseError as exc:
+        connections[alias].close()
+        if _disponibilidad.get(alias, (True,))[0]:
+            logger.warning('Réplica %s no disponible, se lee del primario: %s', alias, exc)
+        disponible = False
+    _disponibilidad[alias] = (disponible, ahora)
+    return disponible
+
+
+class RouterReplica:
+    """Router de base de datos: lecturas de análisis a la réplica, escrituras al primario"""
+
+    def __init__(self):
+        configuracion = configuracion_replicas()
+        self.alias = configuracion['ALIAS']
+        self.reintento = configuracion['REINTENTO']
+        self.apps = set(configuracion['APPS'])
+        self.modelos_primario = {etiqueta.lower() for etiqueta in configuracion['MODELOS_PRIMARIO']}
+
+    def db_for_read(self, model, **hints):
+        estado = _peticion.get()
+        if estado is None or not estado.replica or estado.escribio:
+            return None
+        opciones = model._meta
+        if opciones.app_label not in self.apps or opciones.label_lower in self.modelos_primario:
+            return None
+        if not replica_disponible(self.alias, self.reintento):
+            return DEFAULT_DB_ALIAS
+        return self.alias
+
+    def db_for_write(self, model, **hints):
+        estado = _peticion.get()
+        if estado is not None:
+            estado.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica es una copia del primario: los objetos leídos de ella se relacionan con él
+        bases = {DEFAULT_DB_ALIAS, self.alias}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == self.alias:
+            return False
+        return None
@@ -1,5 +1,14 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Categoria, Presupuesto, Transaccion, MetaFinanciera, LeccionEducativa
+from . import recurrencias
+from .archivo import esta_archivado
+from .campos import CampoMonto
+from .jerarquia import validar_padre
+from .models import (
+    Categoria, Presupuesto, Transaccion, MetaFinanciera, LeccionEducativa,
+    AlertaPresupuesto, Trabajo, TransaccionRecurrente, Etiqueta
+)
 
 
 class CategoriaSerializer(serializers.ModelSerializer):
@@ -7,12 +16,29 @@ class CategoriaSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Categoria
-        fields = ['id', 'nombre', 'descripcion', 'tipo', 'icono', 'color', 'fecha_creacion']
+        fields = ['id', 'nombre', 'descripcion', 'tipo', 'icono', 'color', 'padre', 'fecha_creacion']
+    
+    def validate(self, attrs):
+        tipo = attrs.get('tipo', getattr(self.instance, 'tipo', None))
+        padre = attrs.get('padre', getattr(self.instance, 'padre', None))
+        error = validar_padre(getattr(self.instance, 'pk', None), tipo, padre)
+        if error:
+            raise serializers.ValidationError({'padre': error})
+        return attrs
+
+
+class EtiquetaSerializer(serializers.ModelSerializer):
+    """Serializador para el modelo Etiqueta"""
+    
+    class Meta:
+        model = Etiqueta
+        fields = ['id', 'nombre', 'color', 'fecha_creacion']
 
 
 class PresupuestoSerializer(serializers.ModelSerializer):
     """Serializador para el modelo Presupuesto"""
     categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
+    monto_limite = CampoMonto()
     gasto_actual = serializers.ReadOnlyField()
     porcentaje_usado = serializers.ReadOnlyField()
     monto_restante = serializers.ReadOnlyField()
@@ -32,19 +58,79 @@ class TransaccionSerializer(serializers.ModelSerializer):
     """Serializador para el modelo Transaccion"""
     categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
     categoria_icono = serializers.CharField(source='categoria.icono', read_only=True)
+    monto = CampoMonto()
+    # Declarado explícitamente: DRF deja de solo lectura las relaciones con modelo intermedio
+    etiquetas = serializers.PrimaryKeyRelatedField(many=True, queryset=Etiqueta.objects.all(), required=False)
     
     class Meta:
         model = Transaccion
         fields = [
             'id', 'descripcion', 'monto', 'tipo', 'categoria',
-            'categoria_nombre', 'categoria_icono',
-            'fecha', 'notas', 'fecha_creacion', 'fecha_actualizacion'
+            'categoria_nombre', 'categoria_icono', 'etiquetas',
+            'fecha', 'notas', 'recurrencia', 'fecha_creacion', 'fecha_actualizacion'
         ]
-        read_only_fields = ['fecha_creacion', 'fecha_actualizacion']
+        read_only_fields = ['recurrencia', 'fecha_creacion', 'fecha_actualizacion']
+    
+    def validate_fecha(self, value):
+        if esta_archivado(value.year):
+            raise serializers.ValidationError(
+                f'El año {value.year} está archivado; restáurelo para registrar transacciones en él'
+            )
+        return value
+
+
+class TransaccionRecurrenteSerializer(serializers.ModelSerializer):
+    """Serializador para el modelo TransaccionRecurrente"""
+    categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
+    monto = CampoMonto()
+    
+    # Cambiar la regla obliga a revisar de nuevo todo el calendario (las fechas ya
+    # generadas no se duplican gracias a la restricción única por ocurrencia); las
+    # ocurrencias futuras sin editar de la regla anterior se descartan y se regeneran
+    CAMPOS_REGLA = ('frecuencia', 'intervalo', 'fecha_inicio', 'fecha_fin')
+    
+    class Meta:
+        model = TransaccionRecurrente
+        fields = [
+            'id', 'descripcion', 'monto', 'tipo', 'categoria', 'categoria_nombre',
+            'frecuencia', 'intervalo', 'fecha_inicio', 'fecha_fin', 'activa', 'notas',
+            'materializada_hasta', 'fecha_creacion', 'fecha_actualizacion'
+        ]
+        read_only_fields = ['materializada_hasta', 'fecha_creacion', 'fecha_actualizacion']
+    
+    def validate(self, attrs):
+        fecha_inicio = attrs.get('fecha_inicio', getattr(self.instance, 'fecha_inicio', None))
+        fecha_fin = attrs.get('fecha_fin', getattr(self.instance, 'fecha_fin', None))
+        if fecha_fin and fecha_inicio and fecha_fin < fecha_inicio:
+            raise serializers.ValidationError({'fecha_fin': 'Debe ser posterior a la fecha de inicio'})
+        if attrs.get('intervalo', 1) < 1:
+            raise serializers.ValidationError({'intervalo': 'Debe ser al menos 1'})
+        return attrs
+    
+    def update(self, instance, validated_data):
+        if not any(
+            campo in validated_data and validated_data[campo] != getattr(instance, campo)
+            for campo in self.CAMPOS_REGLA
+        ):
+            return super().update(instance, validated_data)
+
+        hoy = timezone.localdate()
+        materializada_hasta = instance.materializada_hasta
+        with transaction.atomic():
+            recurrencias.descartar_futuras(instance, hoy)
+            instance.materializada_hasta = None
+            instance = super().update(instance, validated_data)
+        if materializada_hasta and materializada_hasta > hoy and instance.activa:
+            # Regenera con la regla nueva el tramo futuro que ya estaba materializado
+            recurrencias.materializar(materializada_hasta, [instance.pk])
+            instance.refresh_from_db(fields=['materializada_hasta'])
+        return instance
 
 
 class MetaFinancieraSerializer(serializers.ModelSerializer):
     """Serializador para el modelo MetaFinanciera"""
+    monto_objetivo = CampoMonto()
+    monto_actual = CampoMonto(required=False)
     porcentaje_completado = serializers.ReadOnlyField()
     monto_restante = serializers.ReadOnlyField()
     dias_restantes = serializers.ReadOnlyField()
@@ -70,3 +156,35 @@ class LeccionEducativaSerializer(serializers.ModelSerializer):
             'duracion_minutos', 'orden', 'activa', 'fecha_creacion'
         ]
         read_only_fields = ['fecha_creacion']
+
+
+class AlertaPresupuestoSerializer(serializers.ModelSerializer):
+    """Serializador para el modelo AlertaPresupuesto"""
+    presupuesto_nombre = serializers.CharField(source='presupuesto.nombre', read_only=True)
+    categoria_nombre = serializers.CharField(source='presupuesto.categoria.nombre', read_only=True)
+    monto_limite = CampoMonto(source='presupuesto.monto_limite', read_only=True)
+    gasto = CampoMonto(read_only=True)
+    mes = serializers.IntegerField(source='presupuesto.mes', read_only=True)
+    año = serializers.IntegerField(source='presupuesto.año', read_only=True)
+    
+    class Meta:
+        model = AlertaPresupuesto
+        fields = [
+            'id', 'presupuesto', 'presupuesto_nombre', 'categoria_nombre',
+            'mes', 'año', 'umbral', 'porcentaje', 'gasto', 'monto_limite',
+            'leida', 'fecha_creacion'
+        ]
+        read_only_fields = fields
+
+
+class TrabajoSerializer(serializers.ModelSerializer):
+    """Serializador de solo lectura para el estado de un Trabajo"""
+    
+    class Meta:
+        model = Trabajo
+        fields = [
+            'id', 'tipo', 'parametros', 'estado', 'prioridad', 'intentos',
+            'max_intentos', 'progreso', 'mensaje', 'resultado', 'error',
+            'disponible_desde', 'fecha_creacion', 'fecha_inicio', 'fecha_fin'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,178 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import alertas, eventos, jerarquia, sincronizacion
+from .middleware import observar_consultas
+from .models import (
+    Categoria, Etiqueta, MetaFinanciera, Presupuesto, RegistroCambio, Transaccion, TransaccionRecurrente
+)
+
+
+@receiver(connection_created)
+def instalar_observador_consultas(sender, connection, **kwargs):
+    """Instala el execute_wrapper de instrumentación en cada conexión nueva"""
+    if observar_consultas not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observar_consultas)
+
+
+@receiver(pre_save, sender=Categoria)
+def guardar_padre_anterior_categoria(sender, instance, raw=False, **kwargs):
+    """Conserva el padre y los ancestros previos para mover el subárbol en la tabla de clausura"""
+    instance._ancestros_anteriores = None
+    if raw or instance._state.adding:
+        return
+    padre_anterior = Categoria.objects.filter(pk=instance.pk).values_list('padre_id', flat=True).first()
+    if padre_anterior != instance.padre_id:
+        if instance.padre_id is not None and jerarquia.en_subarbol(instance.pk, instance.padre_id):
+            raise ValueError('Una categoría no puede moverse dentro de su propio subárbol')
+        instance._ancestros_anteriores = list(jerarquia.ancestros(instance.pk).values_list('ancestro_id', flat=True))
+
+
+@receiver(post_save, sender=Categoria)
+def actualizar_jerarquia_categoria(sender, instance, created=False, raw=False, **kwargs):
+    """Agrega las filas de la categoría nueva o mueve su subárbol, y reevalúa los presupuestos afectados"""
+    if raw:
+        return
+    if created:
+        jerarquia.insertar(instance)
+        return
+    ancestros_anteriores = getattr(instance, '_ancestros_anteriores', None)
+    if ancestros_anteriores is None:
+        return
+    jerarquia.mover(instance.pk, instance.padre_id)
+    # Los presupuestos de los ancestros anteriores y nuevos ganan o pierden el gasto del subárbol
+    ancestros_nuevos = jerarquia.ancestros(instance.pk).values_list('ancestro_id', flat=True)
+    alertas.reevaluar_categorias(set(ancestros_anteriores) | set(ancestros_nuevos))
+
+
+@receiver(pre_delete, sender=Categoria)
+def desprender_categoria_eliminada(sender, instance, **kwargs):
+    """Las subcategorías pasan a ser raíces (UPDATE sin señales) y se separan de los ancestros de la eliminada"""
+    instance._ancestros_anteriores = list(
+        jerarquia.ancestros(instance.pk).exclude(ancestro_id=instance.pk).values_list('ancestro_id', flat=True)
+    )
+    sincronizacion.registrar_consulta(Categoria.objects.filter(padre=instance))
+    jerarquia.desprender_subcategorias(instance.pk)
+
+
+@receiver(post_delete, sender=Categoria)
+def reevaluar_ancestros_categoria_eliminada(sender, instance, **kwargs):
+    """Los presupuestos de los ancestros dejan de incluir el subárbol de la categoría eliminada"""
+    if getattr(instance, '_ancestros_anteriores', None):
+        alertas.reevaluar_categorias(instance._ancestros_anteriores)
+
+
+@receiver(pre_save, sender=Transaccion)
+def guardar_estado_anterior_transaccion(sender, instance, raw=False, **kwargs):
+    """Conserva los valores previos para calcular el delta del gasto"""
+    if raw or instance._state.adding:
+        instance._estado_anterior = None
+        return
+    instance._estado_anterior = (
+        Transaccion.objects.filter(pk=instance.pk)
+        .values('tipo', 'categoria_id', 'fecha', 'monto')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Transaccion)
+def actualizar_presupuestos_transaccion(sender, instance, raw=False, **kwargs):
+    """Aplica el delta de la transacción guardada a los presupuestos afectados"""
+    if raw:
+        return
+    alertas.registrar_cambio_transaccion(
+        getattr(instance, '_estado_anterior', None),
+        alertas.estado_transaccion(instance)
+    )
+
+
+@receiver(post_delete, sender=Transaccion)
+def descontar_transaccion_eliminada(sender, instance, **kwargs):
+    """Resta la transacción eliminada de los presupuestos afectados"""
+    alertas.registrar_cambio_transaccion(alertas.estado_transaccion(instance), None)
+
+
+@receiver(pre_save, sender=Presupuesto)
+def inicializar_gasto_presupuesto(sender, instance, raw=False, **kwargs):
+    """Calcula el gasto registrado al crear el presupuesto o cambiar su categoría/mes"""
+    instance._porcentaje_anterior = None
+    if raw:
+        return
+
+    anterior = None
+    if not instance._state.adding:
+        anterior = (
+            Presupuesto.objects.filter(pk=instance.pk)
+            .values('categoria_id', 'mes', 'año', 'monto_limite', 'gasto_registrado')
+            .first()
+        )
+
+    clave = (instance.categoria_id, int(instance.año), int(instance.mes))
+    if anterior is None or clave != (anterior['categoria_id'], anterior['año'], anterior['mes']):
+        instance.gasto_registrado = alertas.calcular_gasto(*clave)
+        instance._porcentaje_anterior = 0
+    else:
+        # El valor en memoria puede estar desactualizado respecto a los deltas ya aplicados
+        instance.gasto_registrado = anterior['gasto_registrado']
+        instance._porcentaje_anterior = alertas.calcular_porcentaje(
+            anterior['gasto_registrado'], anterior['monto_limite']
+        )
+
+
+@receiver(post_save, sender=Presupuesto)
+def evaluar_umbrales_presupuesto(sender, instance, raw=False, **kwargs):
+    """Registra alertas si el presupuesto nuevo o modificado ya supera algún umbral"""
+    porcentaje_anterior = getattr(instance, '_porcentaje_anterior', None)
+    if raw or porcentaje_anterior is None:
+        return
+    alertas.evaluar_presupuesto(instance, porcentaje_anterior)
+
+
+@receiver(post_save, sender=Transaccion)
+@receiver(post_save, sender=Presupuesto)
+@receiver(post_save, sender=MetaFinanciera)
+def publicar_guardado(sender, instance, created=False, raw=False, **kwargs):
+    """Publica el cambio en el flujo de eventos (/api/eventos/)"""
+    if raw:
+        return
+    eventos.publicar_cambio(instance, 'creado' if created else 'actualizado')
+
+
+@receiver(post_delete, sender=Transaccion)
+@receiver(post_delete, sender=Presupuesto)
+@receiver(post_delete, sender=MetaFinanciera)
+def publicar_eliminacion(sender, instance, **kwargs):
+    """Publica la eliminación en el flujo de eventos (/api/eventos/)"""
+    eventos.publicar_cambio(instance, 'eliminado')
+
+
+@receiver(post_save, sender=Categoria)
+@receiver(post_save, sender=Etiqueta)
+@receiver(post_save, sender=Transaccion)
+@receiver(post_save, sender=Presupuesto)
+@receiver(post_save, sender=MetaFinanciera)
+def registrar_guardado(sender, instance, raw=False, **kwargs):
+    """Anota la fila guardada en el registro de cambios (/api/sync/)"""
+    if raw:
+        return
+    sincronizacion.registrar(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Categoria)
+@receiver(post_delete, sender=Etiqueta)
+@receiver(post_delete, sender=Transaccion)
+@receiver(post_delete, sender=Presupuesto)
+@receiver(post_delete, sender=MetaFinanciera)
+def registrar_eliminacion(sender, instance, **kwargs):
+    """Anota la fila eliminada (tombstone) en el registro de cambios (/api/sync/)"""
+    sincronizacion.registrar(sender, [instance.pk], RegistroCambio.ELIMINADO)
+
+
+@receiver(pre_delete, sender=Categoria)
+@receiver(pre_delete, sender=TransaccionRecurrente)
+@receiver(pre_delete, sender=Etiqueta)
+def registrar_transacciones_desvinculadas(sender, instance, **kwargs):
+    """Las transacciones pierden la categoría, recurrencia o etiqueta con un UPDATE/DELETE sin señales"""
+    campo = {Categoria: 'categoria', TransaccionRecurrente: 'recurrencia', Etiqueta: 'etiquetas'}[sender]
+    sincronizacion.registrar_consulta(Transaccion.objects.filter(**{campo: instance}))
@@ -0,0 +1,203 @@
+"""
+Sincronización incremental: "¿qué cambió desde X?".
+
+Cada escritura de Categoria, Etiqueta, Transaccion, Presupuesto o MetaFinanciera agrega
+una fila a RegistroCambio en la misma transacción (señales para las
+escrituras de una fila y registrar()/registrar_consulta() para las masivas).
+El id autoincremental del registro es la secuencia de cambios y el token que
+usan los clientes:
+
+    GET /api/sync/?since=<token>&limite=500
+
+devuelve las filas creadas o actualizadas y los ids eliminados (tombstones)
+después del token, de a una página ordenada por secuencia, más el token de
+la página siguiente. El costo depende de la cantidad de cambios y no del
+tamaño de las tablas: se recorre el índice de la clave primaria del registro
+y se cargan las filas cambiadas por pk.
+
+Sin `since`, o con un token anterior a lo que conserva el registro (ver
+`manage.py purgar_cambios`), se responde `reinicio`: el cliente recarga las
+colecciones completas y continúa desde el token devuelto.
+"""
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from .archivo import años_archivados
+from .models import Categoria, Etiqueta, MetaFinanciera, Presupuesto, RegistroCambio, Transaccion
+from .serializers import (
+    CategoriaSerializer, EtiquetaSerializer, MetaFinancieraSerializer, PresupuestoSerializer,
+    TransaccionSerializer
+)
+
+CONFIGURACION_POR_DEFECTO = {
+    'LIMITE': 500,
+    'LIMITE_MAXIMO': 5000,
+    'DIAS_RETENCION': 90,
+}
+
+# nombre: (modelo, serializador, relaciones a cargar con select_related, con prefetch_related)
+MODELOS = {
+    'categoria': (Categoria, CategoriaSerializer, (), ()),
+    'etiqueta': (Etiqueta, EtiquetaSerializer, (), ()),
+    'transaccion': (Transaccion, TransaccionSerializer, ('categoria',), ('etiquetas',)),
+    'presupuesto': (Presupuesto, PresupuestoSerializer, ('categoria',), ()),
+    'metafinanciera': (MetaFinanciera, MetaFinancieraSerializer, (), ()),
+}
+
+
+def configuracion_sincronizacion():
+    """Configuración efectiva de SINCRONIZACION con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'SINCRONIZACION', {})}
+
+
+def registrar(modelo, ids, operacion=RegistroCambio.GUARDADO):
+    """Registra el cambio de las filas `ids` del modelo (nombre o clase)"""
+    nombre = modelo if isinstance(modelo, str) else modelo._meta.model_name
+    RegistroCambio.objects.bulk_create(
+        [RegistroCambio(modelo=nombre, objeto_id=pk, operacion=operacion) for pk in ids],
+        batch_size=1000,
+    )
+
+
+def registrar_consulta(queryset, operacion=RegistroCambio.GUARDADO):
+    """Registra como cambiadas las filas del queryset con un INSERT ... SELECT (sin traerlas); devuelve cuántas"""
+    alias = router.db_for_write(RegistroCambio)
+    conexion = connections[alias]
+    opciones = RegistroCambio._meta
+    columnas = [opciones.get_field(nombre).column for nombre in ('modelo', 'objeto_id', 'operacion', 'fecha')]
+    subconsulta, parametros = queryset.order_by().values('pk').query.sql_with_params()
+    fecha = opciones.get_field('fecha').get_db_prep_value(timezone.now(), conexion)
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {} ({}) SELECT %s, sub.{}, %s, %s FROM ({}) sub'.format(
+                conexion.ops.quote_name(opciones.db_table),
+                ', '.join(conexion.ops.quote_name(c) for c in columnas),
+                conexion.ops.quote_name(queryset.model._meta.pk.column),
+                subconsulta,
+            ),
+            (queryset.model._meta.model_name, operacion, fecha, *parametros),
+        )
+        return cursor.rowcount
+
+
+def registrar_reinicio():
+    """Invalida todos los tokens: los clientes deberán recargar las colecciones completas"""
+    RegistroCambio.objects.all().delete()
+    RegistroCambio.objects.create(modelo='*', operacion=RegistroCambio.REINICIO)
+
+
+def token_actual():
+    return RegistroCambio.objects.aggregate(ultimo=Max('pk'))['ultimo'] or 0
+
+
+def requiere_reinicio(token):
+    """True si el registro ya no conserva todos los cambios posteriores al token"""
+    primero = RegistroCambio.objects.aggregate(primero=Min('pk'))['primero']
+    if primero is None:
+        return token != 0
+    registro_primero = RegistroCambio.objects.only('operacion').get(pk=primero)
+    # El primer registro conservado (o el marcador de reinicio) es la base del registro
+    if registro_primero.operacion == RegistroCambio.REINICIO:
+        return token < primero
+    return token < primero - 1
+
+
+def version_periodo(desde, hasta):
+    """
+    Versión de las transacciones con fecha en [desde, hasta] para cachés de
+    resultados derivados (pronóstico, anomalías): el token actual y una huella
+    (años archivados, cantidad e id máximo de la tabla activa en el período,
+    leídos del índice cubriente (fecha, id)). Ver periodo_sin_cambios().
+    """
+    token = token_actual()
+    datos = Transaccion.objects.filter(fecha__gte=desde, fecha__lte=hasta).aggregate(
+        cantidad=Count('id'), ultimo=Max('id')
+    )
+    return token, (tuple(años_archivados()), datos['cantidad'], datos['ultimo'])
+
+
+def periodo_sin_cambios(version, desde, hasta, actual=None):
+    """
+    Versión actual si las transacciones del período no cambiaron desde `version`
+    (de version_periodo()), o None. Las escrituras de otros modelos o de
+    transacciones fuera del período no cuentan: altas, bajas y filas que salen
+    del período cambian la huella, y las modificadas (o que entran) quedan en el
+    registro después del token con su fecha actual dentro del período.
+    `actual` evita leer de nuevo la huella si ya se tiene la versión actual.
+    """
+    token, huella = version
+    actual = actual or version_periodo(desde, hasta)
+    if actual[1] != huella or requiere_reinicio(token):
+        return None
+    if actual[0] != token and Transaccion.objects.filter(
+        fecha__gte=desde, fecha__lte=hasta,
+        pk__in=RegistroCambio.objects.filter(pk__gt=token, modelo='transaccion').values('objeto_id'),
+    ).exists():
+        return None
+    return actual
+
+
+def cambios_desde(token, limite):
+    """
+    Página de cambios posteriores a `token`: (cambios, eliminados, token siguiente, hay más).
+    Dentro de la página cada fila aparece una sola vez con su última operación.
+    """
+    registros = list(
+        RegistroCambio.objects.filter(pk__gt=token).order_by('pk')
+        .values_list('pk', 'modelo', 'objeto_id', 'operacion')[:limite + 1]
+    )
+    hay_mas = len(registros) > limite
+    registros = registros[:limite]
+
+    ultima_operacion = {}
+    for _, modelo, objeto_id, operacion in registros:
+        if modelo in MODELOS:
+            ultima_operacion[(modelo, objeto_id)] = operacion
+
+    cambios, eliminados = {}, {}
+    for nombre, (modelo, serializador, relaciones, prefetch) in MODELOS.items():
+        guardados = sorted(pk for (m, pk), op in ultima_operacion.items() if m == nombre and op == RegistroCambio.GUARDADO)
+        borrados = sorted(pk for (m, pk), op in ultima_operacion.items() if m == nombre and op == RegistroCambio.ELIMINADO)
+        if guardados:
+            # Una fila guardada que ya no existe tiene su eliminación más adelante en el registro
+            filas = (
+                modelo.objects.filter(pk__in=guardados)
+                .select_related(*relaciones).prefetch_related(*prefetch).order_by('pk')
+            )
+            cambios[nombre] = serializador(filas, many=True).data
+        if borrados:
+            eliminados[nombre] = borrados
+
+    siguiente = registros[-1][0] if registros else token
+    return cambios, eliminados, siguiente, hay_mas
+
+
+@api_view(['GET'])
+def sincronizar(request):
+    """Cambios y eliminaciones posteriores al token `since`, paginados por secuencia"""
+    configuracion = configuracion_sincronizacion()
+    try:
+        limite = min(int(request.query_params.get('limite', configuracion['LIMITE'])), configuracion['LIMITE_MAXIMO'])
+        desde = request.query_params.get('since')
+        token = int(desde) if desde not in (None, '') else None
+    except ValueError:
+        return Response({'error': '"since" y "limite" deben ser enteros'}, status=status.HTTP_400_BAD_REQUEST)
+    if limite < 1 or (token is not None and token < 0):
+        return Response({'error': '"since" y "limite" deben ser positivos'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if token is None or requiere_reinicio(token):
+        return Response({'reinicio': True, 'token': token_actual()})
+
+    cambios, eliminados, siguiente, hay_mas = cambios_desde(token, limite)
+    return Response({
+        'reinicio': False,
+        'token': siguiente,
+        'hay_mas': hay_mas,
+        'cambios': cambios,
+        'eliminados': eliminados,
+    })
@@ -0,0 +1,360 @@
+"""
+Cola de trabajos en segundo plano sin broker externo.
+
+Los trabajos se guardan en la tabla Trabajo y los ejecuta el comando
+`manage.py procesar_trabajos` con un grupo de procesos. Cada tipo de trabajo
+es una función registrada con el decorador @trabajo que recibe un Contexto
+para leer sus parámetros y reportar progreso. Los trabajos que fallan se
+reintentan con espera exponencial hasta `max_intentos`, y los que quedan
+en curso sin latido (proceso caído) vuelven a la cola.
+
+Mientras un trabajo se ejecuta, un hilo renueva su latido cada
+INTERVALO_LATIDO segundos aunque un paso tarde más que TIEMPO_ABANDONO. Los
+cambios de estado del trabajo (progreso, fin, reintento) solo se aplican si
+sigue en curso a nombre del mismo trabajador: si otro proceso lo recuperó,
+el trabajador anterior ya no lo modifica.
+"""
+import csv
+import logging
+import os
+import socket
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .archivo import años_archivados
+from .campos import a_unidades_menores, desde_unidades_menores
+from .models import Categoria, Presupuesto, Trabajo, Transaccion
+
+CONFIGURACION_POR_DEFECTO = {
+    'PROCESOS': 2,
+    'INTERVALO_SONDEO': 1.0,
+    'MAX_INTENTOS': 3,
+    'ESPERA_REINTENTO': 10,
+    'TIEMPO_ABANDONO': 600,
+    'INTERVALO_LATIDO': 30,
+    'DIRECTORIO_ARCHIVOS': 'importaciones',
+}
+
+logger = logging.getLogger(__name__)
+
+# tipo: función
+REGISTRO = {}
+
+
+def configuracion_trabajos():
+    """Configuración efectiva de TRABAJOS con sus valores por defecto"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'TRABAJOS', {})}
+
+
+def trabajo(tipo):
+    """Registra una función como tipo de trabajo"""
+    def registrar(funcion):
+        REGISTRO[tipo] = funcion
+        return funcion
+    return registrar
+
+
+def encolar(tipo, parametros=None, prioridad=0, max_intentos=None, demora=0):
+    """Crea un trabajo pendiente y lo devuelve"""
+    if tipo not in REGISTRO:
+        raise ValueError(f'Tipo de trabajo desconocido: {tipo}')
+    return Trabajo.objects.create(
+        tipo=tipo,
+        parametros=parametros or {},
+        prioridad=prioridad,
+        max_intentos=max_intentos or configuracion_trabajos()['MAX_INTENTOS'],
+        disponible_desde=timezone.now() + timedelta(seconds=demora),
+    )
+
+
+class TrabajoPerdido(Exception):
+    """El trabajo dejó de estar en curso a nombre de este trabajador (otro proceso lo recuperó)"""
+
+
+def _propio(trabajo):
+    """Queryset del trabajo mientras siga en curso a nombre del trabajador que lo reclamó"""
+    return Trabajo.objects.filter(pk=trabajo.pk, trabajador=trabajo.trabajador, estado=Trabajo.EN_CURSO)
+
+
+class Contexto:
+    """Acceso de un trabajo en ejecución a sus parámetros, progreso y punto de control"""
+
+    def __init__(self, trabajo):
+        self.trabajo = trabajo
+        self.parametros = trabajo.parametros
+        self.punto_control = dict(trabajo.punto_control)
+
+    def reportar(self, progreso, mensaje='', **punto_control):
+        """
+        Guarda el progreso (0-100) y, opcionalmente, un punto de control desde
+        el que se reanuda si el trabajo se reintenta. Llamado dentro de la
+        misma transacción que el trabajo parcial, ambos se confirman juntos.
+        Lanza TrabajoPerdido si el trabajo ya no es de este trabajador, lo que
+        deshace también el trabajo parcial.
+        """
+        self.punto_control.update(punto_control)
+        actualizado = _propio(self.trabajo).update(
+            progreso=max(0, min(100, int(progreso))),
+            mensaje=mensaje[:255],
+            punto_control=self.punto_control,
+            latido=timezone.now(),
+        )
+        if not actualizado:
+            raise TrabajoPerdido(f'El trabajo {self.trabajo.pk} ya no está en curso en {self.trabajo.trabajador}')
+
+
+def latir(trabajo, intervalo=None):
+    """Hilo que renueva el latido del trabajo hasta que se active el evento devuelto"""
+    intervalo = intervalo or configuracion_trabajos()['INTERVALO_LATIDO']
+
+    def renovar(detener):
+        try:
+            while not detener.wait(intervalo):
+                try:
+                    if not _propio(trabajo).update(latido=timezone.now()):
+                        return
+                except DatabaseError:
+                    # Base ocupada por una escritura larga: se intenta en el próximo intervalo
+                    logger.warning('No se pudo renovar el latido del trabajo %s', trabajo.pk, exc_info=True)
+        finally:
+            # Las conexiones son por hilo: se cierra la de este hilo
+            connections.close_all()
+
+    detener = threading.Event()
+    threading.Thread(target=renovar, args=(detener,), name=f'latido_{trabajo.pk}', daemon=True).start()
+    return detener
+
+
+def nombre_trabajador():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def reclamar(trabajador, tipos=None):
+    """
+    Toma el siguiente trabajo disponible (mayor prioridad, más antiguo).
+
+    El reclamo es un UPDATE condicionado al estado pendiente: si otro proceso
+    lo tomó antes, no afecta filas y se prueba el siguiente candidato.
+    """
+    ahora = timezone.now()
+    candidatos = Trabajo.objects.filter(
+        estado=Trabajo.PENDIENTE, disponible_desde__lte=ahora
+    ).order_by('-prioridad', 'disponible_desde', 'id')
+    if tipos:
+        candidatos = candidatos.filter(tipo__in=tipos)
+
+    for pk in candidatos.values_list('pk', flat=True)[:10]:
+        reclamado = Trabajo.objects.filter(pk=pk, estado=Trabajo.PENDIENTE).update(
+            estado=Trabajo.EN_CURSO,
+            trabajador=trabajador,
+            intentos=F('intentos') + 1,
+            fecha_inicio=ahora,
+            latido=ahora,
+        )
+        if reclamado:
+            return Trabajo.objects.get(pk=pk)
+    return None
+
+
+def _reprogramar_o_fallar(trabajo, error, **condiciones):
+    """
+    Vuelve a encolar el trabajo con espera exponencial o lo marca como fallido,
+    si sigue en curso a nombre de su trabajador (y cumple `condiciones`)
+    """
+    ahora = timezone.now()
+    if trabajo.intentos < trabajo.max_intentos:
+        espera = configuracion_trabajos()['ESPERA_REINTENTO'] * 2 ** (trabajo.intentos - 1)
+        cambios = {
+            'estado': Trabajo.PENDIENTE,
+            'disponible_desde': ahora + timedelta(seconds=espera),
+        }
+    else:
+        cambios = {'estado': Trabajo.FALLIDO, 'fecha_fin': ahora}
+    return _propio(trabajo).filter(**condiciones).update(error=error, trabajador='', **cambios)
+
+
+def ejecutar(trabajo):
+    """Ejecuta un trabajo reclamado y registra su resultado"""
+    funcion = REGISTRO.get(trabajo.tipo)
+    if funcion is None:
+        _propio(trabajo).update(
+            estado=Trabajo.FALLIDO,
+            error=f'Tipo de trabajo desconocido: {trabajo.tipo}',
+            fecha_fin=timezone.now(),
+        )
+        return
+
+    detener_latido = latir(trabajo)
+    try:
+        resultado = funcion(Contexto(trabajo))
+    except TrabajoPerdido:
+        logger.warning('Trabajo %s recuperado por otro proceso: %s lo abandona', trabajo.pk, trabajo.trabajador)
+        return
+    except Exception:
+        _reprogramar_o_fallar(trabajo, traceback.format_exc())
+        return
+    finally:
+        detener_latido.set()
+
+    completado = _propio(trabajo).update(
+        estado=Trabajo.COMPLETADO,
+        progreso=100,
+        resultado=resultado,
+        error='',
+        fecha_fin=timezone.now(),
+    )
+    if not completado:
+        logger.warning('Trabajo %s recuperado por otro proceso: no se marca completado', trabajo.pk)
+
+
+def recuperar_abandonados():
+    """Reencola (o da por fallidos) los trabajos en curso cuyo proceso dejó de dar latidos"""
+    limite = timezone.now() - timedelta(seconds=configuracion_trabajos()['TIEMPO_ABANDONO'])
+    abandonados = Trabajo.objects.filter(estado=Trabajo.EN_CURSO, latido__lt=limite)
+    # Condicionado al latido vencido: si el trabajador latió entre la consulta y el UPDATE, sigue siendo suyo
+    return sum(
+        _reprogramar_o_fallar(trabajo, f'Abandonado por {trabajo.trabajador} sin latido', latido__lt=limite)
+        for trabajo in abandonados
+    )
+
+
+def guardar_archivo(archivo):
+    """Guarda un archivo subido para que lo procese un trabajo y devuelve su ruta"""
+    directorio = Path(configuracion_trabajos()['DIRECTORIO_ARCHIVOS'])
+    directorio.mkdir(parents=True, exist_ok=True)
+    destino = directorio / f'{uuid.uuid4().hex}{Path(archivo.name).suffix}'
+    with open(destino, 'wb') as salida:
+        for fragmento in archivo.chunks():
+            salida.write(fragmento)
+    return str(destino)
+
+
+# Tipos de trabajo incluidos
+
+@trabajo('recalcular_presupuestos')
+def recalcular_presupuestos(contexto):
+    """Recalcula el gasto y las alertas de los presupuestos de un mes o de todos"""
+    from .alertas import reevaluar_mes
+
+    mes, año = contexto.parametros.get('mes'), contexto.parametros.get('año')
+    if mes and año:
+        periodos = [(int(año), int(mes))]
+    else:
+        periodos = list(
+            Presupuesto.objects.order_by('año', 'mes').values_list('año', 'mes').distinct()
+        )
+
+    evaluados = alertas = 0
+    for i, (año, mes) in enumerate(periodos, 1):
+        n, nuevas = reevaluar_mes(año, mes)
+        evaluados += n
+        alertas += len(nuevas)
+        contexto.reportar(i * 100 // len(periodos), f'{mes}/{año}')
+    return {'meses': len(periodos), 'presupuestos': evaluados, 'alertas': alertas}
+
+
+@trabajo('transacciones_masivas')
+def transacciones_masivas(contexto):
+    """Actualización o borrado masivo de transacciones demasiado grande para una petición (ver masivas.py)"""
+    from .masivas import ejecutar_trabajo
+
+    return ejecutar_trabajo(contexto)
+
+
+COLUMNAS_IMPORTACION = ('fecha', 'descripcion', 'monto', 'tipo', 'categoria')
+
+
+def _leer_fila(fila, categorias, archivados):
+    fecha = parse_date((fila.get('fecha') or '').strip())
+    if fecha is None:
+        raise ValueError('fecha inválida')
+    if fecha.year in archivados:
+        raise ValueError(f'el año {fecha.year} está archivado')
+    tipo = (fila.get('tipo') or '').strip().lower()
+    if tipo not in ('ingreso', 'gasto'):
+        raise ValueError('tipo inválido')
+    monto = desde_unidades_menores(a_unidades_menores((fila.get('monto') or '').strip()))
+    nombre_categoria = (fila.get('categoria') or '').strip()
+    categoria_id = categorias.get((nombre_categoria.lower(), tipo)) if nombre_categoria else None
+    if nombre_categoria and categoria_id is None:
+        raise ValueError(f'categoría desconocida: {nombre_categoria}')
+    return Transaccion(
+        fecha=fecha,
+        descripcion=(fila.get('descripcion') or '').strip()[:200],
+        monto=monto,
+        tipo=tipo,
+        categoria_id=categoria_id,
+        notas=(fila.get('notas') or '').strip(),
+    )
+
+
+@trabajo('importar_transacciones')
+def importar_transacciones(contexto, tamaño_lote=1000):
+    """
+    Importa transacciones desde un CSV con columnas fecha, descripcion, monto,
+    tipo, categoria (nombre) y notas opcional. Inserta por lotes; cada lote se
+    confirma junto con su punto de control, de modo que un reintento continúa
+    donde quedó sin duplicar filas. Al final reevalúa los presupuestos de los
+    meses afectados.
+    """
+    from .alertas import reevaluar_mes
+    from .eventos import publicar_lote
+    from .sincronizacion import registrar
+
+    ruta = Path(contexto.parametros['archivo'])
+    with open(ruta, encoding='utf-8-sig', newline='') as archivo:
+        filas = list(csv.DictReader(archivo))
+    if filas and not set(COLUMNAS_IMPORTACION) <= set(filas[0]):
+        raise ValueError(f'El CSV debe tener las columnas: {", ".join(COLUMNAS_IMPORTACION)}')
+
+    categorias = {
+        (nombre.lower(), tipo): pk
+        for pk, nombre, tipo in Categoria.objects.values_list('pk', 'nombre', 'tipo')
+    }
+    archivados = set(años_archivados())
+    procesadas = contexto.punto_control.get('procesadas', 0)
+    importadas = contexto.punto_control.get('importadas', 0)
+    errores = contexto.punto_control.get('errores', [])
+    meses = {tuple(periodo) for periodo in contexto.punto_control.get('meses', [])}
+    meses_con_filas = {tuple(periodo) for periodo in contexto.punto_control.get('meses_con_filas', [])}
+
+    while procesadas < len(filas):
+        lote = []
+        for numero, fila in enumerate(filas[procesadas:procesadas + tamaño_lote], procesadas + 2):
+            try:
+                lote.append(_leer_fila(fila, categorias, archivados))
+            except ValueError as exc:
+                if len(errores) < 50:
+                    errores.append({'linea': numero, 'error': str(exc)})
+        procesadas = min(procesadas + tamaño_lote, len(filas))
+        importadas += len(lote)
+        meses.update((t.fecha.year, t.fecha.month) for t in lote if t.tipo == 'gasto')
+        meses_con_filas.update((t.fecha.year, t.fecha.month) for t in lote)
+
+        with transaction.atomic():
+            Transaccion.objects.bulk_create(lote)
+            registrar(Transaccion, [t.pk for t in lote])
+            contexto.reportar(
+                procesadas * 90 // len(filas), f'{procesadas}/{len(filas)} filas',
+                procesadas=procesadas, importadas=importadas, errores=errores,
+                meses=sorted(meses), meses_con_filas=sorted(meses_con_filas),
+            )
+
+    # bulk_create no dispara señales: el gasto de los presupuestos se recalcula por mes
+    for año, mes in sorted(meses):
+        reevaluar_mes(año, mes)
+    # Como las demás altas masivas: un evento por mes en el flujo de eventos
+    publicar_lote('transaccion', meses_con_filas)
+    contexto.reportar(100, 'Presupuestos reevaluados')
+
+    ruta.unlink(missing_ok=True)
+    return {'filas': len(filas), 'importadas': importadas, 'errores': errores}
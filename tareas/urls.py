@@ -1,19 +1,37 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import eventos, lotes, sincronizacion, vistas_async
 from .views import (
     CategoriaViewSet, PresupuestoViewSet, TransaccionViewSet,
-    MetaFinancieraViewSet, LeccionEducativaViewSet, AnalisisViewSet
+    MetaFinancieraViewSet, LeccionEducativaViewSet, AnalisisViewSet,
+    AlertaPresupuestoViewSet, TrabajoViewSet, TransaccionRecurrenteViewSet, EtiquetaViewSet
 )
 
 router = DefaultRouter()
 router.register(r'categorias', CategoriaViewSet, basename='categoria')
+router.register(r'etiquetas', EtiquetaViewSet, basename='etiqueta')
 router.register(r'presupuestos', PresupuestoViewSet, basename='presupuesto')
 router.register(r'transacciones', TransaccionViewSet, basename='transaccion')
+router.register(r'recurrencias', TransaccionRecurrenteViewSet, basename='recurrencia')
 router.register(r'metas', MetaFinancieraViewSet, basename='meta')
 router.register(r'lecciones', LeccionEducativaViewSet, basename='leccion')
 router.register(r'analisis', AnalisisViewSet, basename='analisis')
+router.register(r'alertas', AlertaPresupuestoViewSet, basename='alerta')
+router.register(r'jobs', TrabajoViewSet, basename='trabajo')
+
+# Versiones asíncronas de las vistas de análisis (pensadas para servirse bajo ASGI)
+urlpatterns_async = [
+    path('analisis/dashboard/', vistas_async.dashboard, name='async-analisis-dashboard'),
+    path('transacciones/', vistas_async.lista_transacciones, name='async-transaccion-list'),
+    path('transacciones/resumen_mensual/', vistas_async.resumen_mensual, name='async-transaccion-resumen-mensual'),
+    path('transacciones/tendencias/', vistas_async.tendencias, name='async-transaccion-tendencias'),
+]
 
 urlpatterns = [
+    path('batch/', lotes.lote, name='batch'),
+    path('eventos/', eventos.flujo_eventos, name='eventos'),
+    path('sync/', sincronizacion.sincronizar, name='sync'),
+    path('async/', include(urlpatterns_async)),
     path('', include(router.urls)),
 ]
 
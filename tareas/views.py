@@ -1,18 +1,40 @@
+from datetime import timedelta
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum, Q, Count
+from rest_framework.reverse import reverse
+from django.db.models import Sum, prefetch_related_objects
+from django.http import Http404
 from django.utils import timezone
-from datetime import datetime, timedelta
-from decimal import Decimal
+from django.utils.dateparse import parse_date
 
-from .models import Categoria, Presupuesto, Transaccion, MetaFinanciera, LeccionEducativa
+from . import analisis, anomalias, archivo, etiquetas, masivas, pronostico, recurrencias, trabajos
+from .coalescencia import coalescer
+from .replicas import en_replica, leyendo_de_replica
+from .campos import a_unidades_menores, desde_unidades_menores
+from .filtros import filtrar_categoria, filtrar_transacciones
+from .models import (
+    Categoria, Presupuesto, Transaccion, MetaFinanciera, LeccionEducativa,
+    AlertaPresupuesto, Trabajo, TransaccionRecurrente, Etiqueta
+)
 from .serializers import (
     CategoriaSerializer, PresupuestoSerializer, TransaccionSerializer,
-    MetaFinancieraSerializer, LeccionEducativaSerializer
+    MetaFinancieraSerializer, LeccionEducativaSerializer, AlertaPresupuestoSerializer,
+    TrabajoSerializer, TransaccionRecurrenteSerializer, EtiquetaSerializer
 )
 
 
+def respuesta_trabajo(request, trabajo):
+    """Respuesta 202 con el id del trabajo encolado y la URL para consultar su estado"""
+    url = reverse('trabajo-detail', args=[trabajo.pk], request=request)
+    return Response(
+        {'trabajo': trabajo.pk, 'estado': trabajo.estado, 'url': url},
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': url}
+    )
+
+
 class CategoriaViewSet(viewsets.ModelViewSet):
     """ViewSet para gestionar categorías"""
     queryset = Categoria.objects.all()
@@ -26,6 +48,41 @@ class CategoriaViewSet(viewsets.ModelViewSet):
         return queryset
 
 
+class EtiquetaViewSet(viewsets.ModelViewSet):
+    """ViewSet para gestionar etiquetas y asignarlas en masa"""
+    queryset = Etiqueta.objects.all()
+    serializer_class = EtiquetaSerializer
+    
+    def _transacciones(self, request):
+        configuracion = etiquetas.configuracion_etiquetas()
+        ids = request.data.get('transacciones', None)
+        if not isinstance(ids, list) or not ids:
+            raise ValueError('Debe indicar la lista "transacciones" con los ids a modificar')
+        if len(ids) > configuracion['MAX_TRANSACCIONES']:
+            raise ValueError(f'Se admiten hasta {configuracion["MAX_TRANSACCIONES"]} transacciones por petición')
+        return etiquetas.leer_ids(ids)
+    
+    @action(detail=True, methods=['post'])
+    def asignar(self, request, pk=None):
+        """Agrega la etiqueta a las transacciones "transacciones" (lista de ids)"""
+        etiqueta = self.get_object()
+        try:
+            ids = self._transacciones(request)
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'etiqueta': etiqueta.pk, 'asignadas': etiquetas.asignar(etiqueta, ids)})
+    
+    @action(detail=True, methods=['post'])
+    def quitar(self, request, pk=None):
+        """Quita la etiqueta de las transacciones "transacciones" (lista de ids)"""
+        etiqueta = self.get_object()
+        try:
+            ids = self._transacciones(request)
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'etiqueta': etiqueta.pk, 'quitadas': etiquetas.quitar(etiqueta, ids)})
+
+
 class PresupuestoViewSet(viewsets.ModelViewSet):
     """ViewSet para gestionar presupuestos"""
     queryset = Presupuesto.objects.all()
@@ -42,6 +99,27 @@ class PresupuestoViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(año=año)
         
         return queryset
+    
+    @action(detail=False, methods=['post'])
+    def recalcular(self, request):
+        """Encola el recálculo del gasto y las alertas (de un mes o de todos los presupuestos)"""
+        mes = request.data.get('mes', None)
+        año = request.data.get('año', None)
+        if bool(mes) != bool(año):
+            return Response(
+                {'error': 'Debe indicar "mes" y "año" juntos, o ninguno para recalcular todo'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            parametros = {'mes': int(mes), 'año': int(año)} if mes else {}
+        except (TypeError, ValueError):
+            return Response({'error': '"mes" y "año" deben ser números enteros'}, status=status.HTTP_400_BAD_REQUEST)
+        if parametros and not 1 <= parametros['mes'] <= 12:
+            return Response({'error': '"mes" debe estar entre 1 y 12'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        trabajo = trabajos.encolar('recalcular_presupuestos', parametros, prioridad=1)
+        return respuesta_trabajo(request, trabajo)
 
 
 class TransaccionViewSet(viewsets.ModelViewSet):
@@ -50,95 +128,190 @@ class TransaccionViewSet(viewsets.ModelViewSet):
     serializer_class = TransaccionSerializer
     
     def get_queryset(self):
-        queryset = Transaccion.objects.all()
-        tipo = self.request.query_params.get('tipo', None)
-        categoria = self.request.query_params.get('categoria', None)
-        fecha_desde = self.request.query_params.get('fecha_desde', None)
-        fecha_hasta = self.request.query_params.get('fecha_hasta', None)
-        
-        if tipo:
-            queryset = queryset.filter(tipo=tipo)
-        if categoria:
-            queryset = queryset.filter(categoria_id=categoria)
-        if fecha_desde:
-            queryset = queryset.filter(fecha__gte=fecha_desde)
-        if fecha_hasta:
-            queryset = queryset.filter(fecha__lte=fecha_hasta)
+        return filtrar_transacciones(Transaccion.objects.all(), self.request.query_params)
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Lista de la tabla activa. Si fecha_desde llega a años archivados, se
+        unen sus tablas de archivo (sin fecha_desde solo se ve la tabla activa).
+        """
+        params = request.query_params
+        try:
+            desde = parse_date(params.get('fecha_desde', ''))
+            hasta = parse_date(params.get('fecha_hasta', ''))
+        except ValueError:
+            desde = hasta = None
+        try:
+            queryset = archivo.consultar(
+                desde, hasta, filtro=lambda queryset: filtrar_transacciones(queryset, params)
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return queryset
+        pagina = self.paginate_queryset(queryset)
+        if pagina is not None:
+            # La unión no admite select_related: las categorías y etiquetas se cargan en una consulta cada una
+            prefetch_related_objects(pagina, 'categoria', 'etiquetas')
+            return self.get_paginated_response(self.get_serializer(pagina, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Detalle de una transacción, buscándola también en los años archivados"""
+        try:
+            transaccion = archivo.buscar(int(kwargs['pk']))
+        except ValueError:
+            raise Http404
+        if transaccion is None:
+            raise Http404
+        return Response(self.get_serializer(transaccion).data)
     
     @action(detail=False, methods=['get'])
+    @en_replica
     def resumen_mensual(self, request):
-        """Obtiene resumen financiero del mes actual"""
+        """Obtiene resumen financiero del mes actual (o de "categoria" y sus subcategorías)"""
         ahora = timezone.now()
         mes = int(request.query_params.get('mes', ahora.month))
         año = int(request.query_params.get('año', ahora.year))
         
-        transacciones = Transaccion.objects.filter(
-            fecha__year=año,
-            fecha__month=mes
-        )
-        
-        ingresos = transacciones.filter(tipo='ingreso').aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        gastos = transacciones.filter(tipo='gasto').aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        balance = ingresos - gastos
+        # Tabla activa y, si el año está archivado, sus resúmenes mensuales
+        try:
+            fuentes = [filtrar_categoria(fuente, request.query_params) for fuente in analisis.fuentes_del_mes(año, mes)]
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        totales = analisis.combinar_totales([
+            fuente.aggregate(**analisis.AGREGADOS_INGRESOS_GASTOS) for fuente in fuentes
+        ])
         
         # Gastos por categoría
-        gastos_por_categoria = transacciones.filter(tipo='gasto').values(
-            'categoria__nombre'
-        ).annotate(
-            total=Sum('monto')
-        ).order_by('-total')
+        gastos_por_categoria = analisis.ordenar_por_total(analisis.combinar_filas(
+            [analisis.gastos_por_categoria(fuente) for fuente in fuentes], ('categoria__nombre',)
+        ))
         
-        return Response({
-            'mes': mes,
-            'año': año,
-            'ingresos': float(ingresos),
-            'gastos': float(gastos),
-            'balance': float(balance),
-            'gastos_por_categoria': list(gastos_por_categoria)
-        })
+        return Response(analisis.formatear_resumen_mensual(mes, año, totales, gastos_por_categoria))
     
     @action(detail=False, methods=['get'])
+    @coalescer
+    @en_replica
     def tendencias(self, request):
-        """Obtiene tendencias de los últimos meses"""
+        """Obtiene tendencias de los últimos meses (o de "categoria" y sus subcategorías)"""
         meses = int(request.query_params.get('meses', 6))
-        ahora = timezone.now()
+        periodos = analisis.periodos_tendencia(meses, timezone.now())
+        
+        # Una sola consulta agrupada por mes en lugar de dos agregados por mes
+        try:
+            fuentes = [
+                filtrar_categoria(fuente, request.query_params) for fuente in analisis.fuentes_por_periodo(periodos)
+            ]
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        listas = [list(fuente) for fuente in fuentes]
+        
+        return Response(analisis.formatear_tendencias(periodos, listas))
+    
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        """Encola la importación de un CSV de transacciones (campo "archivo")"""
+        archivo = request.FILES.get('archivo', None)
+        if archivo is None:
+            return Response(
+                {'error': 'Debe adjuntar un archivo CSV en el campo "archivo"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        ruta = trabajos.guardar_archivo(archivo)
+        trabajo = trabajos.encolar('importar_transacciones', {'archivo': ruta, 'nombre': archivo.name})
+        return respuesta_trabajo(request, trabajo)
+    
+    def _operacion_masiva(self, request, operacion):
+        """
+        Simula, ejecuta o (por encima de MASIVAS['MAX_SINCRONO'] filas) encola
+        como trabajo una actualización o un borrado masivo
+        """
+        cambios_recibidos = request.data.get('cambios', None)
+        try:
+            seleccion = masivas.Seleccion(request.data.get('ids', None), request.data.get('filtros', None))
+            cambios = masivas.validar_cambios(cambios_recibidos) if operacion == 'actualizar' else None
+            if str(request.data.get('simular', False)).lower() in ('1', 'true', 'si', 'sí'):
+                return Response(masivas.simular(seleccion))
+            total = masivas.comprobar_limite(seleccion)
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        datos = []
-        for i in range(meses):
-            fecha = ahora - timedelta(days=30 * i)
-            mes = fecha.month
-            año = fecha.year
-            
-            transacciones = Transaccion.objects.filter(
-                fecha__year=año,
-                fecha__month=mes
+        if total > masivas.configuracion_masivas()['MAX_SINCRONO']:
+            trabajo = trabajos.encolar(
+                'transacciones_masivas',
+                masivas.parametros_trabajo(operacion, seleccion, cambios_recibidos, total),
             )
-            
-            ingresos = transacciones.filter(tipo='ingreso').aggregate(
-                total=Sum('monto')
-            )['total'] or Decimal('0.00')
-            
-            gastos = transacciones.filter(tipo='gasto').aggregate(
-                total=Sum('monto')
-            )['total'] or Decimal('0.00')
-            
-            datos.append({
-                'mes': mes,
-                'año': año,
-                'ingresos': float(ingresos),
-                'gastos': float(gastos),
-                'balance': float(ingresos - gastos)
-            })
-        
-        return Response(datos[::-1])  # Invertir para mostrar del más antiguo al más reciente
+            return respuesta_trabajo(request, trabajo)
+        if operacion == 'actualizar':
+            return Response(masivas.actualizar(seleccion, cambios))
+        return Response(masivas.eliminar(seleccion))
+    
+    @action(detail=False, methods=['post'])
+    def actualizar_lote(self, request):
+        """
+        Asigna "cambios" (categoria, tipo, descripcion, notas) a las transacciones
+        de "ids" o de "filtros" (los del listado). Con "simular" solo las cuenta
+        """
+        return self._operacion_masiva(request, 'actualizar')
+    
+    @action(detail=False, methods=['post'])
+    def eliminar_lote(self, request):
+        """Elimina las transacciones de "ids" o de "filtros". Con "simular" solo las cuenta"""
+        return self._operacion_masiva(request, 'eliminar')
+
+
+class TransaccionRecurrenteViewSet(viewsets.ModelViewSet):
+    """ViewSet para gestionar transacciones recurrentes y generar sus ocurrencias"""
+    queryset = TransaccionRecurrente.objects.all()
+    serializer_class = TransaccionRecurrenteSerializer
+    
+    def get_queryset(self):
+        queryset = TransaccionRecurrente.objects.select_related('categoria')
+        activa = self.request.query_params.get('activa', None)
+        tipo = self.request.query_params.get('tipo', None)
+        
+        if activa is not None:
+            queryset = queryset.filter(activa=activa.lower() in ('1', 'true', 'si', 'sí'))
+        if tipo:
+            queryset = queryset.filter(tipo=tipo)
+        
+        return queryset
+    
+    def _fecha_hasta(self, request):
+        hasta = request.data.get('hasta', None)
+        if not hasta:
+            return timezone.localdate()
+        fecha = parse_date(str(hasta))
+        if fecha is None:
+            raise ValueError('"hasta" debe ser una fecha AAAA-MM-DD')
+        return fecha
+    
+    @action(detail=False, methods=['post'])
+    def materializar(self, request):
+        """Genera las transacciones pendientes de todas las recurrencias (o de "ids") hasta "hasta" """
+        ids = request.data.get('ids', None)
+        try:
+            hasta = self._fecha_hasta(request)
+            if ids is not None:
+                if not isinstance(ids, list):
+                    raise ValueError('"ids" debe ser una lista de ids')
+                ids = [int(pk) for pk in ids]
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(recurrencias.materializar(hasta, ids))
+    
+    @action(detail=True, methods=['post'], url_path='materializar')
+    def materializar_una(self, request, pk=None):
+        """Genera las transacciones pendientes de esta recurrencia hasta "hasta" """
+        recurrencia = self.get_object()
+        try:
+            hasta = self._fecha_hasta(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(recurrencias.materializar(hasta, [recurrencia.pk]))
 
 
 class MetaFinancieraViewSet(viewsets.ModelViewSet):
@@ -157,7 +330,10 @@ class MetaFinancieraViewSet(viewsets.ModelViewSet):
     def agregar_monto(self, request, pk=None):
         """Agrega monto a una meta financiera"""
         meta = self.get_object()
-        monto = Decimal(request.data.get('monto', 0))
+        try:
+            monto = desde_unidades_menores(a_unidades_menores(request.data.get('monto', 0)))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         meta.monto_actual += monto
         
         if meta.monto_actual >= meta.monto_objetivo:
@@ -166,6 +342,23 @@ class MetaFinancieraViewSet(viewsets.ModelViewSet):
         meta.save()
         serializer = self.get_serializer(meta)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def pronostico(self, request):
+        """
+        Probabilidad de cumplir cada meta en progreso a tiempo y fechas de
+        cumplimiento (p10, p50, p90) según el ahorro mensual histórico.
+        """
+        try:
+            simulaciones = int(request.query_params.get('simulaciones', 0))
+        except ValueError:
+            simulaciones = -1
+        if simulaciones < 0:
+            return Response(
+                {'error': '"simulaciones" debe ser un entero positivo'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(pronostico.pronostico_metas(simulaciones))
 
 
 class LeccionEducativaViewSet(viewsets.ReadOnlyModelViewSet):
@@ -181,11 +374,85 @@ class LeccionEducativaViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
+class AlertaPresupuestoViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para consultar las alertas de umbral de presupuestos"""
+    queryset = AlertaPresupuesto.objects.all()
+    serializer_class = AlertaPresupuestoSerializer
+    
+    def get_queryset(self):
+        queryset = AlertaPresupuesto.objects.select_related('presupuesto__categoria')
+        leida = self.request.query_params.get('leida', None)
+        presupuesto = self.request.query_params.get('presupuesto', None)
+        
+        if leida is not None:
+            queryset = queryset.filter(leida=leida.lower() in ('1', 'true', 'si', 'sí'))
+        if presupuesto:
+            queryset = queryset.filter(presupuesto_id=presupuesto)
+        
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def no_leidas(self, request):
+        """Alertas no leídas posteriores al cursor, en orden de creación"""
+        cursor = int(request.query_params.get('cursor', 0))
+        limite = min(int(request.query_params.get('limite', 50)), 500)
+        
+        alertas = list(
+            self.get_queryset()
+            .filter(leida=False, id__gt=cursor)
+            .order_by('id')[:limite]
+        )
+        
+        return Response({
+            'cursor': alertas[-1].id if alertas else cursor,
+            'hay_mas': len(alertas) == limite,
+            'alertas': self.get_serializer(alertas, many=True).data
+        })
+    
+    @action(detail=False, methods=['post'])
+    def marcar_leidas(self, request):
+        """Marca como leídas todas las alertas hasta el cursor indicado"""
+        hasta = request.data.get('hasta', None)
+        if hasta is None:
+            return Response(
+                {'error': 'Debe indicar el cursor "hasta"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        actualizadas = AlertaPresupuesto.objects.filter(
+            leida=False, id__lte=int(hasta)
+        ).update(leida=True)
+        return Response({'actualizadas': actualizadas})
+
+
+class TrabajoViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para consultar el estado de los trabajos en segundo plano"""
+    queryset = Trabajo.objects.all()
+    serializer_class = TrabajoSerializer
+    
+    def get_queryset(self):
+        queryset = Trabajo.objects.all()
+        estado = self.request.query_params.get('estado', None)
+        tipo = self.request.query_params.get('tipo', None)
+        
+        if estado:
+            queryset = queryset.filter(estado=estado)
+        if tipo:
+            queryset = queryset.filter(tipo=tipo)
+        
+        return queryset
+
+
 # ViewSet para análisis y estadísticas
 class AnalisisViewSet(viewsets.ViewSet):
-    """ViewSet para análisis financieros"""
+    """ViewSet para análisis financieros (todas sus lecturas van a la réplica)"""
+    
+    def dispatch(self, request, *args, **kwargs):
+        with leyendo_de_replica():
+            return super().dispatch(request, *args, **kwargs)
     
     @action(detail=False, methods=['get'])
+    @coalescer
     def dashboard(self, request):
         """Dashboard con estadísticas generales"""
         ahora = timezone.now()
@@ -193,52 +460,155 @@ class AnalisisViewSet(viewsets.ViewSet):
         año_actual = ahora.year
         
         # Transacciones del mes actual
-        transacciones_mes = Transaccion.objects.filter(
-            fecha__year=año_actual,
-            fecha__month=mes_actual
+        totales_mes = analisis.transacciones_del_mes(año_actual, mes_actual).aggregate(
+            **analisis.AGREGADOS_INGRESOS_GASTOS
         )
         
-        ingresos_mes = transacciones_mes.filter(tipo='ingreso').aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        gastos_mes = transacciones_mes.filter(tipo='gasto').aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        # Presupuestos del mes
-        presupuestos = Presupuesto.objects.filter(mes=mes_actual, año=año_actual)
-        total_presupuestado = presupuestos.aggregate(
+        # Presupuestos del mes (sin contar dos veces los de subcategorías)
+        total_presupuestado = analisis.presupuestos_raiz_del_mes(año_actual, mes_actual).aggregate(
             total=Sum('monto_limite')
-        )['total'] or Decimal('0.00')
+        )['total']
         
         # Metas activas
-        metas_activas = MetaFinanciera.objects.filter(estado='en_progreso')
-        total_metas = metas_activas.aggregate(
-            total=Sum('monto_objetivo')
-        )['total'] or Decimal('0.00')
-        total_ahorrado = metas_activas.aggregate(
-            total=Sum('monto_actual')
-        )['total'] or Decimal('0.00')
+        totales_metas = analisis.metas_activas().aggregate(**analisis.AGREGADOS_METAS)
+        
+        # Categorías más usadas (tabla activa y años archivados)
+        categorias = analisis.categorias_mas_usadas(
+            [list(fuente) for fuente in analisis.fuentes_categorias_mas_usadas()]
+        )
+        
+        return Response(analisis.formatear_dashboard(
+            totales_mes, total_presupuestado, totales_metas, categorias
+        ))
+    
+    @staticmethod
+    def _periodo(params, dias):
+        """Rango [desde, hasta] de los parámetros; por defecto los últimos `dias` días hasta hoy"""
+        hasta = timezone.localdate()
+        desde = hasta - timedelta(days=dias - 1)
+        if params.get('desde'):
+            desde = parse_date(params['desde'])
+        if params.get('hasta'):
+            hasta = parse_date(params['hasta'])
+        if desde is None or hasta is None:
+            raise ValueError('"desde" y "hasta" deben ser fechas AAAA-MM-DD')
+        if desde > hasta:
+            raise ValueError('"desde" no puede ser posterior a "hasta"')
+        return desde, hasta
+    
+    @action(detail=False, methods=['get'])
+    def anomalias(self, request):
+        """
+        Gastos inusuales para su categoría (z robusto sobre mediana y MAD).
+        Parámetros: desde, hasta (AAAA-MM-DD), umbral, ventana (días) y limite.
+        """
+        configuracion = anomalias.configuracion_anomalias()
+        params = request.query_params
+        try:
+            desde, hasta = self._periodo(params, configuracion['DIAS'])
+            umbral = float(params.get('umbral', configuracion['UMBRAL']))
+            ventana = int(params.get('ventana', configuracion['VENTANA_DIAS']))
+            limite = min(int(params.get('limite', configuracion['LIMITE'])), configuracion['LIMITE_MAXIMO'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if ventana < 1 or limite < 1:
+            return Response(
+                {'error': '"ventana" y "limite" deben ser positivos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
+        resultado = anomalias.anomalias_cacheadas(desde, hasta, umbral, ventana, configuracion['MIN_MUESTRAS'])
         return Response({
-            'mes_actual': {
-                'ingresos': float(ingresos_mes),
-                'gastos': float(gastos_mes),
-                'balance': float(ingresos_mes - gastos_mes),
-                'presupuesto_total': float(total_presupuestado),
-                'presupuesto_usado': float(gastos_mes),
-                'presupuesto_restante': float(total_presupuestado - gastos_mes)
-            },
-            'metas': {
-                'total_metas': metas_activas.count(),
-                'monto_total_objetivo': float(total_metas),
-                'monto_total_ahorrado': float(total_ahorrado),
-                'porcentaje_promedio': float((total_ahorrado / total_metas * 100) if total_metas > 0 else 0)
-            },
-            'categorias_mas_usadas': list(
-                Transaccion.objects.values('categoria__nombre')
-                .annotate(total=Count('id'), monto_total=Sum('monto'))
-                .order_by('-total')[:5]
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'umbral': umbral,
+            **anomalias.formatear_anomalias(resultado, limite),
+        })
+    
+    @action(detail=False, methods=['get'])
+    @coalescer
+    def mapa_calor(self, request):
+        """
+        Gastos por categoría y día de la semana (eje=dia_semana) o del mes
+        (eje=dia_mes) como matriz densa. Parámetros: desde, hasta, eje, tipo
+        y categoria (con sus subcategorías).
+        """
+        params = request.query_params
+        eje = params.get('eje', 'dia_semana')
+        tipo = params.get('tipo', 'gasto')
+        if eje not in analisis.EJES_MAPA_CALOR or tipo not in ('gasto', 'ingreso'):
+            return Response(
+                {'error': f'"eje" debe ser uno de {", ".join(analisis.EJES_MAPA_CALOR)} y "tipo" gasto o ingreso'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            desde, hasta = self._periodo(params, 365)
+            filas = filtrar_categoria(analisis.mapa_calor(desde, hasta, eje, tipo), params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'tipo': tipo,
+            **analisis.formatear_mapa_calor(filas, eje),
+        })
+    
+    @action(detail=False, methods=['get'])
+    def etiquetas(self, request):
+        """
+        Importe y cantidad de movimientos por etiqueta. Parámetros: desde, hasta
+        (el último año por defecto), tipo y categoria (con sus subcategorías).
+        """
+        params = request.query_params
+        tipo = params.get('tipo', 'gasto')
+        if tipo not in ('gasto', 'ingreso'):
+            return Response({'error': '"tipo" debe ser gasto o ingreso'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            desde, hasta = self._periodo(params, 365)
+            filas = filtrar_categoria(etiquetas.totales_por_etiqueta(desde, hasta, tipo), params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'tipo': tipo,
+            'etiquetas': analisis.formatear_etiquetas(Etiqueta.objects.values('id', 'nombre', 'color'), filas),
+        })
+    
+    @action(detail=False, methods=['get'])
+    def categorias(self, request):
+        """
+        Árbol de categorías con el total de cada una sumando sus subcategorías
+        (`total`) y el suyo propio (`total_propio`) en un mes. Parámetros: mes, año y tipo.
+        """
+        ahora = timezone.now()
+        params = request.query_params
+        tipo = params.get('tipo', 'gasto')
+        try:
+            mes = int(params.get('mes', ahora.month))
+            año = int(params.get('año', ahora.year))
+            if tipo not in ('gasto', 'ingreso') or not 1 <= mes <= 12:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'error': '"mes" debe estar entre 1 y 12, "año" ser un entero y "tipo" gasto o ingreso'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        fuentes = analisis.fuentes_del_mes(año, mes)
+        subtotales = analisis.combinar_filas(
+            [analisis.totales_por_subarbol(fuente, tipo) for fuente in fuentes], ('subarbol',)
+        )
+        propios = analisis.combinar_filas(
+            [analisis.totales_por_categoria(fuente, tipo) for fuente in fuentes], ('categoria_id',)
+        )
+        return Response({
+            'mes': mes,
+            'año': año,
+            'tipo': tipo,
+            'categorias': analisis.formatear_arbol_categorias(
+                analisis.categorias_con_nivel(tipo), subtotales, propios
+            ),
         })
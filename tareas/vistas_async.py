@@ -0,0 +1,159 @@
+"""
+Versiones asíncronas de las vistas de análisis de lectura intensiva.
+
+Usan el ORM asíncrono de Django y ejecutan en paralelo (asyncio.gather) los
+agregados independientes, de modo que bajo ASGI una consulta lenta no ocupa
+un hilo del servidor. Devuelven exactamente el mismo JSON que las acciones
+equivalentes de TransaccionViewSet y AnalisisViewSet.
+
+Nota: con SQLite las consultas se serializan en el único hilo del ORM
+(thread_sensitive), por lo que la ganancia viene sobre todo de liberar el
+bucle de eventos; con PostgreSQL los agregados corren realmente en paralelo.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Sum, prefetch_related_objects
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import analisis, archivo
+from .filtros import filtrar_categoria, filtrar_transacciones
+from .replicas import en_replica
+from .serializers import TransaccionSerializer
+
+
+def _respuesta(datos, status=200):
+    # El codificador de DRF serializa Decimal igual que las vistas síncronas
+    return JsonResponse(
+        datos, encoder=JSONEncoder, safe=False, status=status,
+        json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def solo_get(vista):
+    """Equivalente a require_GET para vistas asíncronas (Django 4.2 no lo soporta)"""
+    @wraps(vista)
+    async def envoltura(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        return await vista(request, *args, **kwargs)
+    return envoltura
+
+
+async def _lista(queryset):
+    return [fila async for fila in queryset]
+
+
+@solo_get
+@en_replica
+async def dashboard(request):
+    """Dashboard con estadísticas generales (agregados en paralelo)"""
+    ahora = timezone.now()
+    mes_actual, año_actual = ahora.month, ahora.year
+
+    totales_mes, presupuestos, totales_metas, *categorias = await asyncio.gather(
+        analisis.transacciones_del_mes(año_actual, mes_actual).aaggregate(
+            **analisis.AGREGADOS_INGRESOS_GASTOS
+        ),
+        analisis.presupuestos_raiz_del_mes(año_actual, mes_actual).aaggregate(total=Sum('monto_limite')),
+        analisis.metas_activas().aaggregate(**analisis.AGREGADOS_METAS),
+        *[_lista(fuente) for fuente in analisis.fuentes_categorias_mas_usadas()],
+    )
+
+    return _respuesta(analisis.formatear_dashboard(
+        totales_mes, presupuestos['total'], totales_metas, analisis.categorias_mas_usadas(categorias)
+    ))
+
+
+@solo_get
+@en_replica
+async def resumen_mensual(request):
+    """Resumen financiero de un mes (totales y gastos por categoría en paralelo)"""
+    ahora = timezone.now()
+    mes = int(request.GET.get('mes', ahora.month))
+    año = int(request.GET.get('año', ahora.year))
+
+    try:
+        fuentes = [filtrar_categoria(fuente, request.GET) for fuente in analisis.fuentes_del_mes(año, mes)]
+    except ValueError as e:
+        return _respuesta({'error': str(e)}, status=400)
+    resultados = await asyncio.gather(
+        *[fuente.aaggregate(**analisis.AGREGADOS_INGRESOS_GASTOS) for fuente in fuentes],
+        *[_lista(analisis.gastos_por_categoria(fuente)) for fuente in fuentes],
+    )
+    totales = analisis.combinar_totales(resultados[:len(fuentes)])
+    gastos_categoria = analisis.ordenar_por_total(
+        analisis.combinar_filas(resultados[len(fuentes):], ('categoria__nombre',))
+    )
+
+    return _respuesta(analisis.formatear_resumen_mensual(mes, año, totales, gastos_categoria))
+
+
+@solo_get
+@en_replica
+async def tendencias(request):
+    """Tendencias de los últimos meses con una consulta agrupada"""
+    meses = int(request.GET.get('meses', 6))
+    periodos = analisis.periodos_tendencia(meses, timezone.now())
+    try:
+        fuentes = [filtrar_categoria(fuente, request.GET) for fuente in analisis.fuentes_por_periodo(periodos)]
+    except ValueError as e:
+        return _respuesta({'error': str(e)}, status=400)
+    listas = await asyncio.gather(*[_lista(fuente) for fuente in fuentes])
+    return _respuesta(analisis.formatear_tendencias(periodos, listas))
+
+
+@solo_get
+async def lista_transacciones(request):
+    """Listado paginado de transacciones con el mismo formato que PageNumberPagination"""
+    tamaño = settings.REST_FRAMEWORK['PAGE_SIZE']
+    try:
+        pagina = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        return _respuesta({'detail': 'Página inválida.'}, status=404)
+
+    try:
+        desde = parse_date(request.GET.get('fecha_desde', ''))
+        hasta = parse_date(request.GET.get('fecha_hasta', ''))
+    except ValueError:
+        desde = hasta = None
+    # Une las tablas de archivo si el rango de fechas las alcanza (igual que la vista síncrona)
+    try:
+        queryset = await sync_to_async(archivo.consultar)(
+            desde, hasta, filtro=lambda queryset: filtrar_transacciones(queryset, request.GET)
+        )
+    except ValueError as e:
+        return _respuesta({'error': str(e)}, status=400)
+    inicio = (pagina - 1) * tamaño
+
+    total, transacciones = await asyncio.gather(
+        queryset.acount(),
+        _lista(queryset[inicio:inicio + tamaño]),
+    )
+    if pagina > 1 and not transacciones:
+        return _respuesta({'detail': 'Página inválida.'}, status=404)
+    # Las categorías y etiquetas se cargan antes de serializar para evitar consultas perezosas
+    # (síncronas); la unión con el archivo no admite select_related
+    await sync_to_async(prefetch_related_objects)(transacciones, 'categoria', 'etiquetas')
+
+    url = request.build_absolute_uri()
+    siguiente = replace_query_param(url, 'page', pagina + 1) if inicio + tamaño < total else None
+    if pagina <= 1:
+        anterior = None
+    elif pagina == 2:
+        anterior = remove_query_param(url, 'page')
+    else:
+        anterior = replace_query_param(url, 'page', pagina - 1)
+
+    return _respuesta({
+        'count': total,
+        'next': siguiente,
+        'previous': anterior,
+        'results': TransaccionSerializer(transacciones, many=True).data,
+    })